@@ -0,0 +1,856 @@
+"""A local stand-in for provider APIs, for benchmarks that must not touch the network.
+
+Speaks the OpenAI-compatible chat completions and embeddings wire format (also
+used by Groq, Together, Mistral and the other OpenAI-compatible providers) and
+the Anthropic messages format, with and without SSE streaming. Latency, time to
+first token, token rate, server errors, 429s and dropped streams are drawn from a
+configurable `Profile`.
+
+The OpenAI files and batches endpoints and the Anthropic message batches
+endpoints are served too. Batches are answered right away but only report that
+they ended on their second retrieval, so clients go through at least one poll;
+`error_rate` then applies to each request in the batch.
+
+Google's SDK talks gRPC, so `FakeGenerativeModel` and `fake_embed_content_async`
+stand in for it in-process, with the same timings.
+
+    python benchmarks/fake_server.py --port 8000 --ttft lognormal:0.2,0.5 --tokens-per-second 80
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import email.parser
+import email.policy
+import enum
+import json
+import math
+import random
+import struct
+import subprocess
+import sys
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+from urllib.parse import urlsplit
+
+WORDS = tuple(f" {x}" for x in "the quick brown fox jumps over a lazy dog".split())
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+ERROR_TYPES = {
+    400: "invalid_request_error",
+    404: "not_found_error",
+    429: "rate_limit_error",
+}
+
+
+@dataclass
+class Delay:
+    """A random delay in seconds.
+
+    Attributes:
+        kind (str): "constant" (`a`), "uniform" (between `a` and `b`), "lognormal"
+            (median `a`, log-space standard deviation `b`) or "exponential" (mean `a`).
+        a (float): First parameter.
+        b (float): Second parameter.
+    """
+
+    kind: str = "constant"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, value: str) -> "Delay":
+        """Parse "0.1", "uniform:0.1,0.3", "lognormal:0.2,0.5" or "exponential:0.1"."""
+        kind, _, params = value.rpartition(":")
+        a, _, b = params.partition(",")
+
+        return cls(kind or "constant", float(a), float(b or 0))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "constant":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return self.a * math.exp(rng.gauss(0, self.b))
+        if self.kind == "exponential":
+            return rng.expovariate(1 / self.a) if self.a > 0 else 0.0
+
+        msg = f"Unknown delay distribution: {self.kind}"
+        raise ValueError(msg)
+
+
+@dataclass
+class Profile:
+    """How the fake provider behaves.
+
+    Attributes:
+        latency (Delay): Network round trip added before every response.
+        ttft (Delay): Time from the request to the first generated token.
+        tokens_per_second (float): Generation speed after the first token; 0 for instant.
+        completion_tokens (int): Tokens generated per reply, unless `max_tokens` is lower.
+        chunk_tokens (int): Tokens per streamed chunk.
+        embedding_dim (int): Dimension of returned embeddings.
+        error_rate (float): Probability of a 500 response.
+        rate_limit_rate (float): Probability of a 429 response.
+        retry_after (float): `Retry-After` seconds sent with 429s.
+        disconnect_rate (float): Probability of dropping a stream halfway through.
+        seed (int | None): Seeds the random choices.
+    """
+
+    latency: Delay = field(default_factory=Delay)
+    ttft: Delay = field(default_factory=Delay)
+    tokens_per_second: float = 0.0
+    completion_tokens: int = 64
+    chunk_tokens: int = 1
+    embedding_dim: int = 256
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 0.0
+    disconnect_rate: float = 0.0
+    seed: int | None = None
+
+    def to_args(self) -> list[str]:
+        """Return the command line options of `fake_server.py` for this profile."""
+        return [
+            *("--latency", f"{self.latency.kind}:{self.latency.a},{self.latency.b}"),
+            *("--ttft", f"{self.ttft.kind}:{self.ttft.a},{self.ttft.b}"),
+            *("--tokens-per-second", str(self.tokens_per_second)),
+            *("--completion-tokens", str(self.completion_tokens)),
+            *("--chunk-tokens", str(self.chunk_tokens)),
+            *("--embedding-dim", str(self.embedding_dim)),
+            *("--error-rate", str(self.error_rate)),
+            *("--rate-limit-rate", str(self.rate_limit_rate)),
+            *("--retry-after", str(self.retry_after)),
+            *("--disconnect-rate", str(self.disconnect_rate)),
+            *(("--seed", str(self.seed)) if self.seed is not None else ()),
+        ]
+
+
+def _chunks(tokens: int, size: int) -> Iterator[str]:
+    for start in range(0, tokens, size):
+        yield "".join(WORDS[i % len(WORDS)] for i in range(start, min(tokens, start + size)))
+
+
+async def generate(profile: Profile, rng: random.Random, tokens: int) -> AsyncIterator[str]:
+    """Yield the text chunks of a reply of `tokens` tokens, paced by `profile`."""
+    await asyncio.sleep(profile.ttft.sample(rng))
+    start = time.perf_counter()
+    produced = 0
+    for chunk in _chunks(tokens, profile.chunk_tokens):
+        if produced and profile.tokens_per_second:
+            # Pace against the start so sleep overshoot does not accumulate.
+            delay = start + produced / profile.tokens_per_second - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        produced += profile.chunk_tokens
+        yield chunk
+
+
+def _estimate_tokens(body: Any) -> int:
+    return len(json.dumps(body)) // 4 + 1
+
+
+class FakeServer:
+    """An HTTP/1.1 server answering like the OpenAI and Anthropic APIs.
+
+    Args:
+        profile (Profile): How to behave.
+        host (str, optional): Interface to bind. Defaults to "127.0.0.1".
+        port (int, optional): Port to bind; 0 picks a free one. Defaults to 0.
+    """
+
+    def __init__(self, profile: Profile, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.profile = profile
+        self.host = host
+        self.port = port
+        self.statuses: Counter[int] = Counter()
+        self._files: dict[str, bytes] = {}
+        self._batches: dict[str, dict] = {}
+        self._batch_retrievals: Counter[str] = Counter()
+        self._rng = random.Random(profile.seed)
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        vector = [self._rng.uniform(-1, 1) for _ in range(profile.embedding_dim)]
+        self._vector = vector
+        self._vector_base64 = base64.b64encode(
+            struct.pack(f"<{len(vector)}f", *vector),
+        ).decode()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise hold `wait_closed` open.
+            for writer in self._writers:
+                writer.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> "FakeServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while request_line := await reader.readline():
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in {b"\r\n", b"\n", b""}:
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await self._read_body(reader, headers)
+
+                keep_alive = await self._dispatch(
+                    method,
+                    urlsplit(target).path,
+                    headers,
+                    body,
+                    writer,
+                )
+                if not keep_alive or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            await reader.readline()
+            return b"".join(parts)
+
+        return await reader.readexactly(int(headers.get("content-length", 0)))
+
+    async def _dispatch(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        raw_body: bytes,
+        writer: asyncio.StreamWriter,
+    ) -> bool:
+        if "/batches" in path or "/files" in path:
+            return await self._dispatch_batch(method, path, headers, raw_body, writer)
+
+        anthropic = path.endswith("/messages")
+        if method != "POST" or not (
+            anthropic or path.endswith(("/chat/completions", "/embeddings"))
+        ):
+            return await self._send_error(writer, 404, f"No route for {method} {path}", anthropic)
+
+        try:
+            body = json.loads(raw_body or b"{}")
+        except json.JSONDecodeError as e:
+            return await self._send_error(writer, 400, str(e), anthropic)
+
+        # Rate limits are rejected right away, as real providers do.
+        if self._rng.random() < self.profile.rate_limit_rate:
+            return await self._send_error(
+                writer,
+                429,
+                "Rate limit exceeded",
+                anthropic,
+                headers={"Retry-After": f"{self.profile.retry_after:g}"},
+            )
+
+        await asyncio.sleep(self.profile.latency.sample(self._rng))
+        if self._rng.random() < self.profile.error_rate:
+            return await self._send_error(writer, 500, "Injected server error", anthropic)
+
+        if path.endswith("/embeddings"):
+            return await self._send_json(writer, 200, self._embeddings(body))
+
+        prompt_tokens, tokens, truncated = self._get_reply_size(body)
+        if body.get("stream"):
+            make_stream = self._anthropic_stream if anthropic else self._openai_stream
+            return await self._send_stream(
+                writer,
+                make_stream(body, prompt_tokens, tokens, truncated),
+            )
+
+        # A non-streamed reply is ready once the last token is generated.
+        text = "".join([x async for x in generate(self.profile, self._rng, tokens)])
+        make = self._anthropic_message if anthropic else self._openai_completion
+
+        return await self._send_json(
+            writer,
+            200,
+            make(body, text, prompt_tokens, tokens, truncated),
+        )
+
+    def _get_reply_size(self, body: dict) -> tuple[int, int, bool]:
+        """Return the prompt tokens, completion tokens and whether the reply is truncated."""
+        limit = body.get("max_tokens") or self.profile.completion_tokens
+        tokens = min(limit, self.profile.completion_tokens)
+
+        return (
+            _estimate_tokens(body.get("messages")),
+            tokens,
+            tokens < self.profile.completion_tokens,
+        )
+
+    async def _dispatch_batch(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        raw_body: bytes,
+        writer: asyncio.StreamWriter,
+    ) -> bool:
+        anthropic = "/messages/batches" in path
+        parts = path.rstrip("/").split("/")
+        if method == "POST" and parts[-1] == "files":
+            return await self._send_json(writer, 200, self._upload_file(headers, raw_body))
+
+        if method == "POST" and parts[-1] == "batches":
+            try:
+                body = json.loads(raw_body or b"{}")
+            except json.JSONDecodeError as e:
+                return await self._send_error(writer, 400, str(e), anthropic)
+            create = self._create_message_batch if anthropic else self._create_batch
+            return await self._send_json(writer, 200, create(body))
+
+        if method == "GET" and parts[-1] in {"content", "results"}:
+            file_id = parts[-2]
+            if anthropic:
+                file_id = self._batches.get(file_id, {}).get("_results_file_id", "")
+            if (data := self._files.get(file_id)) is not None:
+                return await self._send_bytes(writer, 200, data, "application/jsonl")
+
+        if method == "GET" and (batch := self._batches.get(parts[-1])) is not None:
+            return await self._send_json(writer, 200, self._retrieve_batch(batch))
+
+        return await self._send_error(writer, 404, f"No route for {method} {path}", anthropic)
+
+    def _upload_file(self, headers: dict[str, str], raw_body: bytes) -> dict:
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {headers.get('content-type', '')}\r\n\r\n".encode() + raw_body,
+        )
+        fields = {
+            x.get_param("name", header="content-disposition"): x
+            for x in message.iter_parts()
+        }
+        data = fields["file"].get_payload(decode=True)
+
+        return {
+            "id": self._add_file(data),
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": fields["file"].get_filename(),
+            "purpose": fields["purpose"].get_content(),
+            "status": "processed",
+        }
+
+    def _answer_batch(self, requests: list[dict], anthropic: bool) -> tuple[bytes, bytes]:
+        """Answer the requests of a batch, returning the result and error JSONL files."""
+        results, errors = [], []
+        for request in requests:
+            body = request["params"] if anthropic else request["body"]
+            custom_id = request["custom_id"]
+            failed = self._rng.random() < self.profile.error_rate
+            if anthropic and failed:
+                error = {"type": "api_error", "message": "Injected server error"}
+                result = {"type": "errored", "error": {"type": "error", "error": error}}
+                results.append({"custom_id": custom_id, "result": result})
+                continue
+            if failed:
+                error = {"type": "api_error", "message": "Injected server error"}
+                response = {"status_code": 500, "body": {"error": error}}
+                errors.append({"custom_id": custom_id, "response": response, "error": None})
+                continue
+
+            prompt_tokens, tokens, truncated = self._get_reply_size(body)
+            text = "".join(_chunks(tokens, self.profile.chunk_tokens))
+            if anthropic:
+                message = self._anthropic_message(body, text, prompt_tokens, tokens, truncated)
+                result = {"type": "succeeded", "message": message}
+                results.append({"custom_id": custom_id, "result": result})
+            else:
+                completion = self._openai_completion(body, text, prompt_tokens, tokens, truncated)
+                response = {"status_code": 200, "body": completion}
+                results.append({"custom_id": custom_id, "response": response, "error": None})
+
+        def encode(lines: list[dict]) -> bytes:
+            return b"".join(json.dumps(x).encode() + b"\n" for x in lines)
+
+        return encode(results), encode(errors)
+
+    def _add_file(self, data: bytes) -> str:
+        file_id = f"file-{len(self._files)}"
+        self._files[file_id] = data
+
+        return file_id
+
+    def _create_batch(self, body: dict) -> dict:
+        lines = self._files[body["input_file_id"]].splitlines()
+        results, errors = self._answer_batch([json.loads(x) for x in lines if x], False)
+        batch_id = f"batch_{len(self._batches)}"
+        self._batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "errors": None,
+            "input_file_id": body["input_file_id"],
+            "completion_window": body["completion_window"],
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "request_counts": {
+                "total": len(lines),
+                "completed": len(results.splitlines()),
+                "failed": len(errors.splitlines()),
+            },
+            "_output_file_id": self._add_file(results) if results else None,
+            "_error_file_id": self._add_file(errors) if errors else None,
+        }
+
+        return self._public(self._batches[batch_id])
+
+    def _create_message_batch(self, body: dict) -> dict:
+        requests = body.get("requests") or []
+        results, _ = self._answer_batch(requests, True)
+        batch_id = f"msgbatch_{len(self._batches)}"
+        outcomes = Counter(json.loads(x)["result"]["type"] for x in results.splitlines())
+        self._batches[batch_id] = {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "in_progress",
+            "request_counts": {
+                "processing": len(requests),
+                "succeeded": 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "results_url": None,
+            "_request_counts": {
+                "processing": 0,
+                "succeeded": outcomes["succeeded"],
+                "errored": outcomes["errored"],
+                "canceled": 0,
+                "expired": 0,
+            },
+            "_results_file_id": self._add_file(results),
+        }
+
+        return self._public(self._batches[batch_id])
+
+    def _retrieve_batch(self, batch: dict) -> dict:
+        self._batch_retrievals[batch["id"]] += 1
+        if self._batch_retrievals[batch["id"]] >= 2:
+            if batch.get("type") == "message_batch":
+                batch["processing_status"] = "ended"
+                batch["request_counts"] = batch["_request_counts"]
+                batch["results_url"] = f"{self.url}/v1/messages/batches/{batch['id']}/results"
+            else:
+                batch["status"] = "completed"
+                batch["output_file_id"] = batch["_output_file_id"]
+                batch["error_file_id"] = batch["_error_file_id"]
+
+        return self._public(batch)
+
+    @staticmethod
+    def _public(batch: dict) -> dict:
+        return {k: v for k, v in batch.items() if not k.startswith("_")}
+
+    def _embeddings(self, body: dict) -> dict:
+        inputs = body.get("input")
+        inputs = [inputs] if isinstance(inputs, str) else inputs or []
+        vector = (
+            self._vector_base64
+            if body.get("encoding_format") == "base64"
+            else self._vector
+        )
+        tokens = _estimate_tokens(inputs)
+
+        return {
+            "id": "embd-fake",
+            "object": "list",
+            "model": body.get("model"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": vector}
+                for i in range(len(inputs))
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @staticmethod
+    def _openai_completion(
+        body: dict,
+        text: str,
+        prompt_tokens: int,
+        tokens: int,
+        truncated: bool,
+    ) -> dict:
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "length" if truncated else "stop",
+                },
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": tokens,
+                "total_tokens": prompt_tokens + tokens,
+            },
+        }
+
+    async def _openai_stream(
+        self,
+        body: dict,
+        prompt_tokens: int,
+        tokens: int,
+        truncated: bool,
+    ) -> AsyncIterator[bytes]:
+        base = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model"),
+        }
+
+        def event(choices: list, **extra) -> bytes:
+            return f"data: {json.dumps(base | {'choices': choices} | extra)}\n\n".encode()
+
+        delta: dict[str, str] = {"role": "assistant"}
+        async for text in generate(self.profile, self._rng, tokens):
+            yield event([{"index": 0, "delta": delta | {"content": text}, "finish_reason": None}])
+            delta = {}
+        yield event(
+            [{"index": 0, "delta": {}, "finish_reason": "length" if truncated else "stop"}],
+        )
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": tokens,
+                "total_tokens": prompt_tokens + tokens,
+            }
+            yield event([], usage=usage)
+        yield b"data: [DONE]\n\n"
+
+    @staticmethod
+    def _anthropic_message(
+        body: dict,
+        text: str,
+        prompt_tokens: int,
+        tokens: int,
+        truncated: bool,
+    ) -> dict:
+        return {
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "max_tokens" if truncated else "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": prompt_tokens, "output_tokens": tokens},
+        }
+
+    async def _anthropic_stream(
+        self,
+        body: dict,
+        prompt_tokens: int,
+        tokens: int,
+        truncated: bool,
+    ) -> AsyncIterator[bytes]:
+        def event(name: str, data: dict) -> bytes:
+            return f"event: {name}\ndata: {json.dumps(data | {'type': name})}\n\n".encode()
+
+        message = self._anthropic_message(body, "", prompt_tokens, 1, False)
+        yield event("message_start", {"message": message | {"content": [], "stop_reason": None}})
+        yield event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+        async for text in generate(self.profile, self._rng, tokens):
+            yield event(
+                "content_block_delta",
+                {"index": 0, "delta": {"type": "text_delta", "text": text}},
+            )
+        yield event("content_block_stop", {"index": 0})
+        yield event(
+            "message_delta",
+            {
+                "delta": {
+                    "stop_reason": "max_tokens" if truncated else "end_turn",
+                    "stop_sequence": None,
+                },
+                "usage": {"output_tokens": tokens},
+            },
+        )
+        yield event("message_stop", {})
+
+    async def _send_error(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        message: str,
+        anthropic: bool,
+        headers: dict[str, str] | None = None,
+    ) -> bool:
+        kind = ERROR_TYPES.get(status, "api_error")
+        error = {"type": kind, "message": message}
+        payload = {"type": "error", "error": error} if anthropic else {"error": error}
+
+        return await self._send_json(writer, status, payload, headers)
+
+    def _write_head(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: dict[str, str],
+    ) -> None:
+        self.statuses[status] += 1
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_json(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: dict,
+        headers: dict[str, str] | None = None,
+    ) -> bool:
+        data = json.dumps(payload).encode()
+
+        return await self._send_bytes(writer, status, data, "application/json", headers)
+
+    async def _send_bytes(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        data: bytes,
+        content_type: str,
+        headers: dict[str, str] | None = None,
+    ) -> bool:
+        self._write_head(
+            writer,
+            status,
+            {
+                "Content-Type": content_type,
+                "Content-Length": str(len(data)),
+                **(headers or {}),
+            },
+        )
+        writer.write(data)
+        await writer.drain()
+
+        return True
+
+    async def _send_stream(
+        self,
+        writer: asyncio.StreamWriter,
+        events: AsyncIterator[bytes],
+    ) -> bool:
+        self._write_head(
+            writer,
+            200,
+            {
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "Transfer-Encoding": "chunked",
+            },
+        )
+        cut = (
+            self.profile.completion_tokens // (2 * self.profile.chunk_tokens)
+            if self._rng.random() < self.profile.disconnect_rate
+            else None
+        )
+        count = 0
+        async for data in events:
+            if count == cut:
+                writer.transport.abort()
+                return False
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+            count += 1
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+        return True
+
+
+class _FinishReason(enum.Enum):
+    STOP = 1
+    MAX_TOKENS = 2
+
+
+class FakeGenerativeModel:
+    """Stands in for `google.generativeai.GenerativeModel` with the timings of `profile`."""
+
+    def __init__(self, profile: Profile) -> None:
+        self.profile = profile
+        self._rng = random.Random(profile.seed)
+
+    def _result(self, contents: Any, text: str, tokens: int, finish: _FinishReason | None) -> Any:
+        return SimpleNamespace(
+            text=text,
+            candidates=[
+                SimpleNamespace(
+                    content=SimpleNamespace(
+                        parts=[SimpleNamespace(text=text, function_call=None)],
+                    ),
+                    finish_reason=finish,
+                ),
+            ],
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=_estimate_tokens(contents),
+                candidates_token_count=tokens,
+                cached_content_token_count=0,
+            ),
+        )
+
+    async def generate_content_async(
+        self,
+        contents: Any,
+        *,
+        stream: bool = False,
+        generation_config: Any = None,
+        **kwargs,
+    ) -> Any:
+        await asyncio.sleep(self.profile.latency.sample(self._rng))
+        if self._rng.random() < self.profile.error_rate:
+            msg = "Injected server error"
+            raise RuntimeError(msg)
+
+        limit = getattr(generation_config, "max_output_tokens", None)
+        tokens = min(limit or self.profile.completion_tokens, self.profile.completion_tokens)
+        finish = (
+            _FinishReason.MAX_TOKENS
+            if tokens < self.profile.completion_tokens
+            else _FinishReason.STOP
+        )
+        chunks = generate(self.profile, self._rng, tokens)
+        if not stream:
+            text = "".join([x async for x in chunks])
+            return self._result(contents, text, tokens, finish)
+
+        async def stream_chunks() -> AsyncIterator[Any]:
+            produced = 0
+            async for text in chunks:
+                produced = min(tokens, produced + self.profile.chunk_tokens)
+                yield self._result(contents, text, produced, finish if produced == tokens else None)
+
+        return stream_chunks()
+
+
+def fake_embed_content_async(profile: Profile) -> Any:
+    """Return a stand-in for `google.generativeai.embed_content_async`."""
+    rng = random.Random(profile.seed)
+    vector = [rng.uniform(-1, 1) for _ in range(profile.embedding_dim)]
+
+    async def embed_content_async(model: str, content: str | list[str], **kwargs) -> dict:
+        await asyncio.sleep(profile.latency.sample(rng))
+        if isinstance(content, str):
+            return {"embedding": list(vector)}
+
+        return {"embedding": [list(vector) for _ in content]}
+
+    return embed_content_async
+
+
+@contextlib.contextmanager
+def serve_in_subprocess(profile: Profile) -> Iterator[str]:
+    """Run the fake server in a child process and yield its URL.
+
+    A separate process keeps the server's CPU time out of client measurements.
+    """
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--port", "0", *profile.to_args()],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        line = process.stdout.readline()
+        if not line.startswith("Listening on "):
+            msg = "The fake server failed to start"
+            raise RuntimeError(msg)
+        yield line.removeprefix("Listening on ").strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=Delay.parse, default="0")
+    parser.add_argument("--ttft", type=Delay.parse, default="0")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    parser.add_argument("--chunk-tokens", type=int, default=1)
+    parser.add_argument("--embedding-dim", type=int, default=256)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.0)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+    return parser.parse_args()
+
+
+async def serve(args) -> None:
+    profile = Profile(
+        latency=args.latency,
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        chunk_tokens=args.chunk_tokens,
+        embedding_dim=args.embedding_dim,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        disconnect_rate=args.disconnect_rate,
+        seed=args.seed,
+    )
+    async with FakeServer(profile, args.host, args.port) as server:
+        print(f"Listening on {server.url}", flush=True)
+        await asyncio.Event().wait()
+
+
+def main():
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
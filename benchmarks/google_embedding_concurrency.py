@@ -0,0 +1,76 @@
+"""Check that concurrent `GoogleEmbedding` calls overlap instead of serializing.
+
+By default the network round trip is simulated by patching the SDK call with an
+`asyncio.sleep` of `--latency` seconds, so no API key is needed. With `--live`
+real requests are sent using `GOOGLE_API_KEY`.
+
+    python benchmarks/google_embedding_concurrency.py -n 16 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest import mock
+
+from llm_taxi.factory import embedding
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("-n", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--model", type=str, default="google:models/embedding-001")
+    parser.add_argument("--live", action="store_true")
+
+    return parser.parse_args()
+
+
+async def run(args) -> float:
+    embedder = embedding(
+        args.model,
+        api_key=os.getenv("GOOGLE_API_KEY", "fake-key"),
+    )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(embedder.embed_text(f"text {i}") for i in range(args.n)))
+
+    return time.perf_counter() - start
+
+
+async def fake_embed_content_async(model, content, **kwargs):
+    await asyncio.sleep(fake_embed_content_async.latency)
+
+    return {"embedding": [0.0] * 768}
+
+
+def main():
+    args = parse_args()
+
+    if args.live:
+        elapsed = asyncio.run(run(args))
+        print(f"{args.n} live calls: {elapsed:.3f}s")
+        return
+
+    fake_embed_content_async.latency = args.latency
+    with mock.patch(
+        "google.generativeai.embed_content_async",
+        fake_embed_content_async,
+    ):
+        elapsed = asyncio.run(run(args))
+
+    serial = args.n * args.latency
+    print(
+        f"{args.n} calls with {args.latency:.3f}s latency: {elapsed:.3f}s "
+        f"(serial would take {serial:.3f}s, speed-up {serial / elapsed:.1f}x)",
+    )
+    if elapsed > 2 * args.latency:
+        print("Error: calls did not overlap")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
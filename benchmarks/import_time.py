@@ -0,0 +1,86 @@
+"""Guard the start-up cost of `import llm_taxi`.
+
+Runs ``python -X importtime`` in a fresh interpreter, reports the cumulative
+import time of `llm_taxi` and fails if any vendor SDK was pulled in eagerly or
+the import took longer than the given budget.
+
+    python benchmarks/import_time.py --max-ms 300
+"""
+
+import argparse
+import subprocess
+import sys
+
+VENDOR_MODULES = (
+    "openai",
+    "anthropic",
+    "groq",
+    "together",
+    "mistralai",
+    "google.generativeai",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--statement", type=str, default="import llm_taxi.factory")
+    parser.add_argument("--max-ms", type=float, default=500.0)
+    parser.add_argument("--repeat", type=int, default=5)
+
+    return parser.parse_args()
+
+
+def measure(statement: str) -> tuple[float, set[str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        name = name.rstrip()
+        modules.add(name.strip())
+        # Top-level imports are not indented beyond the single leading space.
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+
+    return total_us / 1000, modules
+
+
+def main():
+    args = parse_args()
+
+    timings = []
+    for _ in range(args.repeat):
+        elapsed_ms, modules = measure(args.statement)
+        timings.append(elapsed_ms)
+
+    best_ms = min(timings)
+    print(f"{args.statement!r}: best {best_ms:.1f} ms over {args.repeat} runs")
+
+    leaked = sorted(
+        vendor
+        for vendor in VENDOR_MODULES
+        if any(x == vendor or x.startswith(f"{vendor}.") for x in modules)
+    )
+    if leaked:
+        print(f"Error: vendor SDKs imported eagerly: {', '.join(leaked)}")
+        sys.exit(1)
+
+    if best_ms > args.max_ms:
+        print(f"Error: import took {best_ms:.1f} ms, budget is {args.max_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Load-test every model and embedding class against the fake provider server.
+
+Each class is pointed at `fake_server.py`, which runs in a child process so that
+only the wrapper's own CPU time is measured. Reported per class:
+
+- throughput of non-streamed requests, and their p50/p95 latency;
+- p50/p95 time to first token of streamed requests;
+- client CPU time per streamed chunk and per request;
+- peak traced memory per concurrent stream.
+
+With `--save` the results are written as JSON; with `--compare` the CPU and
+memory figures are checked against such a file and the run fails when one grew by
+more than `--tolerance`.
+
+    python benchmarks/load_test.py --requests 200 --concurrency 32
+    python benchmarks/load_test.py --only openai anthropic --save baseline.json
+    python benchmarks/load_test.py --compare baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import Any
+from unittest import mock
+
+from fake_server import (
+    Delay,
+    FakeGenerativeModel,
+    Profile,
+    fake_embed_content_async,
+    serve_in_subprocess,
+)
+
+from llm_taxi.clients.transport import aclose_transports
+from llm_taxi.conversation import Message, Role
+from llm_taxi.factory import EMBEDDING_CLASSES, MODEL_CLASSES, Provider
+from llm_taxi.retry import RetryPolicy
+
+# Lower is better for all of these; timings depend too much on the machine.
+COMPARED = ("cpu_per_chunk_us", "cpu_per_request_us", "peak_kib_per_stream")
+
+# The SDKs append their own API prefix to these base URLs; the fake server only
+# looks at the end of the path.
+BASE_PATHS = {
+    Provider.Groq: "",
+    Provider.Anthropic: "",
+}
+
+EMBEDDING_MODELS = {
+    Provider.OpenAI: "text-embedding-3-small",
+    Provider.Mistral: "mistral-embed",
+    Provider.Google: "models/embedding-001",
+}
+
+MESSAGES = [
+    Message(role=Role.System, content="You are a helpful assistant."),
+    Message(role=Role.User, content="Tell me a story about a fox. " * 20),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--only", nargs="*", type=str, default=None)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--latency", type=Delay.parse, default="0")
+    parser.add_argument("--ttft", type=Delay.parse, default="0")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=256)
+    parser.add_argument("--chunk-tokens", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry", action="store_true")
+    parser.add_argument("--save", type=str, default=None)
+    parser.add_argument("--compare", type=str, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+
+    return parser.parse_args()
+
+
+def create(classes, provider: Provider, model: str, url: str, profile: Profile, args):
+    kwargs: dict[str, Any] = {"model": model, "api_key": "fake-key"}
+    if args.retry:
+        kwargs["retry_policy"] = RetryPolicy(initial_delay=0.01)
+
+    if provider == Provider.Google:
+        instance = classes[provider](**kwargs)
+        # The Google SDK talks gRPC; stand in for it in-process.
+        instance._client = FakeGenerativeModel(profile)
+        return instance
+
+    # Retries are left to `--retry`, so SDK retries do not hide injected errors.
+    kwargs["max_retries"] = 0
+    if provider == Provider.Mistral:
+        return classes[provider](**kwargs, endpoint=url)
+
+    return classes[provider](**kwargs, base_url=url + BASE_PATHS.get(provider, "/v1"))
+
+
+async def run_many(
+    func: Callable[[], Awaitable[Any]],
+    requests: int,
+    concurrency: int,
+) -> tuple[list[Any], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run() -> Any:
+        async with semaphore:
+            return await func()
+
+    results = await asyncio.gather(*(run() for _ in range(requests)), return_exceptions=True)
+    errors = sum(isinstance(x, Exception) for x in results)
+
+    return [x for x in results if not isinstance(x, Exception)], errors
+
+
+def percentile(values: list[float], q: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else float("nan")
+
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+async def bench_llm(llm, args) -> dict[str, float]:
+    async def respond() -> float:
+        start = time.perf_counter()
+        await llm.response(MESSAGES, max_tokens=args.completion_tokens)
+        return time.perf_counter() - start
+
+    async def stream() -> tuple[float | None, int]:
+        start = time.perf_counter()
+        ttft = None
+        chunks = 0
+        async for _ in await llm.streaming_response(MESSAGES, max_tokens=args.completion_tokens):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            chunks += 1
+        return ttft, chunks
+
+    start, cpu = time.perf_counter(), time.process_time()
+    latencies, errors = await run_many(respond, args.requests, args.concurrency)
+    elapsed, cpu_responses = time.perf_counter() - start, time.process_time() - cpu
+
+    cpu = time.process_time()
+    streams, stream_errors = await run_many(stream, args.requests, args.concurrency)
+    cpu_streams = time.process_time() - cpu
+    chunks = sum(x for _, x in streams)
+
+    tracemalloc.start()
+    await run_many(stream, args.concurrency, args.concurrency)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ttfts = [x for x, _ in streams if x is not None]
+
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_p50_ms": percentile(latencies, 50) * 1e3,
+        "latency_p95_ms": percentile(latencies, 95) * 1e3,
+        "ttft_p50_ms": percentile(ttfts, 50) * 1e3,
+        "ttft_p95_ms": percentile(ttfts, 95) * 1e3,
+        "cpu_per_request_us": cpu_responses / max(1, len(latencies)) * 1e6,
+        "cpu_per_chunk_us": cpu_streams / max(1, chunks) * 1e6,
+        "peak_kib_per_stream": peak / 1024 / args.concurrency,
+        "errors": errors + stream_errors,
+    }
+
+
+async def bench_embedding(embedder, args) -> dict[str, float]:
+    texts = [f"text number {i}" for i in range(args.texts)]
+    counter = iter(range(sys.maxsize))
+
+    async def embed_one() -> list[float]:
+        return await embedder.embed_text(f"query {next(counter)}")
+
+    start, cpu = time.perf_counter(), time.process_time()
+    vectors, errors = await run_many(embed_one, args.requests, args.concurrency)
+    elapsed, cpu_single = time.perf_counter() - start, time.process_time() - cpu
+
+    start, cpu = time.perf_counter(), time.process_time()
+    try:
+        await embedder.embed_texts(texts)
+    except Exception:
+        errors += 1
+    elapsed_batch, cpu_batch = time.perf_counter() - start, time.process_time() - cpu
+
+    tracemalloc.start()
+    with contextlib.suppress(Exception):
+        await embedder.embed_texts(texts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "requests_per_second": len(vectors) / elapsed,
+        "texts_per_second": len(texts) / elapsed_batch,
+        "cpu_per_request_us": cpu_single / max(1, len(vectors)) * 1e6,
+        "cpu_per_text_us": cpu_batch / len(texts) * 1e6,
+        "peak_kib_per_batch": peak / 1024,
+        "errors": errors,
+    }
+
+
+async def run(args, profile: Profile, url: str) -> dict[str, dict[str, float]]:
+    results = {}
+    for provider in MODEL_CLASSES:
+        if args.only and provider.value not in args.only:
+            continue
+        llm = create(MODEL_CLASSES, provider, "fake-model", url, profile, args)
+        results[f"llm:{provider.value}"] = await bench_llm(llm, args)
+
+    for provider in EMBEDDING_CLASSES:
+        if args.only and provider.value not in args.only:
+            continue
+        model = EMBEDDING_MODELS[provider]
+        embedder = create(EMBEDDING_CLASSES, provider, model, url, profile, args)
+        patch = (
+            mock.patch(
+                "google.generativeai.embed_content_async",
+                fake_embed_content_async(profile),
+            )
+            if provider == Provider.Google
+            else contextlib.nullcontext()
+        )
+        with patch:
+            results[f"embedding:{provider.value}"] = await bench_embedding(embedder, args)
+
+    await aclose_transports()
+
+    return results
+
+
+def report(results: dict[str, dict[str, float]]) -> None:
+    for name, metrics in results.items():
+        values = ", ".join(f"{k}={v:.1f}" for k, v in metrics.items())
+        print(f"{name:22} {values}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, metrics in results.items():
+        for key in COMPARED:
+            old, new = baseline.get(name, {}).get(key), metrics.get(key)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(f"{name} {key}: {old:.1f} -> {new:.1f}")
+
+    return regressions
+
+
+def main():
+    args = parse_args()
+    profile = Profile(
+        latency=args.latency,
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        chunk_tokens=args.chunk_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=0,
+    )
+
+    with serve_in_subprocess(profile) as url:
+        results = asyncio.run(run(args, profile, url))
+
+    report(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Error: performance regressions:")
+            print("\n".join(f"  {x}" for x in regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
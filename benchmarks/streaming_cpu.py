@@ -0,0 +1,95 @@
+"""Compare the client CPU cost of the OpenAI streaming modes.
+
+Streams replies from `fake_server.py` (in a child process, at unlimited token
+rate) through `OpenAI` with the SDK parser, with `raw_stream=True`, and with raw
+streams plus chunk coalescing, and reports CPU milliseconds per 1k tokens.
+
+    python benchmarks/streaming_cpu.py --streams 200 --concurrency 50 --tokens 1000
+"""
+
+import argparse
+import asyncio
+import time
+
+from fake_server import Profile, serve_in_subprocess
+
+from llm_taxi.clients.transport import aclose_transports
+from llm_taxi.conversation import Message, Role
+from llm_taxi.llms.openai import OpenAI
+from llm_taxi.llms.streaming import ChunkCoalescing
+
+MESSAGES = [Message(role=Role.User, content="Tell me a story.")]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--min-chars", type=int, default=64)
+
+    return parser.parse_args()
+
+
+async def measure(llm: OpenAI, args) -> tuple[float, int]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def stream() -> int:
+        async with semaphore:
+            chunks = 0
+            async for _ in await llm.streaming_response(MESSAGES, max_tokens=args.tokens):
+                chunks += 1
+            return chunks
+
+    # Warm up connections and imports outside the measurement.
+    await stream()
+
+    cpu = time.process_time()
+    chunks = sum(await asyncio.gather(*(stream() for _ in range(args.streams))))
+    cpu = time.process_time() - cpu
+
+    return cpu * 1e3 / (args.streams * args.tokens / 1000), chunks // args.streams
+
+
+async def run(args, url: str) -> None:
+    modes = {
+        "sdk": {},
+        "raw": {"raw_stream": True},
+        "raw+coalescing": {
+            "raw_stream": True,
+            "chunk_coalescing": ChunkCoalescing(min_chars=args.min_chars, max_delay=None),
+        },
+    }
+
+    results = {}
+    for name, kwargs in modes.items():
+        llm = OpenAI(
+            model="fake-model",
+            api_key="fake-key",
+            base_url=f"{url}/v1",
+            max_retries=0,
+            **kwargs,
+        )
+        results[name] = await measure(llm, args)
+
+    await aclose_transports()
+
+    baseline, _ = results["sdk"]
+    for name, (cpu_ms, chunks) in results.items():
+        print(
+            f"{name:16} {cpu_ms:8.2f} ms CPU per 1k tokens, "
+            f"{chunks:5d} chunks per stream, {baseline / cpu_ms:.1f}x",
+        )
+
+
+def main():
+    args = parse_args()
+    profile = Profile(completion_tokens=args.tokens, seed=0)
+    with serve_in_subprocess(profile) as url:
+        asyncio.run(run(args, url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import json
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from llm_taxi.usage import Response, Usage
+
+DEFAULT_BATCH_DIRECTORY = "~/.cache/llm-taxi/batches"
+
+# Providers charge batch requests at half the synchronous price.
+BATCH_DISCOUNT = 0.5
+
+
+class BatchStatus(Enum):
+    Pending = "pending"
+    InProgress = "in_progress"
+    Completed = "completed"
+    Failed = "failed"
+    Cancelled = "cancelled"
+    Expired = "expired"
+
+    @property
+    def finished(self) -> bool:
+        return self not in {BatchStatus.Pending, BatchStatus.InProgress}
+
+
+class BatchRequestError(Exception):
+    """A request of a batch job that the provider did not complete."""
+
+    def __init__(self, custom_id: str, message: str) -> None:
+        super().__init__(f"Request {custom_id} failed: {message}")
+        self.custom_id = custom_id
+        self.message = message
+
+
+@dataclass
+class BatchJob:
+    """A provider batch job and what is needed to fetch its results.
+
+    Attributes:
+        id (str): The provider's batch ID.
+        provider (str): The provider running the job.
+        model (str): The model the requests were made for.
+        status (BatchStatus): The status as of the last poll.
+        requests (int): Number of submitted conversations.
+        created_at (float): Submission time, in seconds since the epoch.
+        data (dict): Provider-specific details, such as result file IDs.
+    """
+
+    id: str
+    provider: str
+    model: str
+    status: BatchStatus = BatchStatus.Pending
+    requests: int = 0
+    created_at: float = field(default_factory=time.time)
+    data: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self) | {"status": self.status.value}
+
+    @classmethod
+    def from_dict(cls, value: dict[str, Any]) -> "BatchJob":
+        return cls(**(value | {"status": BatchStatus(value["status"])}))
+
+
+class BatchStore:
+    """Persist batch jobs as JSON files so they can be collected from another process."""
+
+    def __init__(self, directory: str | Path = DEFAULT_BATCH_DIRECTORY) -> None:
+        self._directory = Path(directory).expanduser()
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    def _get_path(self, job_id: str) -> Path:
+        return self._directory / f"{job_id}.json"
+
+    def save(self, job: BatchJob) -> None:
+        # Write then rename, so a crash never leaves a truncated job file.
+        fd, path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(path, self._get_path(job.id))
+
+    def load(self, job_id: str) -> BatchJob:
+        with self._get_path(job_id).open() as f:
+            return BatchJob.from_dict(json.load(f))
+
+    def delete(self, job_id: str) -> None:
+        self._get_path(job_id).unlink(missing_ok=True)
+
+    def __iter__(self) -> Iterator[BatchJob]:
+        for path in sorted(self._directory.glob("*.json")):
+            yield self.load(path.stem)
+
+
+def get_index(custom_id: str) -> int:
+    return int(custom_id.rsplit("-", 1)[-1])
+
+
+def get_custom_id(index: int) -> str:
+    return f"request-{index}"
+
+
+BatchResult = tuple[str, Response | BatchRequestError]
+
+
+def openai_result(line: dict[str, Any]) -> BatchResult:
+    """Convert a line of an OpenAI batch output or error file."""
+    custom_id = line["custom_id"]
+    response = line.get("response") or {}
+    if (error := line.get("error")) or response.get("status_code") != 200:
+        body = response.get("body") or {}
+        error = error or body.get("error") or {}
+        return custom_id, BatchRequestError(custom_id, error.get("message", str(error)))
+
+    body = response["body"]
+    choice = body["choices"][0]
+    usage = None
+    if x := body.get("usage"):
+        usage = Usage(
+            prompt_tokens=x.get("prompt_tokens") or 0,
+            completion_tokens=x.get("completion_tokens") or 0,
+            cached_tokens=(x.get("prompt_tokens_details") or {}).get("cached_tokens") or 0,
+        )
+
+    return custom_id, Response(
+        content=choice["message"].get("content") or "",
+        usage=usage,
+        finish_reason=choice.get("finish_reason"),
+    )
+
+
+def anthropic_result(line: dict[str, Any]) -> BatchResult:
+    """Convert a line of Anthropic message batch results."""
+    custom_id = line["custom_id"]
+    result = line["result"]
+    if result["type"] != "succeeded":
+        error = (result.get("error") or {}).get("error") or result.get("error") or {}
+        return custom_id, BatchRequestError(custom_id, error.get("message", result["type"]))
+
+    message = result["message"]
+    usage = message.get("usage") or {}
+    cached_tokens = usage.get("cache_read_input_tokens") or 0
+    cache_write_tokens = usage.get("cache_creation_input_tokens") or 0
+
+    return custom_id, Response(
+        content="".join(
+            x.get("text", "") for x in message["content"] if x.get("type") == "text"
+        ),
+        usage=Usage(
+            prompt_tokens=(usage.get("input_tokens") or 0) + cached_tokens + cache_write_tokens,
+            completion_tokens=usage.get("output_tokens") or 0,
+            cached_tokens=cached_tokens,
+            cache_write_tokens=cache_write_tokens,
+        ),
+        finish_reason=message.get("stop_reason"),
+    )
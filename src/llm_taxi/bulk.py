@@ -0,0 +1,245 @@
+import asyncio
+import itertools
+import json
+import os
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+from llm_taxi.concurrency import map_concurrently
+from llm_taxi.conversation import Message
+from llm_taxi.llms.base import LLM
+
+# Large file buffers keep reads and writes on the event loop to rare, short
+# system calls; the slow part, syncing to disk, runs in a worker thread.
+_BUFFER_SIZE = 1 << 20
+
+
+@dataclass
+class BulkStats:
+    """Counts of a `run_jsonl` run.
+
+    Attributes:
+        skipped (int): Records answered by a previous run and kept.
+        succeeded (int): Records answered in this run, including retried ones.
+        failed (int): Records whose request (or parsing) failed in this run.
+    """
+
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+
+
+def _find_line_start(f: IO[bytes], end: int, block_size: int = 1 << 16) -> int:
+    position = end
+    while position > 0:
+        start = max(0, position - block_size)
+        f.seek(start)
+        if (newline := f.read(position - start).rfind(b"\n")) >= 0:
+            return start + newline + 1
+        position = start
+
+    return 0
+
+
+def _recover(output_path: Path) -> tuple[int, Any]:
+    """Return the number of complete records in the output and the ID of the last one.
+
+    A partially written last line, left by a crash, is truncated.
+    """
+    if not output_path.exists():
+        return 0, None
+
+    count = 0
+    end = 0
+    with output_path.open("r+b") as f:
+        position = 0
+        while chunk := f.read(1 << 20):
+            count += chunk.count(b"\n")
+            if (newline := chunk.rfind(b"\n")) >= 0:
+                end = position + newline + 1
+            position += len(chunk)
+        f.truncate(end)
+
+        if not count:
+            return 0, None
+
+        start = _find_line_start(f, end - 1)
+        f.seek(start)
+        last = json.loads(f.read(end - 1 - start))
+
+    return count, last["id"]
+
+
+def _has_errors(output_path: Path) -> bool:
+    with output_path.open() as f:
+        return any("error" in json.loads(line) for line in f)
+
+
+def _read_records(f: IO[str], id_field: str) -> Iterator[tuple[Any, dict | Exception]]:
+    for number, line in enumerate(f):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, e
+            continue
+
+        if not isinstance(record, dict):
+            yield number, TypeError(f"Expected a JSON object, got {type(record).__name__}")
+            continue
+
+        yield record.get(id_field, number), record
+
+
+def _check_resume(
+    input_path: Path,
+    output_path: Path,
+    skip: int,
+    last_id: Any,
+    id_field: str,
+) -> None:
+    with input_path.open() as inputs:
+        records = _read_records(inputs, id_field)
+        for number, (record_id, _) in zip(range(skip), records):
+            if number == skip - 1 and record_id != last_id:
+                msg = f"{output_path} ends with record {last_id!r} but {input_path} has {record_id!r} there"
+                raise ValueError(msg)
+
+
+def _sync(f: IO[str]) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _parse_messages(record: dict, messages_field: str) -> list[Message]:
+    return [
+        Message.validate(role=x["role"], content=x["content"])
+        for x in record[messages_field]
+    ]
+
+
+async def run_jsonl(
+    llm: LLM,
+    input_path: str | Path,
+    output_path: str | Path,
+    *,
+    max_concurrency: int = 8,
+    id_field: str = "id",
+    messages_field: str = "messages",
+    sync_every: int = 100,
+    **kwargs,
+) -> BulkStats:
+    """Answer the conversations of a JSONL file, appending results to a JSONL file.
+
+    Each input line is an object with an ID and a list of `{"role", "content"}`
+    messages; blank lines are skipped. Each output line holds the ID and either the
+    response (with usage and finish reason) or an error, in input order. Because
+    results are written in order, a rerun after a crash resumes right after the
+    last written record, and memory use does not depend on the size of either file.
+    A rerun also retries the records that failed before.
+
+    Args:
+        llm (LLM): The model; configure rate limits and retries on it.
+        input_path (str | Path): The input JSONL file.
+        output_path (str | Path): The output JSONL file, created or resumed.
+        max_concurrency (int, optional): Maximum number of in-flight requests. Defaults to 8.
+        id_field (str, optional): The ID field of input records. Defaults to "id"; the line number is used when it is missing.
+        messages_field (str, optional): The messages field of input records. Defaults to "messages".
+        sync_every (int, optional): Write and sync the output to disk every this many records; a crash loses at most the records since. Defaults to 100.
+        **kwargs: Additional keyword arguments passed to `detailed_response`.
+
+    Raises:
+        ValueError: If the output does not belong to the input.
+
+    Returns:
+        BulkStats: What was skipped, answered and failed.
+    """
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+    skip, last_id = await asyncio.to_thread(_recover, output_path)
+    await asyncio.to_thread(_check_resume, input_path, output_path, skip, last_id, id_field)
+    stats = BulkStats(skipped=skip)
+
+    async def respond(record: tuple[Any, dict | Exception]) -> dict:
+        record_id, value = record
+        try:
+            if isinstance(value, Exception):
+                raise value
+            response = await llm.detailed_response(
+                _parse_messages(value, messages_field),
+                **kwargs,
+            )
+        except Exception as e:
+            return {"id": record_id, "error": f"{type(e).__name__}: {e}"}
+
+        return {
+            "id": record_id,
+            "response": response.content,
+            "finish_reason": response.finish_reason,
+            "usage": None
+            if response.usage is None
+            else {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+            },
+        }
+
+    async def retry(item: tuple[tuple[Any, dict | Exception], str]) -> dict | str:
+        record, line = item
+        if "error" not in json.loads(line):
+            return line
+
+        stats.skipped -= 1
+
+        return await respond(record)
+
+    async def write(outputs: IO[str], func: Callable, items: Iterable) -> None:
+        written = 0
+        # Ordered results keep the output a prefix of the input, which is what
+        # makes resuming possible without remembering completed IDs.
+        async for _, result in map_concurrently(
+            func,
+            items,
+            max_concurrency=max_concurrency,
+        ):
+            if isinstance(result, str):
+                # A line kept from the previous run.
+                outputs.write(result)
+            else:
+                outputs.write(json.dumps(result, ensure_ascii=False))
+                outputs.write("\n")
+                if "error" in result:
+                    stats.failed += 1
+                else:
+                    stats.succeeded += 1
+
+            written += 1
+            if written % sync_every == 0:
+                await asyncio.to_thread(_sync, outputs)
+
+        await asyncio.to_thread(_sync, outputs)
+
+    # Failed records are retried on resume. The output is rewritten to a separate
+    # file first, so a crash meanwhile leaves the previous output intact.
+    if skip and await asyncio.to_thread(_has_errors, output_path):
+        retry_path = output_path.with_name(f"{output_path.name}.retry")
+        with (
+            input_path.open(buffering=_BUFFER_SIZE) as inputs,
+            output_path.open(buffering=_BUFFER_SIZE) as previous,
+            retry_path.open("w", buffering=_BUFFER_SIZE) as outputs,
+        ):
+            await write(outputs, retry, zip(_read_records(inputs, id_field), previous))
+        os.replace(retry_path, output_path)
+
+    with (
+        input_path.open(buffering=_BUFFER_SIZE) as inputs,
+        output_path.open("a", buffering=_BUFFER_SIZE) as outputs,
+    ):
+        records = itertools.islice(_read_records(inputs, id_field), skip, None)
+        await write(outputs, respond, records)
+
+    return stats
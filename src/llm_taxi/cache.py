@@ -0,0 +1,393 @@
+import abc
+import array
+import asyncio
+import hashlib
+import io
+import json
+import mmap
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+
+    if isinstance(value, Enum):
+        return value.value
+
+    if isinstance(value, bytes):
+        return value.hex()
+
+    if isinstance(value, set | frozenset):
+        return sorted(value, key=repr)
+
+    return repr(value)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Return a stable SHA-256 hex digest of JSON-like `parts`."""
+    payload = json.dumps(
+        parts,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=_json_default,
+    )
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache(abc.ABC):
+    """Abstract key-value store for completed responses."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> str | None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    async def aget(self, key: str) -> str | None:
+        """Like `get`, for callers on the event loop."""
+        return self.get(key)
+
+    async def aset(self, key: str, value: str) -> None:
+        """Like `set`, for callers on the event loop."""
+        self.set(key, value)
+
+
+class MemoryCache(ResponseCache):
+    """An in-process LRU cache with optional time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._items: OrderedDict[str, tuple[float | None, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            if (item := self._items.get(key)) is None:
+                return None
+
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.time():
+                del self._items[key]
+                return None
+
+            self._items.move_to_end(key)
+
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = None if self._ttl is None else time.time() + self._ttl
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SQLiteCache(ResponseCache):
+    """A persistent cache in a SQLite database, safe to share between processes.
+
+    `get` and `set` block on disk I/O; models use `aget` and `aset`, which run them
+    in a worker thread so the event loop is not stalled.
+    """
+
+    def __init__(self, path: str | Path, ttl: float | None = None) -> None:
+        self._path = Path(path).expanduser()
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            self._path,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)",
+        )
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = None if self._ttl is None else time.time() + self._ttl
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+
+    async def aget(self, key: str) -> str | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def _unpack_vector(data: bytes) -> list[float]:
+    vector = array.array("f")
+    vector.frombytes(data)
+    if sys.byteorder != "little":
+        vector.byteswap()
+
+    return vector.tolist()
+
+
+def _pack_vector(vector: Any) -> bytes:
+    # NumPy rows are converted without a round trip through Python floats.
+    if hasattr(vector, "astype"):
+        return vector.astype("<f4").tobytes()
+
+    data = array.array("f", vector)
+    if sys.byteorder != "little":
+        data.byteswap()
+
+    return data.tobytes()
+
+
+class EmbeddingCache(abc.ABC):
+    """Abstract store for embedding vectors, keyed by content hash.
+
+    Vectors may be given as lists of floats or as rows of a NumPy array.
+    """
+
+    @abc.abstractmethod
+    def get_many(self, keys: list[str]) -> list[list[float] | None]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_many(self, keys: list[str], vectors: Sequence[Any]) -> None:
+        raise NotImplementedError
+
+    def get_many_arrays(self, keys: list[str]) -> list[Any]:
+        """Like `get_many`, returning `float32` NumPy arrays."""
+        import numpy as np
+
+        return [
+            None if vector is None else np.asarray(vector, dtype=np.float32)
+            for vector in self.get_many(keys)
+        ]
+
+    async def aget_many(self, keys: list[str]) -> list[list[float] | None]:
+        """Like `get_many`, for callers on the event loop."""
+        return self.get_many(keys)
+
+    async def aget_many_arrays(self, keys: list[str]) -> list[Any]:
+        """Like `get_many_arrays`, for callers on the event loop."""
+        return self.get_many_arrays(keys)
+
+    async def aset_many(self, keys: list[str], vectors: Sequence[Any]) -> None:
+        """Like `set_many`, for callers on the event loop."""
+        self.set_many(keys, vectors)
+
+
+class MemoryEmbeddingCache(EmbeddingCache):
+    """An in-process LRU of float32-packed vectors."""
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self._maxsize = maxsize
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_many_bytes(self, keys: list[str]) -> list[bytes | None]:
+        values: list[bytes | None] = []
+        with self._lock:
+            for key in keys:
+                if (data := self._items.get(key)) is not None:
+                    self._items.move_to_end(key)
+                values.append(data)
+
+        return values
+
+    def get_many(self, keys: list[str]) -> list[list[float] | None]:
+        return [
+            None if data is None else _unpack_vector(data)
+            for data in self._get_many_bytes(keys)
+        ]
+
+    def get_many_arrays(self, keys: list[str]) -> list[Any]:
+        import numpy as np
+
+        return [
+            None if data is None else np.frombuffer(data, dtype="<f4")
+            for data in self._get_many_bytes(keys)
+        ]
+
+    def set_many(self, keys: list[str], vectors: Sequence[Any]) -> None:
+        with self._lock:
+            for key, vector in zip(keys, vectors, strict=True):
+                self._items[key] = _pack_vector(vector)
+                self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class DiskEmbeddingCache(EmbeddingCache):
+    """A persistent, content-addressed vector store.
+
+    Vectors are appended as raw little-endian float32 to `vectors.f32` and read
+    back through `mmap`; a SQLite index maps each key to its offset and dimension.
+    Appends happen inside a SQLite write transaction, so several processes can
+    share one directory. Models use the async methods, which run the lookups and
+    writes in a worker thread.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self._directory = Path(directory).expanduser()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._data_path = self._directory / "vectors.f32"
+        self._data_path.touch()
+        self._lock = threading.Lock()
+        self._mmap: mmap.mmap | None = None
+
+        self._connection = sqlite3.connect(
+            self._directory / "index.db",
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "key TEXT PRIMARY KEY, offset INTEGER NOT NULL, dim INTEGER NOT NULL)",
+        )
+
+    @property
+    def data_path(self) -> Path:
+        return self._data_path
+
+    def _get_mmap(self, end: int) -> mmap.mmap:
+        # The data file only grows, so the mapping is refreshed lazily once a
+        # lookup points past its end.
+        if self._mmap is None or len(self._mmap) < end:
+            if self._mmap is not None:
+                self._mmap.close()
+            with self._data_path.open("rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self._mmap
+
+    def get_locations(self, keys: list[str]) -> list[tuple[int, int] | None]:
+        """Return the `(byte offset, dimension)` of each key in `data_path`."""
+        locations: dict[str, tuple[int, int]] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                rows = self._connection.execute(
+                    "SELECT key, offset, dim FROM vectors "
+                    f"WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                locations.update((key, (offset, dim)) for key, offset, dim in rows)
+
+        return [locations.get(key) for key in keys]
+
+    def _get_many_bytes(self, keys: list[str]) -> list[bytes | None]:
+        locations = self.get_locations(keys)
+        if not (found := [x for x in locations if x is not None]):
+            return [None] * len(keys)
+
+        with self._lock:
+            buffer = self._get_mmap(max(offset + dim * 4 for offset, dim in found))
+
+            return [
+                None if x is None else buffer[x[0] : x[0] + x[1] * 4]
+                for x in locations
+            ]
+
+    def get_many(self, keys: list[str]) -> list[list[float] | None]:
+        return [
+            None if data is None else _unpack_vector(data)
+            for data in self._get_many_bytes(keys)
+        ]
+
+    def get_many_arrays(self, keys: list[str]) -> list[Any]:
+        import numpy as np
+
+        return [
+            None if data is None else np.frombuffer(data, dtype="<f4")
+            for data in self._get_many_bytes(keys)
+        ]
+
+    def set_many(self, keys: list[str], vectors: Sequence[Any]) -> None:
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                with self._data_path.open("ab") as f:
+                    offset = f.seek(0, io.SEEK_END)
+                    rows = []
+                    for key, vector in zip(keys, vectors, strict=True):
+                        data = _pack_vector(vector)
+                        f.write(data)
+                        rows.append((key, offset, len(data) // 4))
+                        offset += len(data)
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO vectors (key, offset, dim) VALUES (?, ?, ?)",
+                    rows,
+                )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    async def aget_many(self, keys: list[str]) -> list[list[float] | None]:
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aget_many_arrays(self, keys: list[str]) -> list[Any]:
+        return await asyncio.to_thread(self.get_many_arrays, keys)
+
+    async def aset_many(self, keys: list[str], vectors: Sequence[Any]) -> None:
+        await asyncio.to_thread(self.set_many, keys, vectors)
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._connection.close()
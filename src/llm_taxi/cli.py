@@ -2,8 +2,11 @@ import argparse
 import asyncio
 import sys
 
+from llm_taxi.bulk import run_jsonl
 from llm_taxi.conversation import Message, Role
 from llm_taxi.factory import llm
+from llm_taxi.ratelimit import RateLimit
+from llm_taxi.retry import RetryPolicy
 
 
 def parse_args():
@@ -13,12 +16,66 @@ def parse_args():
     parser.add_argument("--max-tokens", type=int, default=4096)
     parser.add_argument("--model", type=str, default="openai:gpt-3.5-turbo")
 
+    subparsers = parser.add_subparsers(dest="command")
+    batch = subparsers.add_parser(
+        "batch",
+        help="Answer the conversations of a JSONL file, resuming an interrupted run",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    batch.add_argument("input", type=str)
+    batch.add_argument("output", type=str)
+    # Also accepted after the subcommand; the defaults are those of the main parser.
+    batch.add_argument("--max-tokens", type=int, default=argparse.SUPPRESS)
+    batch.add_argument("--model", type=str, default=argparse.SUPPRESS)
+    batch.add_argument("--max-concurrency", type=int, default=8)
+    batch.add_argument("--requests-per-minute", type=int, default=None)
+    batch.add_argument("--tokens-per-minute", type=int, default=None)
+    batch.add_argument("--id-field", type=str, default="id")
+    batch.add_argument("--messages-field", type=str, default="messages")
+
     return parser.parse_args()
 
 
+async def run_batch(args):
+    rate_limit = None
+    if args.requests_per_minute or args.tokens_per_minute:
+        rate_limit = RateLimit(
+            requests_per_minute=args.requests_per_minute,
+            tokens_per_minute=args.tokens_per_minute,
+        )
+
+    try:
+        model = llm(
+            model=args.model,
+            call_kwargs={"max_tokens": args.max_tokens},
+            rate_limit=rate_limit,
+            retry_policy=RetryPolicy(),
+        )
+    except KeyError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    stats = await run_jsonl(
+        model,
+        args.input,
+        args.output,
+        max_concurrency=args.max_concurrency,
+        id_field=args.id_field,
+        messages_field=args.messages_field,
+    )
+    print(
+        f"Skipped {stats.skipped}, succeeded {stats.succeeded}, failed {stats.failed}",
+        file=sys.stderr,
+    )
+
+
 async def async_main():
     args = parse_args()
 
+    if args.command == "batch":
+        await run_batch(args)
+        return
+
     call_kwargs = {
         "max_tokens": args.max_tokens,
     }
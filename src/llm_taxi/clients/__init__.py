@@ -1,15 +1,34 @@
-from llm_taxi.clients.anthropic import Anthropic
+import importlib
+from typing import TYPE_CHECKING
+
 from llm_taxi.clients.base import Client
-from llm_taxi.clients.dashscope import DashScope
-from llm_taxi.clients.deepinfra import DeepInfra
-from llm_taxi.clients.deepseek import DeepSeek
-from llm_taxi.clients.google import Google
-from llm_taxi.clients.groq import Groq
-from llm_taxi.clients.mistral import Mistral
-from llm_taxi.clients.openai import OpenAI
-from llm_taxi.clients.openrouter import OpenRouter
-from llm_taxi.clients.perplexity import Perplexity
-from llm_taxi.clients.together import Together
+
+if TYPE_CHECKING:
+    from llm_taxi.clients.anthropic import Anthropic
+    from llm_taxi.clients.dashscope import DashScope
+    from llm_taxi.clients.deepinfra import DeepInfra
+    from llm_taxi.clients.deepseek import DeepSeek
+    from llm_taxi.clients.google import Google
+    from llm_taxi.clients.groq import Groq
+    from llm_taxi.clients.mistral import Mistral
+    from llm_taxi.clients.openai import OpenAI
+    from llm_taxi.clients.openrouter import OpenRouter
+    from llm_taxi.clients.perplexity import Perplexity
+    from llm_taxi.clients.together import Together
+
+_LAZY_MODULES: dict[str, str] = {
+    "Anthropic": "llm_taxi.clients.anthropic",
+    "DashScope": "llm_taxi.clients.dashscope",
+    "DeepInfra": "llm_taxi.clients.deepinfra",
+    "DeepSeek": "llm_taxi.clients.deepseek",
+    "Google": "llm_taxi.clients.google",
+    "Groq": "llm_taxi.clients.groq",
+    "Mistral": "llm_taxi.clients.mistral",
+    "OpenAI": "llm_taxi.clients.openai",
+    "OpenRouter": "llm_taxi.clients.openrouter",
+    "Perplexity": "llm_taxi.clients.perplexity",
+    "Together": "llm_taxi.clients.together",
+}
 
 __all__ = [
     "Client",
@@ -25,3 +44,20 @@ __all__ = [
     "OpenRouter",
     "DashScope",
 ]
+
+
+def __getattr__(name: str):
+    # Provider modules import their vendor SDK at module level, so they are only
+    # loaded when one of their classes is actually requested.
+    if (module_name := _LAZY_MODULES.get(name)) is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_MODULES))
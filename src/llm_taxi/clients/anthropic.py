@@ -1,14 +1,42 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from anthropic import AsyncAnthropic
 
 from llm_taxi.clients.base import Client
+from llm_taxi.clients.transport import get_transport_pool
 
 
 class Anthropic(Client[AsyncAnthropic]):
+    provider: ClassVar[str] = "anthropic"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "ANTHROPIC_API_KEY",
     }
 
     def _init_client(self, **kwargs) -> AsyncAnthropic:
+        kwargs.setdefault(
+            "http_client",
+            get_transport_pool().get(self.provider, kwargs.get("base_url")),
+        )
+        if self._retry_policy is not None:
+            kwargs.setdefault("max_retries", 0)
+        # Kept for endpoints the SDK does not cover yet, such as message batches.
+        self._http_client = kwargs["http_client"]
+
         return AsyncAnthropic(**kwargs)
+
+    def _get_usage_tokens(self, response: Any) -> int | None:
+        if (usage := getattr(response, "usage", None)) is None:
+            return None
+
+        return usage.input_tokens + usage.output_tokens
+
+    def _get_stream_usage(self, chunk: Any) -> dict[str, int]:
+        # The output count of `message_delta` events is cumulative.
+        if (kind := getattr(chunk, "type", None)) == "message_start":
+            usage = chunk.message.usage
+            return {"input": usage.input_tokens, "output": usage.output_tokens}
+
+        if kind == "message_delta":
+            return {"output": chunk.usage.output_tokens}
+
+        return {}
@@ -1,9 +1,20 @@
-from typing import ClassVar, Generic, TypeVar
+import inspect
+from collections.abc import AsyncIterator, Callable, Sequence
+from typing import Any, ClassVar, Generic, TypeVar
+
+from llm_taxi.cache import EmbeddingCache, ResponseCache
+from llm_taxi.instrumentation import MetricsSink
+from llm_taxi.microbatch import MicroBatcher, MicroBatchPolicy
+from llm_taxi.ratelimit import RateLimit, RateLimiter, estimate_tokens, get_rate_limiter
+from llm_taxi.retry import RetryPolicy, call_with_retry, prime_stream
+from llm_taxi.singleflight import SingleFlight
+from llm_taxi.tokens import ContextPolicy
 
 T = TypeVar("T")
 
 
 class Client(Generic[T]):
+    provider: ClassVar[str] = ""
     env_vars: ClassVar[dict[str, str]] = {}
 
     def __init__(
@@ -13,6 +24,14 @@ class Client(Generic[T]):
         api_key: str,
         base_url: str | None = None,
         call_kwargs: dict | None = None,
+        rate_limit: RateLimit | RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        response_cache: ResponseCache | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        metrics_sinks: Sequence[MetricsSink] = (),
+        context_policy: ContextPolicy | None = None,
+        coalesce: bool = False,
+        micro_batch: MicroBatchPolicy | None = None,
         **client_kwargs,
     ) -> None:
         """Initialize the Client instance.
@@ -22,6 +41,14 @@ class Client(Generic[T]):
             api_key (str): The API key for authentication.
             base_url (str, optional): The base URL for the API. Defaults to None.
             call_kwargs (dict, optional): Additional keyword arguments for the API call. Defaults to None.
+            rate_limit (RateLimit | RateLimiter, optional): Client-side rate limit. A `RateLimit` is shared by all clients of the provider using the same API key. Defaults to None.
+            retry_policy (RetryPolicy, optional): Retry transient errors with backoff. The SDK's own retries are turned off then, unless `max_retries` is given, so that attempts do not multiply. Defaults to None.
+            response_cache (ResponseCache, optional): Cache completed responses of identical requests. Defaults to None.
+            embedding_cache (EmbeddingCache, optional): Cache embeddings by content hash. Defaults to None.
+            metrics_sinks (Sequence[MetricsSink], optional): Sinks for call timings, in addition to the global ones. Defaults to ().
+            context_policy (ContextPolicy, optional): Check conversations against the context window before sending them. Defaults to None.
+            coalesce (bool, optional): Share one upstream call among concurrent identical requests. Defaults to False.
+            micro_batch (MicroBatchPolicy, optional): Merge concurrent single-item calls, such as `embed_text`, into batched requests. Defaults to None.
             **client_kwargs: Additional keyword arguments for the client initialization.
 
         Returns:
@@ -34,6 +61,22 @@ class Client(Generic[T]):
         self._api_key = api_key
         self._base_url = base_url
         self._call_kwargs = call_kwargs | {"model": self.model}
+        self._rate_limiter = (
+            get_rate_limiter(self.provider, api_key, rate_limit)
+            if isinstance(rate_limit, RateLimit)
+            else rate_limit
+        )
+        self._retry_policy = retry_policy
+        self._response_cache = response_cache
+        self._embedding_cache = embedding_cache
+        self._metrics_sinks = metrics_sinks
+        self._context_policy = context_policy
+        self._single_flight = SingleFlight() if coalesce else None
+        self._micro_batcher = (
+            MicroBatcher(micro_batch, provider=self.provider, model=model)
+            if micro_batch is not None
+            else None
+        )
         self._client = self._init_client(
             api_key=self._api_key,
             base_url=self._base_url,
@@ -53,3 +96,104 @@ class Client(Generic[T]):
 
     def _get_call_kwargs(self, **kwargs) -> dict:
         return self._call_kwargs | kwargs
+
+    def _get_usage_tokens(self, response: Any) -> int | None:
+        if (usage := getattr(response, "usage", None)) is None:
+            return None
+
+        return getattr(usage, "total_tokens", None)
+
+    def _get_stream_usage(self, chunk: Any) -> dict[str, int]:
+        """Return the token counts reported by one chunk of a stream.
+
+        Counts are keyed by what they count; a later report of a key replaces the
+        earlier one, and the stream's usage is the sum of the last reports.
+        """
+        if tokens := self._get_usage_tokens(chunk):
+            return {"total": tokens}
+
+        return {}
+
+    async def _settle_stream(
+        self,
+        stream: Any,
+        limiter: RateLimiter,
+        estimated: int,
+    ) -> AsyncIterator:
+        usage: dict[str, int] = {}
+        received = False
+        try:
+            async for chunk in stream:
+                received = True
+                usage |= self._get_stream_usage(chunk)
+                yield chunk
+        except BaseException:
+            # Some SDKs only send the request when the stream is first iterated.
+            if not received:
+                limiter.settle(estimated, 0)
+            raise
+        finally:
+            # Streams that never report usage keep their estimate.
+            if usage:
+                limiter.settle(estimated, sum(usage.values()))
+
+    async def _send(self, func: Callable[..., Any], /, *args, **kwargs) -> Any:
+        if (limiter := self._rate_limiter) is None:
+            response = func(*args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+            return response
+
+        estimated = estimate_tokens(*args, **kwargs)
+        await limiter.acquire(estimated)
+        try:
+            response = func(*args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except BaseException:
+            # A failed request uses no tokens; give its reservation back.
+            limiter.settle(estimated, 0)
+            raise
+
+        if hasattr(response, "__aiter__"):
+            return self._settle_stream(response, limiter, estimated)
+
+        if actual := self._get_usage_tokens(response):
+            limiter.settle(estimated, actual)
+
+        return response
+
+    async def _request(self, func: Callable[..., Any], /, *args, **kwargs) -> Any:
+        """Issue an SDK call through the client's rate limiter and retry policy.
+
+        `func` may return an awaitable or, for some streaming endpoints, an async
+        iterator directly.
+        """
+        if self._retry_policy is None:
+            return await self._send(func, *args, **kwargs)
+
+        return await call_with_retry(
+            lambda: self._send(func, *args, **kwargs),
+            self._retry_policy,
+        )
+
+    async def _stream_request(
+        self,
+        func: Callable[..., Any],
+        /,
+        *args,
+        **kwargs,
+    ) -> AsyncIterator:
+        """Like `_request`, for calls returning a stream.
+
+        The first chunk is fetched as part of the request, so a stream is only
+        retried while nothing has been handed to the caller yet.
+        """
+
+        async def send() -> AsyncIterator:
+            return await prime_stream(await self._send(func, *args, **kwargs))
+
+        if self._retry_policy is None:
+            return await self._send(func, *args, **kwargs)
+
+        return await call_with_retry(send, self._retry_policy)
@@ -4,6 +4,7 @@ from llm_taxi.clients.openai import OpenAI
 
 
 class BigModel(OpenAI):
+    provider: ClassVar[str] = "bigmodel"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "BIGMODEL_API_KEY",
         "base_url": "BIGMODEL_BASE_URL",
@@ -4,6 +4,7 @@ from llm_taxi.clients.openai import OpenAI
 
 
 class DashScope(OpenAI):
+    provider: ClassVar[str] = "dashscope"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "DASHSCOPE_API_KEY",
         "base_url": "DASHSCOPE_BASE_URL",
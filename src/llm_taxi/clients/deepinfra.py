@@ -4,6 +4,7 @@ from llm_taxi.clients.openai import OpenAI
 
 
 class DeepInfra(OpenAI):
+    provider: ClassVar[str] = "deepinfra"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "DEEPINFRA_API_KEY",
         "base_url": "DEEPINFRA_BASE_URL",
@@ -4,6 +4,7 @@ from llm_taxi.clients.openai import OpenAI
 
 
 class DeepSeek(OpenAI):
+    provider: ClassVar[str] = "deepseek"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "DEEPSEEK_API_KEY",
         "base_url": "DEEPSEEK_BASE_URL",
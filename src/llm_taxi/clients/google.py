@@ -1,4 +1,4 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from google import generativeai as genai
 from google.generativeai import GenerativeModel
@@ -7,31 +7,24 @@ from llm_taxi.clients.base import Client
 
 
 class Google(Client[GenerativeModel]):
+    provider: ClassVar[str] = "google"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "GOOGLE_API_KEY",
     }
 
-    def __init__(
-        self,
-        *,
-        model: str,
-        api_key: str,
-        base_url: str | None = None,
-        call_kwargs: dict | None = None,
-        **client_kwargs,
-    ) -> None:
-        super().__init__(
-            model=model,
-            api_key=api_key,
-            base_url=base_url,
-            call_kwargs=call_kwargs,
-            **client_kwargs,
-        )
-        genai.configure(api_key=api_key, **client_kwargs)
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
 
         self._call_kwargs.pop("model", None)
 
     def _init_client(self, **kwargs) -> GenerativeModel:
         kwargs = {k: v for k, v in kwargs.items() if k not in {"api_key", "base_url"}}
+        genai.configure(api_key=self._api_key, **kwargs)
 
         return GenerativeModel(self.model, **kwargs)
+
+    def _get_usage_tokens(self, response: Any) -> int | None:
+        if (usage := getattr(response, "usage_metadata", None)) is None:
+            return None
+
+        return getattr(usage, "total_token_count", None)
@@ -3,12 +3,21 @@ from typing import ClassVar
 from groq import AsyncGroq
 
 from llm_taxi.clients.base import Client
+from llm_taxi.clients.transport import get_transport_pool
 
 
 class Groq(Client[AsyncGroq]):
+    provider: ClassVar[str] = "groq"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "GROQ_API_KEY",
     }
 
     def _init_client(self, **kwargs) -> AsyncGroq:
+        kwargs.setdefault(
+            "http_client",
+            get_transport_pool().get(self.provider, kwargs.get("base_url")),
+        )
+        if self._retry_policy is not None:
+            kwargs.setdefault("max_retries", 0)
+
         return AsyncGroq(**kwargs)
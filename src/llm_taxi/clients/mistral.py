@@ -6,11 +6,14 @@ from llm_taxi.clients.base import Client
 
 
 class Mistral(Client[MistralAsyncClient]):
+    provider: ClassVar[str] = "mistral"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "MISTRAL_API_KEY",
     }
 
     def _init_client(self, **kwargs) -> MistralAsyncClient:
         kwargs.pop("base_url", None)
+        if self._retry_policy is not None:
+            kwargs.setdefault("max_retries", 0)
 
         return MistralAsyncClient(**kwargs)
@@ -3,12 +3,21 @@ from typing import ClassVar
 from openai import AsyncClient
 
 from llm_taxi.clients.base import Client
+from llm_taxi.clients.transport import get_transport_pool
 
 
 class OpenAI(Client[AsyncClient]):
+    provider: ClassVar[str] = "openai"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "OPENAI_API_KEY",
     }
 
     def _init_client(self, **kwargs) -> AsyncClient:
+        kwargs.setdefault(
+            "http_client",
+            get_transport_pool().get(self.provider, kwargs.get("base_url")),
+        )
+        if self._retry_policy is not None:
+            kwargs.setdefault("max_retries", 0)
+
         return AsyncClient(**kwargs)
@@ -6,9 +6,13 @@ from llm_taxi.clients.base import Client
 
 
 class Together(Client[AsyncTogether]):
+    provider: ClassVar[str] = "together"
     env_vars: ClassVar[dict[str, str]] = {
         "api_key": "TOGETHER_API_KEY",
     }
 
     def _init_client(self, **kwargs) -> AsyncTogether:
+        if self._retry_policy is not None:
+            kwargs.setdefault("max_retries", 0)
+
         return AsyncTogether(**kwargs)
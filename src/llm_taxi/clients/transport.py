@@ -0,0 +1,159 @@
+import dataclasses
+from dataclasses import dataclass
+
+import httpx
+
+from llm_taxi.concurrency import LoopLocal
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Connection pool settings for the shared HTTP transports.
+
+    Attributes:
+        max_connections (int | None): Maximum number of concurrent connections per pool.
+        max_keepalive_connections (int | None): Maximum number of idle connections kept alive per pool.
+        keepalive_expiry (float | None): Seconds an idle connection is kept before being closed.
+        http2 (bool): Whether to negotiate HTTP/2. Requires `httpx[http2]`.
+    """
+
+    max_connections: int | None = 100
+    max_keepalive_connections: int | None = 20
+    keepalive_expiry: float | None = 5.0
+    http2: bool = False
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """Send requests through a separate connection pool for each event loop.
+
+    Connections belong to the loop that opened them, so a client used from several
+    loops, e.g. across `asyncio.run` calls, must not share one pool between them.
+    Redirects, cookies and authentication are left to the client wrapping this.
+    """
+
+    def __init__(self, config: TransportConfig) -> None:
+        self._config = config
+        self._clients = LoopLocal(self._create_client)
+
+    def _create_client(self) -> httpx.AsyncClient:
+        # Proxy and certificate settings from the environment apply here, so that
+        # proxied connections are kept per loop as well.
+        config = self._config
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            http2=config.http2,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._clients.get().send(request, stream=True)
+
+    async def aclose(self) -> None:
+        # Pools of other loops cannot be closed from this one; they are dropped.
+        if (client := self._clients.clear()) is not None:
+            await client.aclose()
+
+
+class _SharedClient(httpx.AsyncClient):
+    """A pooled client that the SDK clients sharing it cannot close.
+
+    SDK clients close their `http_client` in `close()` and `__aexit__`, which would
+    break every other instance using the pool; only `TransportPool.aclose` closes it.
+    """
+
+    async def aclose(self) -> None:
+        pass
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    async def _aclose(self) -> None:
+        await super().aclose()
+
+
+class TransportPool:
+    """Process-wide registry of `httpx.AsyncClient` connection pools.
+
+    Pools are keyed by `(provider, base_url)`, so every client instance talking to
+    the same endpoint reuses the same keep-alive connections instead of opening a
+    new pool (and redoing TLS handshakes) per instance. Underneath, each event loop
+    gets its own connections.
+    """
+
+    def __init__(self, config: TransportConfig | None = None) -> None:
+        self._config = config or TransportConfig()
+        self._provider_configs: dict[str, TransportConfig] = {}
+        self._clients: dict[tuple[str, str | None], _SharedClient] = {}
+
+    def get_config(self, provider: str | None = None) -> TransportConfig:
+        if provider is None:
+            return self._config
+
+        return self._provider_configs.get(provider, self._config)
+
+    def configure(self, provider: str | None = None, **settings) -> TransportConfig:
+        """Update the pool settings globally or for a single provider.
+
+        Only pools created afterwards use the new settings; call `aclose` first to
+        rebuild existing pools.
+
+        Args:
+            provider (str | None, optional): Restrict the settings to this provider. Defaults to None.
+            **settings: Fields of `TransportConfig` to override.
+
+        Returns:
+            TransportConfig: The resulting configuration.
+        """
+        config = dataclasses.replace(self.get_config(provider), **settings)
+        if provider is None:
+            self._config = config
+        else:
+            self._provider_configs[provider] = config
+
+        return config
+
+    def get(self, provider: str, base_url: str | None = None) -> httpx.AsyncClient:
+        key = (provider, base_url)
+        if (client := self._clients.get(key)) is None or client.is_closed:
+            client = self._clients[key] = self._create_client(
+                self.get_config(provider),
+            )
+
+        return client
+
+    def _create_client(self, config: TransportConfig) -> _SharedClient:
+        # Proxies from the environment would be mounted here, in front of the
+        # per-loop transport; the inner clients apply them instead.
+        return _SharedClient(
+            transport=_LoopLocalTransport(config),
+            follow_redirects=True,
+            trust_env=False,
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled connections. Call this before the event loop shuts down.
+
+        Only the connections of the running loop can be closed; those of other
+        loops are dropped.
+        """
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client._aclose()
+
+
+_transport_pool = TransportPool()
+
+
+def get_transport_pool() -> TransportPool:
+    return _transport_pool
+
+
+def configure_transport(provider: str | None = None, **settings) -> TransportConfig:
+    return _transport_pool.configure(provider, **settings)
+
+
+async def aclose_transports() -> None:
+    await _transport_pool.aclose()
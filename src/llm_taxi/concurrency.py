@@ -0,0 +1,131 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterable, Awaitable, Callable, Iterable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class LoopLocal(Generic[T]):
+    """One value per event loop, created on first use in each loop.
+
+    For objects bound to the loop they are first used in, such as `asyncio.Lock`
+    and connection pools, when their owner may outlive the loop (e.g. across
+    `asyncio.run` calls). Values of closed loops are dropped.
+    """
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._values: dict[asyncio.AbstractEventLoop, T] = {}
+
+    def get(self) -> T:
+        loop = asyncio.get_running_loop()
+        if (value := self._values.get(loop)) is None:
+            self._values = {k: v for k, v in self._values.items() if not k.is_closed()}
+            value = self._values[loop] = self._factory()
+
+        return value
+
+    def clear(self) -> T | None:
+        """Forget every value, returning that of the running loop, if any."""
+        values, self._values = self._values, {}
+
+        return values.get(asyncio.get_running_loop())
+
+
+async def _aiter(items: Iterable[T] | AsyncIterable[T]) -> AsyncGenerator[T, None]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _call(
+    func: Callable[[T], Awaitable[R]],
+    item: T,
+    return_exceptions: bool,
+) -> R | Exception:
+    try:
+        return await func(item)
+    except Exception as e:
+        if return_exceptions:
+            return e
+        raise
+
+
+async def map_concurrently(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T] | AsyncIterable[T],
+    *,
+    max_concurrency: int = 8,
+    ordered: bool = True,
+    return_exceptions: bool = False,
+) -> AsyncGenerator[tuple[int, Any], None]:
+    """Apply an async function to items with bounded concurrency.
+
+    Items are pulled from `items` lazily, only when a slot frees up, so at most
+    `max_concurrency` items are in flight or waiting to be yielded at any time and
+    memory stays flat however large the input is.
+
+    Args:
+        func (Callable[[T], Awaitable[R]]): The coroutine function to apply.
+        items (Iterable[T] | AsyncIterable[T]): The inputs, possibly unbounded.
+        max_concurrency (int, optional): Maximum number of concurrent calls. Defaults to 8.
+        ordered (bool, optional): Yield results in input order rather than completion order. Defaults to True.
+        return_exceptions (bool, optional): Yield exceptions as results instead of raising them. Defaults to False.
+
+    Yields:
+        tuple[int, R | Exception]: The input index and the result of each call.
+    """
+    if max_concurrency < 1:
+        msg = f"`max_concurrency` must be positive, got {max_concurrency}"
+        raise ValueError(msg)
+
+    iterator = _aiter(items)
+    index = 0
+    exhausted = False
+    window: deque[tuple[int, asyncio.Task]] = deque()
+    pending: dict[asyncio.Task, int] = {}
+
+    async def fill(in_flight: int) -> list[tuple[int, asyncio.Task]]:
+        nonlocal index, exhausted
+
+        tasks = []
+        while not exhausted and in_flight + len(tasks) < max_concurrency:
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                exhausted = True
+                break
+            task = asyncio.create_task(_call(func, item, return_exceptions))
+            tasks.append((index, task))
+            index += 1
+
+        return tasks
+
+    try:
+        if ordered:
+            window.extend(await fill(0))
+            while window:
+                i, task = window[0]
+                result = await task
+                window.popleft()
+                yield i, result
+                window.extend(await fill(len(window)))
+        else:
+            pending.update((task, i) for i, task in await fill(0))
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i = pending.pop(task)
+                    yield i, task.result()
+                pending.update((task, i) for i, task in await fill(len(pending)))
+    finally:
+        tasks = [task for _, task in window] + list(pending)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await iterator.aclose()
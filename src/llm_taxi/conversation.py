@@ -1,6 +1,7 @@
+from collections.abc import Callable, Hashable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
 from enum import Enum
-
-from pydantic import BaseModel, ConfigDict
+from typing import Any, overload
 
 
 class Role(Enum):
@@ -9,8 +10,116 @@ class Role(Enum):
     Assistant = "assistant"
 
 
-class Message(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+@dataclass(frozen=True, slots=True)
+class Message:
+    """A chat message.
+
+    The constructor only coerces role values such as "user" to `Role`; use
+    `Message.validate` for untrusted input.
+
+    Attributes:
+        role (Role): Who sent the message.
+        content (str): The text of the message.
+        cache (bool): Ask the provider to cache the prompt up to and including this
+            message, e.g. a long system prompt with few-shot examples.
+    """
 
     role: Role
     content: str
+    cache: bool = False
+
+    # Token counts per tokenizer, filled in lazily by `llm_taxi.tokens`.
+    _token_counts: dict[str, int] | None = field(
+        default=None,
+        init=False,
+        repr=False,
+        compare=False,
+    )
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.role, Role):
+            object.__setattr__(self, "role", Role(self.role))
+
+    @classmethod
+    def validate(cls, role: Role | str, content: str, cache: bool = False) -> "Message":
+        """Create a message, checking and coercing its fields.
+
+        Args:
+            role (Role | str): The role, as a `Role` or its value, e.g. "user".
+            content (str): The text of the message.
+            cache (bool, optional): Mark the prompt up to this message as cacheable. Defaults to False.
+
+        Raises:
+            ValueError: If `role` is not a valid role.
+            TypeError: If `content` is not a string.
+
+        Returns:
+            Message: The validated message.
+        """
+        if not isinstance(content, str):
+            msg = f"Message content must be a string, got {type(content).__name__}"
+            raise TypeError(msg)
+
+        return cls(role=Role(role), content=content, cache=bool(cache))
+
+
+class Conversation(Sequence[Message]):
+    """An append-only list of messages that caches its provider-specific form.
+
+    Passing a `Conversation` instead of a list to a model converts only the messages
+    added since the last request, which keeps long multi-turn chats cheap.
+    """
+
+    __slots__ = ("_messages", "_converted")
+
+    def __init__(self, messages: Iterable[Message] = ()) -> None:
+        self._messages = list(messages)
+        self._converted: dict[Hashable, tuple[int, list]] = {}
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self._messages)
+
+    @overload
+    def __getitem__(self, index: int) -> Message: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Message]: ...
+
+    def __getitem__(self, index: int | slice) -> Message | list[Message]:
+        return self._messages[index]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._messages!r})"
+
+    def append(self, message: Message) -> None:
+        self._messages.append(message)
+
+    def extend(self, messages: Iterable[Message]) -> None:
+        self._messages.extend(messages)
+
+    def convert(
+        self,
+        key: Hashable,
+        convert: Callable[[list[Message]], Any],
+        merge: Callable[[list, list], list],
+    ) -> list:
+        """Return the converted messages, converting only those added since the last call.
+
+        Args:
+            key (Hashable): Identifies the conversion, e.g. the model class.
+            convert (Callable): Converts a list of messages.
+            merge (Callable): Appends newly converted messages to previously converted ones.
+
+        Returns:
+            list: The converted form of all messages. It is shared between calls and
+                must not be modified.
+        """
+        count, converted = self._converted.get(key, (0, []))
+        if count != len(self._messages):
+            converted = merge(converted, list(convert(self._messages[count:])))
+            self._converted[key] = (len(self._messages), converted)
+
+        return converted
@@ -1,7 +1,18 @@
+import importlib
+from typing import TYPE_CHECKING
+
 from llm_taxi.embeddings.base import Embedding
-from llm_taxi.embeddings.google import GoogleEmbedding
-from llm_taxi.embeddings.mistral import MistralEmbedding
-from llm_taxi.embeddings.openai import OpenAIEmbedding
+
+if TYPE_CHECKING:
+    from llm_taxi.embeddings.google import GoogleEmbedding
+    from llm_taxi.embeddings.mistral import MistralEmbedding
+    from llm_taxi.embeddings.openai import OpenAIEmbedding
+
+_LAZY_MODULES: dict[str, str] = {
+    "GoogleEmbedding": "llm_taxi.embeddings.google",
+    "MistralEmbedding": "llm_taxi.embeddings.mistral",
+    "OpenAIEmbedding": "llm_taxi.embeddings.openai",
+}
 
 __all__ = [
     "Embedding",
@@ -9,3 +20,20 @@ __all__ = [
     "OpenAIEmbedding",
     "MistralEmbedding",
 ]
+
+
+def __getattr__(name: str):
+    # Provider modules import their vendor SDK at module level, so they are only
+    # loaded when one of their classes is actually requested.
+    if (module_name := _LAZY_MODULES.get(name)) is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_MODULES))
@@ -1,24 +1,313 @@
 import abc
+import itertools
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any, ClassVar, TypeVar
+
+from llm_taxi.cache import EmbeddingCache, make_cache_key
+from llm_taxi.concurrency import map_concurrently
+from llm_taxi.microbatch import MicroBatcher
+from llm_taxi.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    import numpy as np
+
+T = TypeVar("T")
+
+
+def _import_numpy():
+    try:
+        import numpy as np
+    except ImportError as e:
+        msg = "NumPy is required for array embeddings: `pip install llm-taxi[numpy]`"
+        raise ImportError(msg) from e
+
+    return np
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
 
 
 class Embedding(metaclass=abc.ABCMeta):
     """Abstract base class for embedding text using various embedding models.
 
     This class defines the interface for embedding single texts and multiple texts.
-    Subclasses must implement the `embed_text` and `embed_texts` methods.
+    Subclasses must implement the `_embed_text` and `_embed_texts` methods; the public
+    methods add caching, de-duplication and request batching on top of them.
+
+    Attributes:
+        max_batch_size (int | None): Maximum number of texts the provider accepts per request.
+        max_batch_tokens (int | None): Maximum estimated tokens the provider accepts per request.
+        max_concurrency (int): Default number of batch requests sent concurrently.
 
     Methods:
         embed_text(text: str) -> list[float]:
-            Abstract method to embed a single text string into a list of floats.
+            Embed a single text string into a list of floats.
 
         embed_texts(texts: list[str]) -> list[list[float]]:
-            Abstract method to embed multiple text strings into a list of lists of floats.
+            Embed multiple text strings into a list of lists of floats.
+
+        embed_texts_array(texts: list[str]) -> np.ndarray:
+            Embed multiple text strings into a contiguous float32 matrix.
     """
 
+    max_batch_size: ClassVar[int | None] = None
+    max_batch_tokens: ClassVar[int | None] = None
+    max_concurrency: ClassVar[int] = 4
+
+    _embedding_cache: EmbeddingCache | None = None
+    _single_flight: SingleFlight | None = None
+    _micro_batcher: MicroBatcher[str, list[float]] | None = None
+
+    def _get_cache_key(self, text: str, **kwargs) -> str:
+        return make_cache_key(
+            getattr(self, "provider", type(self).__name__),
+            getattr(self, "model", None),
+            kwargs,
+            text,
+        )
+
+    async def _coalesce(
+        self,
+        kind: str,
+        value: str | list[str],
+        embed: Callable[[], Awaitable[T]],
+        copy: Callable[[T], T],
+        **kwargs,
+    ) -> T:
+        """Share `embed()` among concurrent identical requests when coalescing is enabled."""
+        if (flight := self._single_flight) is None:
+            return await embed()
+
+        key = make_cache_key(
+            kind,
+            getattr(self, "provider", type(self).__name__),
+            getattr(self, "model", None),
+            kwargs,
+            value,
+        )
+
+        return await flight.do(key, embed, copy=copy)
+
     @abc.abstractmethod
-    async def embed_text(self, text: str) -> list[float]:
+    async def _embed_text(self, text: str, **kwargs) -> list[float]:
         raise NotImplementedError
 
     @abc.abstractmethod
-    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+    async def _embed_texts(self, texts: list[str], **kwargs) -> list[list[float]]:
         raise NotImplementedError
+
+    def _split_batches(self, texts: list[str]) -> list[list[str]]:
+        batches: list[list[str]] = []
+        batch: list[str] = []
+        batch_tokens = 0
+        for text in texts:
+            tokens = _estimate_tokens(text)
+            if batch and (
+                (self.max_batch_size and len(batch) >= self.max_batch_size)
+                or (
+                    self.max_batch_tokens
+                    and batch_tokens + tokens > self.max_batch_tokens
+                )
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    async def _embed_batches(
+        self,
+        texts: list[str],
+        embed: Callable[[list[str]], Awaitable[T]],
+        max_concurrency: int | None = None,
+    ) -> list[T]:
+        batches = self._split_batches(texts)
+        if len(batches) <= 1:
+            return [await embed(texts)]
+
+        results: list[Any] = [None] * len(batches)
+        async for i, result in map_concurrently(
+            embed,
+            batches,
+            max_concurrency=max_concurrency or self.max_concurrency,
+            ordered=False,
+        ):
+            results[i] = result
+
+        return results
+
+    async def _embed_texts_array(self, texts: list[str], **kwargs) -> "np.ndarray":
+        np = _import_numpy()
+
+        return np.asarray(await self._embed_texts(texts, **kwargs), dtype=np.float32)
+
+    async def _embed_micro_batch(self, texts: list[str], **kwargs) -> list[list[float]]:
+        unique_texts = list(dict.fromkeys(texts))
+        batches = await self._embed_batches(
+            unique_texts,
+            lambda batch: self._embed_texts(batch, **kwargs),
+        )
+        lookup = dict(
+            zip(unique_texts, itertools.chain.from_iterable(batches), strict=True),
+        )
+
+        return [list(lookup[x]) for x in texts]
+
+    async def embed_text(self, text: str, **kwargs) -> list[float]:
+        async def embed() -> list[float]:
+            if (batcher := self._micro_batcher) is None:
+                return await self._embed_text(text, **kwargs)
+
+            # Concurrent calls with the same arguments share one `_embed_texts` request.
+            return await batcher.submit(
+                make_cache_key(kwargs),
+                text,
+                lambda texts: self._embed_micro_batch(texts, **kwargs),
+            )
+
+        if (cache := self._embedding_cache) is None:
+            return await self._coalesce("text", text, embed, list, **kwargs)
+
+        key = self._get_cache_key(text, **kwargs)
+        if (vector := (await cache.aget_many([key]))[0]) is not None:
+            return vector
+
+        vector = await self._coalesce("text", text, embed, list, **kwargs)
+        await cache.aset_many([key], [vector])
+
+        return vector
+
+    async def embed_texts(
+        self,
+        texts: list[str],
+        *,
+        max_concurrency: int | None = None,
+        **kwargs,
+    ) -> list[list[float]]:
+        """Embed texts, split into provider-sized batches sent concurrently.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            max_concurrency (int | None, optional): Maximum concurrent batch requests. Defaults to `self.max_concurrency`.
+            **kwargs: Additional keyword arguments for the provider.
+
+        Returns:
+            list[list[float]]: One vector per input text, in input order.
+        """
+        unique_texts = list(dict.fromkeys(texts))
+
+        async def embed(batch: list[str]) -> list[list[float]]:
+            return await self._coalesce(
+                "texts",
+                batch,
+                lambda: self._embed_texts(batch, **kwargs),
+                lambda vectors: [list(x) for x in vectors],
+                **kwargs,
+            )
+
+        if (cache := self._embedding_cache) is None:
+            vectors: list[list[float] | None] = [None] * len(unique_texts)
+        else:
+            keys = [self._get_cache_key(x, **kwargs) for x in unique_texts]
+            vectors = await cache.aget_many(keys)
+
+        if missing := [i for i, vector in enumerate(vectors) if vector is None]:
+            batches = await self._embed_batches(
+                [unique_texts[i] for i in missing],
+                embed,
+                max_concurrency=max_concurrency,
+            )
+            embeddings = list(itertools.chain.from_iterable(batches))
+            for i, vector in zip(missing, embeddings, strict=True):
+                vectors[i] = vector
+
+            if cache is not None:
+                await cache.aset_many([keys[i] for i in missing], embeddings)
+
+        lookup = dict(zip(unique_texts, vectors, strict=True))
+
+        return [lookup[x] for x in texts]
+
+    async def embed_texts_array(
+        self,
+        texts: list[str],
+        *,
+        normalize: bool = False,
+        max_concurrency: int | None = None,
+        **kwargs,
+    ) -> "np.ndarray":
+        """Embed texts into a C-contiguous `float32` array of shape `(len(texts), dim)`.
+
+        Avoids materializing one Python float per dimension, which dominates memory
+        for large corpora. Caching, de-duplication and batching work as in
+        `embed_texts`.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            normalize (bool, optional): L2-normalize each row in place. Defaults to False.
+            max_concurrency (int | None, optional): Maximum concurrent batch requests. Defaults to `self.max_concurrency`.
+            **kwargs: Additional keyword arguments for the provider.
+
+        Returns:
+            np.ndarray: One row per input text, in input order.
+        """
+        np = _import_numpy()
+
+        unique_texts = list(dict.fromkeys(texts))
+        if not unique_texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        async def embed_array(batch: list[str]) -> "np.ndarray":
+            return await self._coalesce(
+                "array",
+                batch,
+                lambda: self._embed_texts_array(batch, **kwargs),
+                lambda matrix: matrix.copy(),
+                **kwargs,
+            )
+
+        if (cache := self._embedding_cache) is None:
+            rows: list[Any] = [None] * len(unique_texts)
+        else:
+            keys = [self._get_cache_key(x, **kwargs) for x in unique_texts]
+            rows = await cache.aget_many_arrays(keys)
+
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if len(missing) == len(unique_texts):
+            batches = await self._embed_batches(
+                unique_texts,
+                embed_array,
+                max_concurrency=max_concurrency,
+            )
+            matrix = batches[0] if len(batches) == 1 else np.concatenate(batches)
+            if cache is not None:
+                await cache.aset_many(keys, matrix)
+        else:
+            if missing:
+                batches = await self._embed_batches(
+                    [unique_texts[i] for i in missing],
+                    embed_array,
+                    max_concurrency=max_concurrency,
+                )
+                embeddings = np.concatenate(batches)
+                for i, row in zip(missing, embeddings, strict=True):
+                    rows[i] = row
+                if cache is not None:
+                    await cache.aset_many([keys[i] for i in missing], embeddings)
+            matrix = np.stack(rows).astype(np.float32, copy=False)
+
+        if len(unique_texts) < len(texts):
+            positions = {x: i for i, x in enumerate(unique_texts)}
+            matrix = matrix[[positions[x] for x in texts]]
+
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if normalize:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+        return matrix
@@ -1,16 +1,31 @@
+from typing import ClassVar
+
 from google import generativeai as genai
 
 from llm_taxi.clients.google import Google
-from llm_taxi.embeddings import Embedding
+from llm_taxi.embeddings.base import Embedding
 
 
 class GoogleEmbedding(Embedding, Google):
-    async def embed_text(self, text: str) -> list[float]:
-        response = genai.embed_content(self.model, content=text)
+    max_batch_size: ClassVar[int | None] = 100
+    max_batch_tokens: ClassVar[int | None] = None
+
+    async def _embed_text(self, text: str, **kwargs) -> list[float]:
+        response = await self._request(
+            genai.embed_content_async,
+            self.model,
+            content=text,
+            **kwargs,
+        )
 
         return response["embedding"]
 
-    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        response = genai.embed_content(self.model, content=texts)
+    async def _embed_texts(self, texts: list[str], **kwargs) -> list[list[float]]:
+        response = await self._request(
+            genai.embed_content_async,
+            self.model,
+            content=texts,
+            **kwargs,
+        )
 
         return response["embedding"]
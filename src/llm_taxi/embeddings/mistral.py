@@ -1,14 +1,29 @@
+from typing import ClassVar
+
 from llm_taxi.clients.mistral import Mistral
 from llm_taxi.embeddings.base import Embedding
 
 
 class MistralEmbedding(Mistral, Embedding):
-    async def embed_text(self, text: str) -> list[float]:
-        response = await self.client.embeddings(model=self.model, input=text)
+    max_batch_size: ClassVar[int | None] = 512
+    max_batch_tokens: ClassVar[int | None] = 16_384
+
+    async def _embed_text(self, text: str, **kwargs) -> list[float]:
+        response = await self._request(
+            self.client.embeddings,
+            model=self.model,
+            input=text,
+            **kwargs,
+        )
 
         return response.data[0].embedding
 
-    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        response = await self.client.embeddings(model=self.model, input=texts)
+    async def _embed_texts(self, texts: list[str], **kwargs) -> list[list[float]]:
+        response = await self._request(
+            self.client.embeddings,
+            model=self.model,
+            input=texts,
+            **kwargs,
+        )
 
         return [x.embedding for x in response.data]
@@ -1,10 +1,20 @@
+import base64
+from typing import TYPE_CHECKING, Any, ClassVar
+
 from llm_taxi.clients.openai import OpenAI
-from llm_taxi.embeddings.base import Embedding
+from llm_taxi.embeddings.base import Embedding, _import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class OpenAIEmbedding(OpenAI, Embedding):
-    async def embed_text(self, text: str, **kwargs) -> list[float]:
-        response = await self.client.embeddings.create(
+    max_batch_size: ClassVar[int | None] = 2048
+    max_batch_tokens: ClassVar[int | None] = 300_000
+
+    async def _embed_text(self, text: str, **kwargs) -> list[float]:
+        response = await self._request(
+            self.client.embeddings.create,
             model=self.model,
             input=text,
             **kwargs,
@@ -12,11 +22,38 @@ class OpenAIEmbedding(OpenAI, Embedding):
 
         return response.data[0].embedding
 
-    async def embed_texts(self, texts: list[str], **kwargs) -> list[list[float]]:
-        response = await self.client.embeddings.create(
+    async def _embed_texts(self, texts: list[str], **kwargs) -> list[list[float]]:
+        response = await self._request(
+            self.client.embeddings.create,
             model=self.model,
             input=texts,
             **kwargs,
         )
 
         return [x.embedding for x in response.data]
+
+    async def _embed_texts_array(self, texts: list[str], **kwargs) -> "np.ndarray":
+        np = _import_numpy()
+
+        # An explicit `encoding_format` makes the SDK return the raw base64
+        # payload, which is decoded straight into the output buffer.
+        response = await self._request(
+            self.client.embeddings.create,
+            model=self.model,
+            input=texts,
+            **kwargs | {"encoding_format": "base64"},
+        )
+
+        if not (data := response.data):
+            return np.empty((0, 0), dtype=np.float32)
+
+        def decode(x: Any) -> "np.ndarray":
+            return np.frombuffer(base64.b64decode(x.embedding), dtype="<f4")
+
+        first = decode(data[0])
+        matrix = np.empty((len(data), len(first)), dtype=np.float32)
+        matrix[data[0].index] = first
+        for x in data[1:]:
+            matrix[x.index] = decode(x)
+
+        return matrix
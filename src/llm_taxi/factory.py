@@ -1,23 +1,29 @@
+from __future__ import annotations
+
+import importlib
 import os
-from collections.abc import Mapping
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator, Mapping
 from enum import Enum
-from typing import Any, TypeVar, cast
-
-from llm_taxi.embeddings import GoogleEmbedding, MistralEmbedding, OpenAIEmbedding
-from llm_taxi.llms import (
-    Anthropic,
-    BigModel,
-    DashScope,
-    DeepInfra,
-    DeepSeek,
-    Google,
-    Groq,
-    Mistral,
-    OpenAI,
-    OpenRouter,
-    Perplexity,
-    Together,
-)
+from typing import TYPE_CHECKING, Any, NamedTuple, TypeVar, cast
+
+if TYPE_CHECKING:
+    from llm_taxi.embeddings import GoogleEmbedding, MistralEmbedding, OpenAIEmbedding
+    from llm_taxi.llms import (
+        Anthropic,
+        BigModel,
+        DashScope,
+        DeepInfra,
+        DeepSeek,
+        Google,
+        Groq,
+        Mistral,
+        OpenAI,
+        OpenRouter,
+        Perplexity,
+        Together,
+    )
 
 
 class Provider(Enum):
@@ -35,6 +41,32 @@ class Provider(Enum):
     BigModel = "bigmodel"
 
 
+class _LazyClassRegistry(Mapping[Provider, type]):
+    """A read-only provider-to-class mapping that imports each class on first use.
+
+    Values are given as dotted paths (``"package.module.ClassName"``) so that the
+    vendor SDK behind a provider is only imported once that provider is requested.
+    """
+
+    def __init__(self, paths: Mapping[Provider, str]) -> None:
+        self._paths = dict(paths)
+        self._classes: dict[Provider, type] = {}
+
+    def __getitem__(self, provider: Provider) -> type:
+        if (cls := self._classes.get(provider)) is None:
+            module_name, class_name = self._paths[provider].rsplit(".", 1)
+            cls = getattr(importlib.import_module(module_name), class_name)
+            self._classes[provider] = cls
+
+        return cls
+
+    def __iter__(self) -> Iterator[Provider]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
 MODEL_CLASSES: Mapping[
     Provider,
     type[OpenAI]
@@ -49,34 +81,139 @@ MODEL_CLASSES: Mapping[
     | type[OpenRouter]
     | type[DashScope]
     | type[BigModel],
-] = {
-    Provider.OpenAI: OpenAI,
-    Provider.Google: Google,
-    Provider.Together: Together,
-    Provider.Groq: Groq,
-    Provider.Anthropic: Anthropic,
-    Provider.Mistral: Mistral,
-    Provider.Perplexity: Perplexity,
-    Provider.DeepInfra: DeepInfra,
-    Provider.DeepSeek: DeepSeek,
-    Provider.OpenRouter: OpenRouter,
-    Provider.DashScope: DashScope,
-    Provider.BigModel: BigModel,
-}
+] = _LazyClassRegistry(
+    {
+        Provider.OpenAI: "llm_taxi.llms.openai.OpenAI",
+        Provider.Google: "llm_taxi.llms.google.Google",
+        Provider.Together: "llm_taxi.llms.together.Together",
+        Provider.Groq: "llm_taxi.llms.groq.Groq",
+        Provider.Anthropic: "llm_taxi.llms.anthropic.Anthropic",
+        Provider.Mistral: "llm_taxi.llms.mistral.Mistral",
+        Provider.Perplexity: "llm_taxi.llms.perplexity.Perplexity",
+        Provider.DeepInfra: "llm_taxi.llms.deepinfra.DeepInfra",
+        Provider.DeepSeek: "llm_taxi.llms.deepseek.DeepSeek",
+        Provider.OpenRouter: "llm_taxi.llms.openrouter.OpenRouter",
+        Provider.DashScope: "llm_taxi.llms.dashscope.DashScope",
+        Provider.BigModel: "llm_taxi.llms.bigmodel.BigModel",
+    },
+)
 
 EMBEDDING_CLASSES: Mapping[
     Provider,
     type[GoogleEmbedding] | type[OpenAIEmbedding] | type[MistralEmbedding],
-] = {
-    Provider.OpenAI: OpenAIEmbedding,
-    Provider.Mistral: MistralEmbedding,
-    Provider.Google: GoogleEmbedding,
-}
+] = _LazyClassRegistry(
+    {
+        Provider.OpenAI: "llm_taxi.embeddings.openai.OpenAIEmbedding",
+        Provider.Mistral: "llm_taxi.embeddings.mistral.MistralEmbedding",
+        Provider.Google: "llm_taxi.embeddings.google.GoogleEmbedding",
+    },
+)
 
 
 T = TypeVar("T")
 
 
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class InstanceCache:
+    """A bounded LRU cache of configured model instances.
+
+    Used by `cached_llm` and `cached_embedding`. Keys include the resolved
+    credentials, so changing an API key or base URL (explicitly or through the
+    environment) yields a fresh instance while the stale one ages out.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self._maxsize = maxsize
+        self._instances: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: int) -> None:
+        with self._lock:
+            self._maxsize = value
+            self._evict()
+
+    def get_or_create(self, key: Hashable, create: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._instances:
+                self._hits += 1
+                self._instances.move_to_end(key)
+                return self._instances[key]
+
+            self._misses += 1
+            instance = self._instances[key] = create()
+            self._evict()
+
+            return instance
+
+    def _evict(self) -> None:
+        while len(self._instances) > self._maxsize:
+            self._instances.popitem(last=False)
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                maxsize=self._maxsize,
+                currsize=len(self._instances),
+            )
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._instances.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+instance_cache = InstanceCache()
+
+
+class _Identity:
+    """Key an unhashable value by identity, keeping it alive so its id is not reused."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __hash__(self) -> int:
+        return id(self.value)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Identity) and other.value is self.value
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, Mapping):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+
+    if isinstance(value, list | tuple):
+        return tuple(_freeze(x) for x in value)
+
+    if isinstance(value, set | frozenset):
+        return frozenset(_freeze(x) for x in value)
+
+    try:
+        hash(value)
+    except TypeError:
+        return _Identity(value)
+
+    return value
+
+
 def _get_env(key: str) -> str:
     if (value := os.getenv(key)) is None:
         msg = f"Required environment variable `{key}` not found"
@@ -210,3 +347,107 @@ def embedding(
         call_kwargs=call_kwargs,
         **client_kwargs,
     )
+
+
+def cached_llm(
+    model: str,
+    api_key: str | None = None,
+    base_url: str | None = None,
+    call_kwargs: dict | None = None,
+    **client_kwargs,
+) -> (
+    OpenAI
+    | Google
+    | Together
+    | Groq
+    | Anthropic
+    | Mistral
+    | Perplexity
+    | DeepInfra
+    | DeepSeek
+    | OpenRouter
+    | DashScope
+    | BigModel
+):
+    """Like `llm`, but return a shared instance for identical arguments.
+
+    Instances live in the module-level `instance_cache`; use its `cache_info()`
+    for hit/miss counters and `cache_clear()` to drop them.
+
+    Args:
+        model (str): The model identifier in the format 'provider:model_name'.
+        api_key (str | None, optional): The API key for authentication. Defaults to None.
+        base_url (str | None, optional): The base URL for the API. Defaults to None.
+        call_kwargs (dict | None, optional): Additional keyword arguments for the API call. Defaults to None.
+        **client_kwargs: Additional keyword arguments for the LLM client initialization.
+
+    Returns:
+        LLM: A cached instance of the specified LLM provider.
+
+    Raises:
+        ValueError: If the specified provider is unknown.
+        KeyError: If a required environment variable is not found.
+    """
+    model_name, model_class = _get_class_name_and_class(model, MODEL_CLASSES)
+    env_var_values = _get_params(model_class, locals())
+    key = (
+        "llm",
+        model,
+        _freeze(env_var_values),
+        _freeze(call_kwargs or {}),
+        _freeze(client_kwargs),
+    )
+
+    return instance_cache.get_or_create(
+        key,
+        lambda: model_class(
+            model=model_name,
+            **env_var_values,
+            call_kwargs=call_kwargs,
+            **client_kwargs,
+        ),
+    )
+
+
+def cached_embedding(
+    model: str,
+    api_key: str | None = None,
+    base_url: str | None = None,
+    call_kwargs: dict | None = None,
+    **client_kwargs,
+) -> GoogleEmbedding | OpenAIEmbedding | MistralEmbedding:
+    """Like `embedding`, but return a shared instance for identical arguments.
+
+    Args:
+        model (str): The model identifier in the format 'provider:model_name'.
+        api_key (str | None, optional): The API key for authentication. Defaults to None.
+        base_url (str | None, optional): The base URL for the API. Defaults to None.
+        call_kwargs (dict | None, optional): Additional keyword arguments for the API call. Defaults to None.
+        **client_kwargs: Additional keyword arguments for the embedding client initialization.
+
+    Returns:
+        Embedding: A cached instance of the specified embedding provider.
+
+    Raises:
+        ValueError: If the specified provider is unknown.
+        KeyError: If a required environment variable is not found.
+    """
+    model_name, embedding_class = _get_class_name_and_class(model, EMBEDDING_CLASSES)
+    env_var_values = _get_params(embedding_class, locals())
+    key = (
+        "embedding",
+        model,
+        _freeze(env_var_values),
+        _freeze(call_kwargs or {}),
+        _freeze(client_kwargs),
+    )
+
+    return instance_cache.get_or_create(
+        key,
+        lambda: embedding_class(
+            model=model_name,
+            **env_var_values,
+            call_kwargs=call_kwargs,
+            **client_kwargs,
+        ),
+    )
@@ -0,0 +1,282 @@
+import abc
+import bisect
+import logging
+import threading
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CallMetrics:
+    """Timings of a single `response` or `streaming_response` call.
+
+    Durations are in seconds and measured with a monotonic clock; `start_time` is
+    the wall-clock start in nanoseconds since the epoch.
+    """
+
+    provider: str
+    model: str | None
+    streaming: bool
+    start_time: int = field(default_factory=time.time_ns)
+    ttft: float | None = None
+    duration: float | None = None
+    chunks: int = 0
+    characters: int = 0
+    inter_chunk_gaps: list[float] = field(default_factory=list)
+    error: BaseException | None = None
+    _started: float = field(default_factory=time.monotonic, repr=False)
+    _last_chunk: float | None = field(default=None, repr=False)
+
+    def on_chunk(self, chunk: str) -> None:
+        now = time.monotonic()
+        if self._last_chunk is None:
+            self.ttft = now - self._started
+        else:
+            self.inter_chunk_gaps.append(now - self._last_chunk)
+        self._last_chunk = now
+        self.chunks += 1
+        self.characters += len(chunk)
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self.duration = time.monotonic() - self._started
+        self.error = error
+
+
+class MetricsSink(abc.ABC):
+    """Receives the metrics of every finished call."""
+
+    @abc.abstractmethod
+    def record(self, metrics: CallMetrics) -> None:
+        raise NotImplementedError
+
+
+class CallbackSink(MetricsSink):
+    def __init__(self, callback: Callable[[CallMetrics], Any]) -> None:
+        self._callback = callback
+
+    def record(self, metrics: CallMetrics) -> None:
+        self._callback(metrics)
+
+
+class OpenTelemetrySink(MetricsSink):
+    """Report each call as an OpenTelemetry span, with a `first_token` event.
+
+    Requires `opentelemetry-api`; spans go to whatever tracer provider the
+    application has configured.
+    """
+
+    def __init__(self, tracer: Any = None, span_name: str = "llm_taxi.response") -> None:
+        if tracer is None:
+            from opentelemetry import trace
+
+            tracer = trace.get_tracer("llm_taxi")
+
+        self._tracer = tracer
+        self._span_name = span_name
+
+    def record(self, metrics: CallMetrics) -> None:
+        span = self._tracer.start_span(
+            self._span_name,
+            start_time=metrics.start_time,
+            attributes={
+                "llm.provider": metrics.provider,
+                "llm.model": metrics.model or "",
+                "llm.streaming": metrics.streaming,
+                "llm.chunks": metrics.chunks,
+                "llm.output_characters": metrics.characters,
+            },
+        )
+        if metrics.ttft is not None:
+            span.add_event(
+                "first_token",
+                timestamp=metrics.start_time + int(metrics.ttft * 1e9),
+            )
+        if metrics.error is not None:
+            span.record_exception(metrics.error)
+        span.end(end_time=metrics.start_time + int((metrics.duration or 0) * 1e9))
+
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """A labelled histogram rendered in the Prometheus text exposition format."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[tuple[str, str], ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        self.observe_many([value], **labels)
+
+    def observe_many(self, values: Iterable[float], **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # Per-bucket counts followed by the +Inf count and the sum.
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for value in values:
+                series[bisect.bisect_left(self.buckets, value)] += 1
+                series[-1] += value
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, series in self._series.items():
+                labels = ",".join(f'{k}="{v}"' for k, v in key)
+                prefix = f"{labels}," if labels else ""
+                cumulative = 0.0
+                for bound, count in zip(
+                    (*self.buckets, float("inf")),
+                    series[:-1],
+                    strict=True,
+                ):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative:g}',
+                    )
+                lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:g}")
+                lines.append(f"{self.name}_count{{{labels}}} {cumulative:g}")
+
+        return "\n".join(lines)
+
+
+class PrometheusSink(MetricsSink):
+    """Aggregate call metrics into Prometheus-style histograms.
+
+    Serve `render()` from a `/metrics` endpoint to scrape them.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.ttft = Histogram(
+            "llm_taxi_time_to_first_token_seconds",
+            "Time from request start to the first streamed chunk.",
+            buckets,
+        )
+        self.duration = Histogram(
+            "llm_taxi_request_duration_seconds",
+            "Time from request start to the end of the response.",
+            buckets,
+        )
+        self.inter_chunk = Histogram(
+            "llm_taxi_inter_chunk_seconds",
+            "Time between consecutive streamed chunks.",
+            buckets,
+        )
+        self.chunks = Histogram(
+            "llm_taxi_response_chunks",
+            "Number of chunks per response.",
+            (1, 5, 10, 50, 100, 500, 1000, 5000),
+        )
+        self.characters = Histogram(
+            "llm_taxi_response_characters",
+            "Number of output characters per response.",
+            (10, 100, 500, 1000, 5000, 10000, 50000),
+        )
+
+    def record(self, metrics: CallMetrics) -> None:
+        labels = {
+            "provider": metrics.provider,
+            "model": metrics.model or "",
+            "status": "error" if metrics.error is not None else "ok",
+        }
+        if metrics.ttft is not None:
+            self.ttft.observe(metrics.ttft, **labels)
+        if metrics.duration is not None:
+            self.duration.observe(metrics.duration, **labels)
+        self.inter_chunk.observe_many(metrics.inter_chunk_gaps, **labels)
+        self.chunks.observe(metrics.chunks, **labels)
+        self.characters.observe(metrics.characters, **labels)
+
+    def render(self) -> str:
+        return (
+            "\n".join(
+                x.render()
+                for x in (
+                    self.ttft,
+                    self.duration,
+                    self.inter_chunk,
+                    self.chunks,
+                    self.characters,
+                )
+            )
+            + "\n"
+        )
+
+
+_sinks: list[MetricsSink] = []
+
+
+def add_metrics_sink(sink: MetricsSink) -> MetricsSink:
+    """Register a sink for the calls of every model in the process."""
+    _sinks.append(sink)
+
+    return sink
+
+
+def remove_metrics_sink(sink: MetricsSink) -> None:
+    _sinks.remove(sink)
+
+
+def get_metrics_sinks() -> list[MetricsSink]:
+    return _sinks
+
+
+def emit(metrics: CallMetrics, sinks: Iterable[MetricsSink]) -> None:
+    for sink in sinks:
+        try:
+            sink.record(metrics)
+        except Exception:
+            # Observability must never break the call it observes.
+            logger.exception("Metrics sink %r failed", sink)
+
+
+async def instrument_stream(
+    stream: AsyncIterator,
+    metrics: CallMetrics,
+    sinks: Sequence[MetricsSink],
+) -> AsyncGenerator:
+    error: BaseException | None = None
+    try:
+        async for chunk in stream:
+            # Streams may interleave usage and finish events with the text.
+            if isinstance(chunk, str):
+                metrics.on_chunk(chunk)
+            yield chunk
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        metrics.finish(error)
+        emit(metrics, sinks)
+        if (aclose := getattr(stream, "aclose", None)) is not None:
+            await aclose()
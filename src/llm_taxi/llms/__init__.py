@@ -1,19 +1,45 @@
-from llm_taxi.llms.anthropic import Anthropic
+import importlib
+from typing import TYPE_CHECKING
+
 from llm_taxi.llms.base import LLM
-from llm_taxi.llms.bigmodel import BigModel
-from llm_taxi.llms.dashscope import DashScope
-from llm_taxi.llms.deepinfra import DeepInfra
-from llm_taxi.llms.deepseek import DeepSeek
-from llm_taxi.llms.google import Google
-from llm_taxi.llms.groq import Groq
-from llm_taxi.llms.mistral import Mistral
-from llm_taxi.llms.openai import OpenAI
-from llm_taxi.llms.openrouter import OpenRouter
-from llm_taxi.llms.perplexity import Perplexity
-from llm_taxi.llms.together import Together
+from llm_taxi.llms.hedging import Hedged
+from llm_taxi.llms.router import Backend, Router, RoutingPolicy
+
+if TYPE_CHECKING:
+    from llm_taxi.llms.anthropic import Anthropic
+    from llm_taxi.llms.bigmodel import BigModel
+    from llm_taxi.llms.dashscope import DashScope
+    from llm_taxi.llms.deepinfra import DeepInfra
+    from llm_taxi.llms.deepseek import DeepSeek
+    from llm_taxi.llms.google import Google
+    from llm_taxi.llms.groq import Groq
+    from llm_taxi.llms.mistral import Mistral
+    from llm_taxi.llms.openai import OpenAI
+    from llm_taxi.llms.openrouter import OpenRouter
+    from llm_taxi.llms.perplexity import Perplexity
+    from llm_taxi.llms.together import Together
+
+_LAZY_MODULES: dict[str, str] = {
+    "Anthropic": "llm_taxi.llms.anthropic",
+    "BigModel": "llm_taxi.llms.bigmodel",
+    "DashScope": "llm_taxi.llms.dashscope",
+    "DeepInfra": "llm_taxi.llms.deepinfra",
+    "DeepSeek": "llm_taxi.llms.deepseek",
+    "Google": "llm_taxi.llms.google",
+    "Groq": "llm_taxi.llms.groq",
+    "Mistral": "llm_taxi.llms.mistral",
+    "OpenAI": "llm_taxi.llms.openai",
+    "OpenRouter": "llm_taxi.llms.openrouter",
+    "Perplexity": "llm_taxi.llms.perplexity",
+    "Together": "llm_taxi.llms.together",
+}
 
 __all__ = [
     "LLM",
+    "Hedged",
+    "Router",
+    "Backend",
+    "RoutingPolicy",
     "OpenAI",
     "Google",
     "Together",
@@ -27,3 +53,20 @@ __all__ = [
     "DashScope",
     "BigModel",
 ]
+
+
+def __getattr__(name: str):
+    # Provider modules import their vendor SDK at module level, so they are only
+    # loaded when one of their classes is actually requested.
+    if (module_name := _LAZY_MODULES.get(name)) is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_MODULES))
@@ -1,20 +1,66 @@
-from collections.abc import AsyncGenerator, Iterable
-from typing import Literal, cast
+import asyncio
+import dataclasses
+import json
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from typing import IO, Any, ClassVar, Literal, cast
 
 from anthropic._types import NOT_GIVEN, NotGiven
 from anthropic.types import MessageParam
 
+from llm_taxi.batches import BatchJob, BatchResult, BatchStatus, anthropic_result
 from llm_taxi.clients.anthropic import Anthropic as AnthropicClient
 from llm_taxi.conversation import Message, Role
 from llm_taxi.llms.base import LLM
+from llm_taxi.usage import Finish, Response, ToolCall, ToolCallDelta, Usage
+
+
+def _get_content(message: Message) -> str | list[dict]:
+    if not message.cache:
+        return message.content
+
+    return [
+        {
+            "type": "text",
+            "text": message.content,
+            "cache_control": {"type": "ephemeral"},
+        },
+    ]
+
+
+def _get_usage(usage: Any) -> Usage:
+    # `input_tokens` excludes the tokens read from or written to the prompt cache.
+    cached_tokens = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_write_tokens = getattr(usage, "cache_creation_input_tokens", None) or 0
+
+    return Usage(
+        prompt_tokens=usage.input_tokens + cached_tokens + cache_write_tokens,
+        completion_tokens=usage.output_tokens,
+        cached_tokens=cached_tokens,
+        cache_write_tokens=cache_write_tokens,
+    )
+
+
+# The API requires `max_tokens`; this is sent when the caller gives none.
+DEFAULT_MAX_TOKENS = 4096
+
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+_BATCH_STATUSES = {
+    "in_progress": BatchStatus.InProgress,
+    "canceling": BatchStatus.InProgress,
+    "ended": BatchStatus.Completed,
+}
 
 
 class Anthropic(AnthropicClient, LLM):
+    supports_batch: ClassVar[bool] = True
+    default_max_tokens: ClassVar[int | None] = DEFAULT_MAX_TOKENS
+
     def _convert_messages(self, messages: list[Message]) -> Iterable[MessageParam]:
         return [
             MessageParam(
                 role=cast(Literal["user", "assistant"], message.role.value),
-                content=message.content,
+                content=_get_content(message),
             )
             for message in messages
             if message.role in {Role.User, Role.Assistant}
@@ -23,49 +69,170 @@ class Anthropic(AnthropicClient, LLM):
     def _get_system_message_content(
         self,
         messages: list[Message],
-    ) -> str | NotGiven:
+    ) -> str | list[dict] | NotGiven:
         if message := next(
             (x for x in reversed(messages) if x.role == Role.System),
             NOT_GIVEN,
         ):
-            return message.content
+            return _get_content(message)
 
         return NOT_GIVEN
 
-    async def _streaming_response(self, response):
+    def _get_extra_headers(self, messages: list[Message]) -> dict[str, str] | None:
+        if any(x.cache for x in messages):
+            return {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+        return None
+
+    def _get_request_payload(self, messages: list[Message], **kwargs) -> dict:
+        return {
+            "system": self._get_system_message_content(messages),
+            **super()._get_request_payload(messages, **kwargs),
+        }
+
+    async def _stream_text(self, response):
+        usage = Usage()
         async for chunk in response:
             if chunk.type == "content_block_delta":
-                yield chunk.delta.text
+                if chunk.delta.type == "text_delta":
+                    yield chunk.delta.text
+                elif chunk.delta.type == "input_json_delta":
+                    yield ToolCallDelta(index=chunk.index, arguments=chunk.delta.partial_json)
+            elif chunk.type == "content_block_start":
+                if (block := chunk.content_block).type == "tool_use":
+                    yield ToolCallDelta(index=chunk.index, id=block.id, name=block.name)
+            elif chunk.type == "message_start":
+                usage = _get_usage(chunk.message.usage)
+            elif chunk.type == "message_delta":
+                if chunk.delta.stop_reason:
+                    yield Finish(chunk.delta.stop_reason)
+                yield dataclasses.replace(
+                    usage,
+                    completion_tokens=chunk.usage.output_tokens,
+                )
 
-    async def streaming_response(
+    async def _streaming_response(
         self,
         messages: list[Message],
-        max_tokens: int = 4096,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
         **kwargs,
     ) -> AsyncGenerator:
         system_message = self._get_system_message_content(messages)
 
-        response = await self.client.messages.create(
+        response = await self._stream_request(
+            self.client.messages.create,
             system=system_message,
-            messages=self._convert_messages(messages),
+            messages=self._get_messages(messages),
             stream=True,
+            extra_headers=self._get_extra_headers(messages),
             **self._get_call_kwargs(max_tokens=max_tokens, **kwargs),
         )
 
-        return self._streaming_response(response)
+        return self._stream_text(response)
 
-    async def response(
+    async def _response(
         self,
         messages: list[Message],
-        max_tokens: int = 4096,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
         **kwargs,
-    ) -> str:
+    ) -> Response:
         system_message = self._get_system_message_content(messages)
 
-        response = await self.client.messages.create(
+        response = await self._request(
+            self.client.messages.create,
             system=system_message,
-            messages=self._convert_messages(messages),
+            messages=self._get_messages(messages),
+            extra_headers=self._get_extra_headers(messages),
             **self._get_call_kwargs(max_tokens=max_tokens, **kwargs),
         )
 
-        return response.content[0].text
+        return Response(
+            content="".join(x.text for x in response.content if x.type == "text"),
+            usage=_get_usage(response.usage),
+            finish_reason=response.stop_reason,
+            tool_calls=[
+                ToolCall(id=x.id, name=x.name, arguments=json.dumps(x.input))
+                for x in response.content
+                if x.type == "tool_use"
+            ],
+        )
+
+    def _get_batch_request(
+        self,
+        custom_id: str,
+        messages: list[Message],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        **kwargs,
+    ) -> dict:
+        params = self._get_request_payload(messages, max_tokens=max_tokens, **kwargs)
+        if params["system"] is NOT_GIVEN:
+            del params["system"]
+
+        return {"custom_id": custom_id, "params": params}
+
+    @property
+    def _batches_url(self) -> str:
+        return f"{str(self.client.base_url).rstrip('/')}/v1/messages/batches"
+
+    def _batch_headers(self) -> dict[str, str]:
+        return {
+            **self.client.default_headers,
+            "anthropic-beta": "message-batches-2024-09-24,prompt-caching-2024-07-31",
+        }
+
+    def _update_batch_job(self, job: BatchJob, batch: dict[str, Any]) -> BatchJob:
+        return dataclasses.replace(
+            job,
+            status=_BATCH_STATUSES[batch["processing_status"]],
+            data={
+                "results_url": batch.get("results_url"),
+                "request_counts": batch.get("request_counts"),
+            },
+        )
+
+    async def _create_batch(self, file: IO[bytes]) -> BatchJob:
+        # The API takes one JSON document rather than a file; stream it from the
+        # JSONL lines so the request body is never held in memory. The last byte
+        # of each chunk is held back, so the trailing separator can be dropped.
+        async def body():
+            yield b'{"requests":['
+            held = b""
+            while chunk := await asyncio.to_thread(file.read, _UPLOAD_CHUNK_SIZE):
+                data = held + chunk.replace(b"\n", b",")
+                data, held = data[:-1], data[-1:]
+                yield data
+            yield held.rstrip(b",") + b"]}"
+
+        response = await self._http_client.post(
+            self._batches_url,
+            content=body(),
+            headers=self._batch_headers(),
+            timeout=self.client.timeout,
+        )
+        response.raise_for_status()
+        batch = response.json()
+        job = BatchJob(id=batch["id"], provider=self.provider, model=self.model)
+
+        return self._update_batch_job(job, batch)
+
+    async def _retrieve_batch(self, job: BatchJob) -> BatchJob:
+        response = await self._http_client.get(
+            f"{self._batches_url}/{job.id}",
+            headers=self._batch_headers(),
+            timeout=self.client.timeout,
+        )
+        response.raise_for_status()
+
+        return self._update_batch_job(job, response.json())
+
+    async def _batch_results(self, job: BatchJob) -> AsyncIterator[BatchResult]:
+        async with self._http_client.stream(
+            "GET",
+            job.data["results_url"],
+            headers=self._batch_headers(),
+            timeout=self.client.timeout,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    yield anthropic_result(json.loads(line))
@@ -1,34 +1,271 @@
 import abc
-from collections.abc import AsyncGenerator
-from typing import Any, ClassVar, Generic, TypeVar
-
-from llm_taxi.conversation import Message
+import asyncio
+import dataclasses
+import json
+import tempfile
+import time
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Sequence,
+)
+from typing import IO, Any, ClassVar, Generic, TypeVar
 
+from llm_taxi.batches import (
+    BATCH_DISCOUNT,
+    BatchJob,
+    BatchRequestError,
+    BatchResult,
+    BatchStatus,
+    BatchStore,
+    get_custom_id,
+    get_index,
+)
+from llm_taxi.cache import ResponseCache, make_cache_key
+from llm_taxi.concurrency import map_concurrently
+from llm_taxi.conversation import Conversation, Message
+from llm_taxi.instrumentation import (
+    CallMetrics,
+    MetricsSink,
+    emit,
+    get_metrics_sinks,
+    instrument_stream,
+)
+from llm_taxi.llms.streaming import text_stream, typed_stream
+from llm_taxi.singleflight import SingleFlight
+from llm_taxi.tokens import (
+    ContextPolicy,
+    Tokenizer,
+    fit_messages,
+    get_context_window,
+    get_tokenizer,
+)
+from llm_taxi.usage import (
+    Response,
+    StreamEvent,
+    StreamingResponse,
+    ToolCallDelta,
+    get_cost,
+)
 
 T = TypeVar("T")
 
 
+async def _replay(content: str) -> AsyncGenerator:
+    yield content
+
+
+async def _record(
+    response: AsyncGenerator,
+    cache: ResponseCache,
+    key: str,
+) -> AsyncGenerator:
+    chunks = []
+    tool_calls = False
+    async for chunk in response:
+        if isinstance(chunk, str):
+            chunks.append(chunk)
+        elif isinstance(chunk, ToolCallDelta):
+            tool_calls = True
+        yield chunk
+
+    # Only complete streams are cached; an interrupted one never reaches here.
+    # The cache holds text only, so replies with tool calls are not cached.
+    if not tool_calls:
+        await cache.aset(key, "".join(chunks))
+
+
+def _copy_response(response: Response) -> Response:
+    return dataclasses.replace(
+        response,
+        tool_calls=[dataclasses.replace(x) for x in response.tool_calls],
+    )
+
+
 class LLM(Generic[T], metaclass=abc.ABCMeta):
     """Abstract base class for Large Language Models (LLMs).
 
     This class provides a template for LLM implementations, including methods for converting
     messages and generating responses, both streaming and non-streaming.
 
+    Subclasses implement `_streaming_response` and `_response`; the public methods add
+    the behaviour shared by all providers, such as response caching and timing
+    instrumentation. `_response` returns a `Response` and `_streaming_response` a stream
+    of text chunks interleaved with `ToolCallDelta`, `Usage` and `Finish` events.
+
     Methods:
         streaming_response(messages: list[Message], **kwargs) -> AsyncGenerator:
-            Abstract method to be implemented by subclasses to generate a streaming response.
+            Generate a streaming response.
+
+        detailed_streaming_response(messages: list[Message], **kwargs) -> StreamingResponse:
+            Generate a streaming response that also reports usage and cost.
+
+        streaming_events(messages: list[Message], **kwargs) -> AsyncGenerator:
+            Stream text deltas, tool call deltas, the finish reason and usage.
 
         response(messages: list[Message], **kwargs) -> str:
-            Abstract method to be implemented by subclasses to generate a non-streaming response.
+            Generate a non-streaming response.
+
+        detailed_response(messages: list[Message], **kwargs) -> Response:
+            Generate a non-streaming response along with its usage and cost.
+
+        submit_batch(conversations, **kwargs) -> BatchJob:
+            Submit conversations to the provider's batch API, if it has one.
+
+        batch_response(conversations, **kwargs) -> AsyncGenerator:
+            Generate non-streaming responses for many conversations concurrently.
     """
 
     call_kwargs_mapping: ClassVar[dict[str, str]] = {}
+    supports_batch: ClassVar[bool] = False
+    # Completion budget the provider applies when `max_tokens` is not given, if it
+    # must be reserved in the context window.
+    default_max_tokens: ClassVar[int | None] = None
+
+    _response_cache: ResponseCache | None = None
+    _metrics_sinks: Sequence[MetricsSink] = ()
+    _context_policy: ContextPolicy | None = None
+    _single_flight: SingleFlight | None = None
 
     def _convert_messages(self, messages: list[Message]) -> T:
         raise NotImplementedError
 
+    def _merge_converted(self, converted: list, new: list) -> list:
+        """Append newly converted messages to those converted for earlier requests."""
+        return [*converted, *new]
+
+    def _get_messages(self, messages: list[Message] | Conversation) -> T:
+        if isinstance(messages, Conversation):
+            return messages.convert(
+                type(self),
+                self._convert_messages,
+                self._merge_converted,
+            )
+
+        return self._convert_messages(messages)
+
+    def _get_call_kwargs(self, **kwargs) -> dict:
+        return kwargs
+
+    def _get_request_payload(self, messages: list[Message], **kwargs) -> dict:
+        """Return what is sent to the provider for `messages`, used to identify requests."""
+        return {
+            "messages": self._get_messages(messages),
+            **self._get_call_kwargs(**kwargs),
+        }
+
+    def _get_cache_key(self, messages: list[Message], **kwargs) -> str:
+        return make_cache_key(
+            getattr(self, "provider", type(self).__name__),
+            getattr(self, "model", None),
+            self._get_request_payload(messages, **kwargs),
+        )
+
+    @property
+    def tokenizer(self) -> Tokenizer:
+        return get_tokenizer(
+            getattr(self, "provider", type(self).__name__),
+            getattr(self, "model", ""),
+        )
+
+    def count_tokens(self, messages: list[Message]) -> int:
+        """Estimate the prompt tokens of `messages` offline.
+
+        Counts are cached on each message, so re-counting a growing conversation
+        only tokenizes the new messages.
+        """
+        return self.tokenizer.count_messages(messages)
+
+    def _get_context_limit(self, **kwargs) -> int | None:
+        assert self._context_policy is not None
+        policy = self._context_policy
+
+        window = policy.context_window or get_context_window(
+            getattr(self, "provider", type(self).__name__),
+            getattr(self, "model", ""),
+        )
+        if window is None:
+            return None
+
+        reserve = policy.reserve_tokens
+        if reserve is None:
+            call_kwargs = self._get_call_kwargs(**kwargs)
+            reserve = (
+                call_kwargs.get("max_tokens")
+                or call_kwargs.get("max_output_tokens")
+                or self.default_max_tokens
+                or 0
+            )
+
+        return window - reserve
+
+    async def _fit_messages(self, messages: list[Message], **kwargs) -> list[Message]:
+        if self._context_policy is None:
+            return messages
+
+        if (limit := self._get_context_limit(**kwargs)) is None:
+            return messages
+
+        return await fit_messages(messages, self.tokenizer, limit, self._context_policy)
+
+    def _new_metrics(self, *, streaming: bool) -> tuple[CallMetrics, list[MetricsSink]]:
+        sinks = [*get_metrics_sinks(), *self._metrics_sinks]
+        metrics = CallMetrics(
+            provider=getattr(self, "provider", type(self).__name__),
+            model=getattr(self, "model", None),
+            streaming=streaming,
+        )
+
+        return metrics, sinks
+
+    async def _timed_streaming_response(
+        self,
+        messages: list[Message],
+        **kwargs,
+    ) -> AsyncGenerator:
+        if not get_metrics_sinks() and not self._metrics_sinks:
+            return await self._streaming_response(messages, **kwargs)
+
+        metrics, sinks = self._new_metrics(streaming=True)
+        try:
+            response = await self._streaming_response(messages, **kwargs)
+        except Exception as e:
+            metrics.finish(e)
+            emit(metrics, sinks)
+            raise
+
+        return instrument_stream(response, metrics, sinks)
+
+    async def _untimed_response(self, messages: list[Message], **kwargs) -> Response:
+        response = await self._response(messages, **kwargs)
+        if isinstance(response, str):
+            return Response(content=response)
+
+        return response
+
+    async def _timed_response(self, messages: list[Message], **kwargs) -> Response:
+        if not get_metrics_sinks() and not self._metrics_sinks:
+            return await self._untimed_response(messages, **kwargs)
+
+        metrics, sinks = self._new_metrics(streaming=False)
+        try:
+            response = await self._untimed_response(messages, **kwargs)
+        except Exception as e:
+            metrics.finish(e)
+            emit(metrics, sinks)
+            raise
+
+        metrics.chunks = 1
+        metrics.characters = len(response.content)
+        metrics.finish()
+        emit(metrics, sinks)
+
+        return response
+
     @abc.abstractmethod
-    async def streaming_response(
+    async def _streaming_response(
         self,
         messages: list[Message],
         **kwargs,
@@ -36,5 +273,281 @@ class LLM(Generic[T], metaclass=abc.ABCMeta):
         raise NotImplementedError
 
     @abc.abstractmethod
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
+        raise NotImplementedError
+
+    async def _events(
+        self,
+        messages: list[Message],
+        **kwargs,
+    ) -> tuple[AsyncGenerator, bool]:
+        """Return the event stream for `messages` and whether it is a cache hit."""
+        messages = await self._fit_messages(messages, **kwargs)
+        cache = self._response_cache
+        if cache is None and self._single_flight is None:
+            return await self._timed_streaming_response(messages, **kwargs), False
+
+        key = self._get_cache_key(messages, **kwargs)
+        if cache is not None and (content := await cache.aget(key)) is not None:
+            return _replay(content), True
+
+        async def open_stream() -> AsyncGenerator:
+            stream = await self._timed_streaming_response(messages, **kwargs)
+            if cache is None:
+                return stream
+
+            return _record(stream, cache, key)
+
+        if (flight := self._single_flight) is None:
+            return await open_stream(), False
+
+        # Identical concurrent requests share one upstream stream.
+        return await flight.stream(key, open_stream), False
+
+    def _complete(self, response: Response, start: float) -> Response:
+        if response.provider is None:
+            response.provider = getattr(self, "provider", type(self).__name__)
+        if response.model is None:
+            response.model = getattr(self, "model", None)
+        if response.cost is None:
+            response.cost = get_cost(response.provider, response.model, response.usage)
+        response.latency = time.perf_counter() - start
+
+        return response
+
+    async def streaming_response(
+        self,
+        messages: list[Message],
+        **kwargs,
+    ) -> AsyncGenerator:
+        stream, _ = await self._events(messages, **kwargs)
+
+        return text_stream(stream)
+
+    async def detailed_streaming_response(
+        self,
+        messages: list[Message],
+        **kwargs,
+    ) -> StreamingResponse:
+        """Generate a streaming response that reports usage, latency and cost.
+
+        Args:
+            messages (list[Message]): The conversation to respond to.
+            **kwargs: Additional keyword arguments passed to the provider.
+
+        Returns:
+            StreamingResponse: A stream of text chunks whose `response` attribute holds
+                the complete `Response` once the stream has been consumed.
+        """
+        start = time.perf_counter()
+        stream, cached = await self._events(messages, **kwargs)
+
+        return StreamingResponse(
+            stream,
+            provider=getattr(self, "provider", type(self).__name__),
+            model=getattr(self, "model", None),
+            start=start,
+            cached=cached,
+        )
+
+    async def streaming_events(
+        self,
+        messages: list[Message],
+        **kwargs,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Generate a streaming response as typed events.
+
+        Text arrives as `TextDelta`s, tool calls as `ToolCallDelta`s whose arguments
+        concatenate per `index`, followed by `Finish` and `Usage` when the provider
+        reports them. `streaming_response` is the text-only view of the same stream.
+
+        Args:
+            messages (list[Message]): The conversation to respond to.
+            **kwargs: Additional keyword arguments passed to the provider, such as `tools`.
+
+        Returns:
+            AsyncGenerator[StreamEvent, None]: The events of the response.
+        """
+        stream, _ = await self._events(messages, **kwargs)
+
+        return typed_stream(stream)
+
+    async def detailed_response(self, messages: list[Message], **kwargs) -> Response:
+        """Generate a non-streaming response along with its usage, latency and cost.
+
+        Args:
+            messages (list[Message]): The conversation to respond to.
+            **kwargs: Additional keyword arguments passed to the provider.
+
+        Returns:
+            Response: The response content and its metadata. Responses served from the
+                response cache have `cached` set and no usage.
+        """
+        start = time.perf_counter()
+        messages = await self._fit_messages(messages, **kwargs)
+        cache = self._response_cache
+        if cache is None and self._single_flight is None:
+            return self._complete(await self._timed_response(messages, **kwargs), start)
+
+        key = self._get_cache_key(messages, **kwargs)
+        if cache is not None and (content := await cache.aget(key)) is not None:
+            return self._complete(Response(content=content, cached=True), start)
+
+        if (flight := self._single_flight) is None:
+            response = await self._timed_response(messages, **kwargs)
+        else:
+            response = await flight.do(
+                key,
+                lambda: self._timed_response(messages, **kwargs),
+                copy=_copy_response,
+            )
+
+        if cache is not None:
+            if not response.tool_calls:
+                await cache.aset(key, response.content)
+
+        return self._complete(response, start)
+
     async def response(self, messages: list[Message], **kwargs) -> str:
+        return (await self.detailed_response(messages, **kwargs)).content
+
+    async def batch_response(
+        self,
+        conversations: Iterable[list[Message]] | AsyncIterable[list[Message]],
+        *,
+        max_concurrency: int = 8,
+        ordered: bool = True,
+        return_exceptions: bool = False,
+        **kwargs,
+    ) -> AsyncGenerator[tuple[int, str | Exception], None]:
+        """Generate responses for many conversations with bounded concurrency.
+
+        Conversations are consumed lazily, so `conversations` may be a generator over
+        an arbitrarily large input.
+
+        Args:
+            conversations (Iterable[list[Message]] | AsyncIterable[list[Message]]): The conversations to respond to.
+            max_concurrency (int, optional): Maximum number of in-flight requests. Defaults to 8.
+            ordered (bool, optional): Yield in input order rather than completion order. Defaults to True.
+            return_exceptions (bool, optional): Yield failures as exceptions instead of raising. Defaults to False.
+            **kwargs: Additional keyword arguments passed to `response`.
+
+        Yields:
+            tuple[int, str | Exception]: The index of the conversation and its response.
+        """
+
+        async def respond(messages: list[Message]) -> str:
+            return await self.response(messages, **kwargs)
+
+        async for item in map_concurrently(
+            respond,
+            conversations,
+            max_concurrency=max_concurrency,
+            ordered=ordered,
+            return_exceptions=return_exceptions,
+        ):
+            yield item
+
+    def _get_batch_request(self, custom_id: str, messages: list[Message], **kwargs) -> dict:
+        raise NotImplementedError
+
+    async def _create_batch(self, file: IO[bytes]) -> BatchJob:
+        raise NotImplementedError
+
+    async def _retrieve_batch(self, job: BatchJob) -> BatchJob:
         raise NotImplementedError
+
+    def _batch_results(self, job: BatchJob) -> AsyncIterator[BatchResult]:
+        raise NotImplementedError
+
+    async def submit_batch(
+        self,
+        conversations: Iterable[list[Message]],
+        *,
+        store: BatchStore | None = None,
+        **kwargs,
+    ) -> BatchJob:
+        """Submit conversations to the provider's batch API.
+
+        Requests are written to a temporary JSONL file and uploaded from there, so
+        `conversations` may be a generator over an arbitrarily large input.
+
+        Args:
+            conversations (Iterable[list[Message]]): The conversations to respond to.
+            store (BatchStore | None, optional): Where the job is persisted. Defaults to a `BatchStore` in the user cache directory.
+            **kwargs: Additional keyword arguments for each request.
+
+        Raises:
+            NotImplementedError: If the provider has no batch API.
+
+        Returns:
+            BatchJob: The submitted job, to be passed to `poll` and `collect`.
+        """
+        if not self.supports_batch:
+            msg = f"{type(self).__name__} does not support batch jobs"
+            raise NotImplementedError(msg)
+
+        with tempfile.TemporaryFile() as f:
+            requests = 0
+            for index, messages in enumerate(conversations):
+                request = self._get_batch_request(get_custom_id(index), messages, **kwargs)
+                f.write(json.dumps(request).encode())
+                f.write(b"\n")
+                requests += 1
+            f.seek(0)
+
+            job = await self._create_batch(f)
+
+        job.requests = requests
+        (store or BatchStore()).save(job)
+
+        return job
+
+    async def poll(self, job: BatchJob, *, store: BatchStore | None = None) -> BatchJob:
+        """Refresh the status of a batch job and persist it."""
+        if job.status.finished:
+            return job
+
+        job = await self._retrieve_batch(job)
+        (store or BatchStore()).save(job)
+
+        return job
+
+    async def collect(
+        self,
+        job: BatchJob,
+        *,
+        interval: float = 60.0,
+        store: BatchStore | None = None,
+    ) -> AsyncGenerator[tuple[int, Response | BatchRequestError], None]:
+        """Wait for a batch job to finish and stream its results.
+
+        Args:
+            job (BatchJob): The job returned by `submit_batch`, or loaded from a `BatchStore`.
+            interval (float, optional): Seconds between polls. Defaults to 60.0.
+            store (BatchStore | None, optional): Where the job is persisted. Defaults to a `BatchStore` in the user cache directory.
+
+        Raises:
+            RuntimeError: If the job as a whole failed.
+
+        Yields:
+            tuple[int, Response | BatchRequestError]: The index of the conversation in the
+                submitted input and its response, in the order the provider returns them.
+        """
+        while not (job := await self.poll(job, store=store)).status.finished:
+            await asyncio.sleep(interval)
+
+        if job.status == BatchStatus.Failed:
+            msg = f"Batch {job.id} failed: {job.data.get('errors')}"
+            raise RuntimeError(msg)
+
+        async for custom_id, result in self._batch_results(job):
+            if isinstance(result, Response):
+                cost = get_cost(job.provider, job.model, result.usage)
+                result = dataclasses.replace(
+                    result,
+                    provider=job.provider,
+                    model=job.model,
+                    cost=None if cost is None else cost * BATCH_DISCOUNT,
+                )
+            yield get_index(custom_id), result
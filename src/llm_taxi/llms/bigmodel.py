@@ -1,6 +1,9 @@
+from typing import ClassVar
+
 from llm_taxi.clients.bigmodel import BigModel as BigModelClient
 from llm_taxi.llms.openai import OpenAI
 
 
 class BigModel(BigModelClient, OpenAI):
-    pass
+    stream_usage: ClassVar[bool] = False
+    supports_batch: ClassVar[bool] = False
@@ -1,6 +1,8 @@
+from typing import ClassVar
+
 from llm_taxi.clients.deepinfra import DeepInfra as DeepInfraClient
 from llm_taxi.llms.openai import OpenAI
 
 
 class DeepInfra(DeepInfraClient, OpenAI):
-    pass
+    supports_batch: ClassVar[bool] = False
@@ -1,6 +1,9 @@
+from typing import ClassVar
+
 from llm_taxi.clients.deepseek import DeepSeek as DeepSeekClient
 from llm_taxi.llms.openai import OpenAI
 
 
 class DeepSeek(DeepSeekClient, OpenAI):
-    pass
+    stream_usage: ClassVar[bool] = False
+    supports_batch: ClassVar[bool] = False
@@ -1,10 +1,51 @@
 import itertools
-from collections.abc import AsyncGenerator
-from typing import ClassVar
+import json
+from collections.abc import AsyncGenerator, Iterator
+from typing import Any, ClassVar
 
 from llm_taxi.clients.google import Google as GoogleClient
 from llm_taxi.conversation import Message, Role
 from llm_taxi.llms.base import LLM
+from llm_taxi.usage import Finish, Response, ToolCall, ToolCallDelta, Usage
+
+
+def _get_usage(response: Any) -> Usage | None:
+    # Older SDK versions only expose usage on the underlying protobuf result.
+    metadata = getattr(response, "usage_metadata", None) or getattr(
+        getattr(response, "_result", None), "usage_metadata", None
+    )
+    if not metadata:
+        return None
+
+    return Usage(
+        prompt_tokens=metadata.prompt_token_count,
+        completion_tokens=metadata.candidates_token_count,
+        cached_tokens=getattr(metadata, "cached_content_token_count", None) or 0,
+    )
+
+
+def _get_finish_reason(response: Any) -> str | None:
+    if not response.candidates:
+        return None
+
+    reason = response.candidates[0].finish_reason
+    if not reason:
+        return None
+
+    return reason.name.lower()
+
+
+def _get_parts(response: Any) -> Iterator[tuple[str, ToolCall | None]]:
+    # `response.text` raises when a part is a function call.
+    if not response.candidates:
+        return
+
+    for part in response.candidates[0].content.parts:
+        if (function_call := part.function_call) and function_call.name:
+            args = type(function_call).to_dict(function_call).get("args") or {}
+            yield "", ToolCall(id=None, name=function_call.name, arguments=json.dumps(args))
+        else:
+            yield part.text, None
 
 
 class Google(GoogleClient, LLM):
@@ -31,9 +72,41 @@ class Google(GoogleClient, LLM):
             for role, parts in groups
         ]
 
-    async def _streaming_response(self, response):
+    def _merge_converted(self, converted: list, new: list) -> list:
+        # Consecutive messages of the same role form one content block.
+        if converted and new and converted[-1]["role"] == new[0]["role"]:
+            merged = {
+                "role": new[0]["role"],
+                "parts": [*converted[-1]["parts"], *new[0]["parts"]],
+            }
+            return [*converted[:-1], merged, *new[1:]]
+
+        return [*converted, *new]
+
+    async def _stream_text(self, response):
+        usage = finish_reason = None
+        # Function calls arrive whole, one per part.
+        calls = 0
         async for chunk in response:
-            yield chunk.text
+            for text, call in _get_parts(chunk):
+                if call is not None:
+                    yield ToolCallDelta(
+                        index=calls,
+                        id=call.id,
+                        name=call.name,
+                        arguments=call.arguments,
+                    )
+                    calls += 1
+                elif text:
+                    yield text
+            # Every chunk repeats the running totals; only the last ones are final.
+            usage = _get_usage(chunk) or usage
+            finish_reason = _get_finish_reason(chunk) or finish_reason
+
+        if finish_reason is not None:
+            yield Finish(finish_reason)
+        if usage is not None:
+            yield usage
 
     def _get_call_kwargs(self, **kwargs) -> dict:
         kwargs = super()._get_call_kwargs(**kwargs)
@@ -43,31 +116,40 @@ class Google(GoogleClient, LLM):
 
         return kwargs
 
-    async def streaming_response(
+    async def _streaming_response(
         self,
         messages: list[Message],
         **kwargs,
     ) -> AsyncGenerator:
         from google import generativeai as genai
 
-        response = await self.client.generate_content_async(
-            self._convert_messages(messages),
+        response = await self._stream_request(
+            self.client.generate_content_async,
+            self._get_messages(messages),
             stream=True,
             generation_config=genai.types.GenerationConfig(
                 **self._get_call_kwargs(**kwargs),
             ),
         )
 
-        return self._streaming_response(response)
+        return self._stream_text(response)
 
-    async def response(self, messages: list[Message], **kwargs) -> str:
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
         from google import generativeai as genai
 
-        response = await self.client.generate_content_async(
-            self._convert_messages(messages),
+        response = await self._request(
+            self.client.generate_content_async,
+            self._get_messages(messages),
             generation_config=genai.types.GenerationConfig(
                 **self._get_call_kwargs(**kwargs),
             ),
         )
 
-        return response.text
+        parts = list(_get_parts(response))
+
+        return Response(
+            content="".join(text for text, _ in parts),
+            usage=_get_usage(response),
+            finish_reason=_get_finish_reason(response),
+            tool_calls=[call for _, call in parts if call is not None],
+        )
@@ -13,7 +13,9 @@ from groq.types.chat.chat_completion_user_message_param import (
 
 from llm_taxi.clients.groq import Groq as GroqClient
 from llm_taxi.conversation import Message, Role
-from llm_taxi.llms.openai import streaming_response
+from llm_taxi.llms.base import LLM
+from llm_taxi.llms.streaming import chat_response, stream_events
+from llm_taxi.usage import Response
 
 _PARAM_TYPES: dict[Role, type] = {
     Role.User: ChatCompletionUserMessageParam,
@@ -22,7 +24,7 @@ _PARAM_TYPES: dict[Role, type] = {
 }
 
 
-class Groq(GroqClient):
+class Groq(GroqClient, LLM):
     def _convert_messages(self, messages: list[Message]) -> list[Any]:
         return [
             _PARAM_TYPES[message.role](
@@ -32,26 +34,25 @@ class Groq(GroqClient):
             for message in messages
         ]
 
-    async def streaming_response(
+    async def _streaming_response(
         self,
         messages: list[Message],
         **kwargs,
     ) -> AsyncGenerator:
-        response = await self.client.chat.completions.create(
-            messages=self._convert_messages(messages),
+        response = await self._stream_request(
+            self.client.chat.completions.create,
+            messages=self._get_messages(messages),
             stream=True,
             **self._get_call_kwargs(**kwargs),
         )
 
-        return streaming_response(response)
+        return stream_events(response)
 
-    async def response(self, messages: list[Message], **kwargs) -> str:
-        response = await self.client.chat.completions.create(
-            messages=self._convert_messages(messages),
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
+        response = await self._request(
+            self.client.chat.completions.create,
+            messages=self._get_messages(messages),
             **self._get_call_kwargs(**kwargs),
         )
 
-        if content := response.choices[0].message.content:
-            return content
-
-        return ""
+        return chat_response(response)
@@ -0,0 +1,152 @@
+import asyncio
+import contextlib
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from typing import Any, TypeVar
+
+from llm_taxi.conversation import Message
+from llm_taxi.llms.base import LLM
+from llm_taxi.retry import prime_stream
+from llm_taxi.usage import Response
+
+T = TypeVar("T")
+
+
+async def _discard(task: asyncio.Task) -> None:
+    task.cancel()
+    with contextlib.suppress(BaseException):
+        result = await task
+        # A losing stream may already be open; close it to release the connection.
+        if hasattr(result, "aclose"):
+            await result.aclose()
+
+
+class Hedged(LLM):
+    """Send a duplicate request when the first one is slow.
+
+    If `primary` has not produced a response (or, for streams, a first chunk)
+    within the `percentile` of recently observed latencies, the same request is
+    sent to `hedge` and whichever answers first wins; the other is cancelled.
+    Hedges are paid for from a budget that grows by `max_extra_load` per request,
+    which caps the extra traffic at that fraction.
+
+    Args:
+        primary (LLM): The model tried first.
+        hedge (LLM | None, optional): The model for duplicate requests. Defaults to `primary`.
+        percentile (float, optional): Latency percentile after which to hedge. Defaults to 0.95.
+        initial_delay (float, optional): Hedge delay in seconds until `min_samples` latencies are known. Defaults to 1.0.
+        min_delay (float, optional): Lower bound of the hedge delay in seconds. Defaults to 0.0.
+        window (int, optional): Number of recent latencies to keep. Defaults to 200.
+        min_samples (int, optional): Samples needed before the percentile is used. Defaults to 20.
+        max_extra_load (float, optional): Maximum fraction of requests that may be hedged. Defaults to 0.1.
+        max_burst (float, optional): Maximum hedges that may be saved up for a burst. Defaults to 10.0.
+    """
+
+    def __init__(
+        self,
+        primary: LLM,
+        hedge: LLM | None = None,
+        *,
+        percentile: float = 0.95,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.0,
+        window: int = 200,
+        min_samples: int = 20,
+        max_extra_load: float = 0.1,
+        max_burst: float = 10.0,
+    ) -> None:
+        self._primary = primary
+        self._hedge = hedge or primary
+        self._percentile = percentile
+        self._initial_delay = initial_delay
+        self._min_delay = min_delay
+        self._min_samples = min_samples
+        self._max_extra_load = max_extra_load
+        self._max_burst = max_burst
+        self._budget = 0.0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._first_chunk_latencies: deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _get_delay(self, latencies: deque[float]) -> float:
+        if len(latencies) < self._min_samples:
+            return self._initial_delay
+
+        values = sorted(latencies)
+        index = min(len(values) - 1, int(self._percentile * len(values)))
+
+        return max(self._min_delay, values[index])
+
+    def _take_budget(self) -> bool:
+        if self._budget < 1:
+            return False
+
+        self._budget -= 1
+
+        return True
+
+    async def _race(
+        self,
+        call: Callable[[LLM], Awaitable[T]],
+        latencies: deque[float],
+    ) -> T:
+        self.requests += 1
+        self._budget = min(self._max_burst, self._budget + self._max_extra_load)
+
+        start = time.monotonic()
+        primary = asyncio.create_task(call(self._primary))
+        tasks: dict[asyncio.Task, LLM] = {primary: self._primary}
+        winner: asyncio.Task | None = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._get_delay(latencies))
+            if not done and self._take_budget():
+                self.hedges += 1
+                tasks[asyncio.create_task(call(self._hedge))] = self._hedge
+
+            errors: list[BaseException] = []
+            pending = set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if (error := task.exception()) is not None:
+                        errors.append(error)
+                    elif winner is None:
+                        winner = task
+
+            if winner is None:
+                raise errors[-1]
+
+            latencies.append(time.monotonic() - start)
+            if winner is not primary:
+                self.hedge_wins += 1
+
+            return winner.result()
+        finally:
+            # Losers that finished together with the winner may hold open streams too.
+            for task in tasks:
+                if task is not winner:
+                    await _discard(task)
+
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
+        async def call(llm: LLM) -> Response:
+            return await llm.detailed_response(messages, **kwargs)
+
+        return await self._race(call, self._latencies)
+
+    async def _streaming_response(
+        self,
+        messages: list[Message],
+        **kwargs,
+    ) -> AsyncGenerator:
+        async def call(llm: LLM) -> Any:
+            stream = await llm.detailed_streaming_response(messages, **kwargs)
+
+            return await prime_stream(stream.events())
+
+        return await self._race(call, self._first_chunk_latencies)
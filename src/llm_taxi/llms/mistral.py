@@ -5,33 +5,32 @@ from mistralai.models.chat_completion import ChatMessage
 from llm_taxi.clients.mistral import Mistral as MistralClient
 from llm_taxi.conversation import Message
 from llm_taxi.llms.base import LLM
-from llm_taxi.llms.openai import streaming_response
+from llm_taxi.llms.streaming import chat_response, stream_events
+from llm_taxi.usage import Response
 
 
 class Mistral(MistralClient, LLM):
     def _convert_messages(self, messages: list[Message]) -> list[ChatMessage]:
         return [ChatMessage(role=x.role.value, content=x.content) for x in messages]
 
-    async def streaming_response(
+    async def _streaming_response(
         self,
         messages: list[Message],
         **kwargs,
     ) -> AsyncGenerator:
-        response = self.client.chat_stream(
-            messages=self._convert_messages(messages),
+        response = await self._stream_request(
+            self.client.chat_stream,
+            messages=self._get_messages(messages),
             **self._get_call_kwargs(**kwargs),
         )
 
-        return streaming_response(response)
+        return stream_events(response)
 
-    async def response(self, messages: list[Message], **kwargs) -> str:
-        response = await self.client.chat(
-            messages=self._convert_messages(messages),
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
+        response = await self._request(
+            self.client.chat,
+            messages=self._get_messages(messages),
             **self._get_call_kwargs(**kwargs),
         )
 
-        content = response.choices[0].message.content
-        if isinstance(content, list):
-            return "".join(content)
-
-        return content
+        return chat_response(response)
@@ -1,5 +1,7 @@
-from collections.abc import AsyncGenerator, Iterable
-from typing import Any
+import dataclasses
+import json
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from typing import IO, Any, ClassVar
 
 from openai.types.chat import (
     ChatCompletionAssistantMessageParam,
@@ -8,16 +10,21 @@ from openai.types.chat import (
     ChatCompletionUserMessageParam,
 )
 
+from llm_taxi.batches import BatchJob, BatchResult, BatchStatus, openai_result
 from llm_taxi.clients.openai import OpenAI as OpenAIClient
 from llm_taxi.conversation import Message, Role
 from llm_taxi.llms.base import LLM
+from llm_taxi.llms.streaming import (
+    ChunkCoalescing,
+    chat_response,
+    coalesce_chunks,
+    raw_stream_events,
+    stream_events,
+    streaming_response,
+)
+from llm_taxi.usage import Response
 
-
-async def streaming_response(response: Any) -> AsyncGenerator:
-    async for chunk in response:
-        if content := chunk.choices[0].delta.content:
-            yield content
-
+__all__ = ["OpenAI", "streaming_response"]
 
 _PARAM_TYPES: dict[Role, type] = {
     Role.User: ChatCompletionUserMessageParam,
@@ -25,37 +32,148 @@ _PARAM_TYPES: dict[Role, type] = {
     Role.System: ChatCompletionSystemMessageParam,
 }
 
+_BATCH_STATUSES = {
+    "validating": BatchStatus.Pending,
+    "in_progress": BatchStatus.InProgress,
+    "finalizing": BatchStatus.InProgress,
+    "cancelling": BatchStatus.InProgress,
+    "completed": BatchStatus.Completed,
+    "failed": BatchStatus.Failed,
+    "expired": BatchStatus.Expired,
+    "cancelled": BatchStatus.Cancelled,
+}
+
 
 class OpenAI(OpenAIClient, LLM):
+    # Whether the API accepts `stream_options` to report usage at the end of a stream.
+    stream_usage: ClassVar[bool] = True
+    supports_batch: ClassVar[bool] = True
+
+    def __init__(
+        self,
+        *,
+        raw_stream: bool = False,
+        chunk_coalescing: ChunkCoalescing | None = None,
+        **kwargs,
+    ) -> None:
+        """Initialize the model.
+
+        Args:
+            raw_stream (bool, optional): Parse streamed responses from the raw SSE bytes
+                instead of building an SDK object per chunk, which costs much less CPU
+                at high token rates. Defaults to False.
+            chunk_coalescing (ChunkCoalescing, optional): Merge streamed text into fewer,
+                larger chunks. Defaults to None.
+            **kwargs: Keyword arguments for the client, see `Client`.
+        """
+        super().__init__(**kwargs)
+
+        self._raw_stream = raw_stream
+        self._chunk_coalescing = chunk_coalescing
+
     def _convert_messages(
         self,
         messages: list[Message],
     ) -> Iterable[ChatCompletionMessageParam]:
-        return (
+        return [
             _PARAM_TYPES[message.role](role=message.role.value, content=message.content)
             for message in messages
-        )
+        ]
 
-    async def streaming_response(
+    async def _streaming_response(
         self,
         messages: list[Message],
         **kwargs,
     ) -> AsyncGenerator:
-        response = await self.client.chat.completions.create(
-            messages=self._convert_messages(messages),
-            stream=True,
+        call_kwargs = self._get_call_kwargs(**kwargs)
+        if self.stream_usage:
+            call_kwargs.setdefault("stream_options", {"include_usage": True})
+
+        if self._raw_stream:
+            response = await self._stream_request(
+                self._stream_bytes,
+                messages=self._get_messages(messages),
+                stream=True,
+                **call_kwargs,
+            )
+            events = raw_stream_events(response)
+        else:
+            response = await self._stream_request(
+                self.client.chat.completions.create,
+                messages=self._get_messages(messages),
+                stream=True,
+                **call_kwargs,
+            )
+            events = stream_events(response)
+
+        if self._chunk_coalescing is not None:
+            return coalesce_chunks(events, self._chunk_coalescing)
+
+        return events
+
+    async def _stream_bytes(self, **kwargs) -> AsyncGenerator[bytes, None]:
+        # HTTP errors are raised on entering the context, i.e. when the first
+        # chunk is requested, which `_stream_request` still retries.
+        async with self.client.chat.completions.with_streaming_response.create(
+            **kwargs,
+        ) as response:
+            async for chunk in response.iter_bytes():
+                yield chunk
+
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
+        response = await self._request(
+            self.client.chat.completions.create,
+            messages=self._get_messages(messages),
             **self._get_call_kwargs(**kwargs),
         )
 
-        return streaming_response(response)
+        return chat_response(response)
 
-    async def response(self, messages: list[Message], **kwargs) -> str:
-        response = await self.client.chat.completions.create(
-            messages=self._convert_messages(messages),
-            **self._get_call_kwargs(**kwargs),
+    def _get_batch_request(self, custom_id: str, messages: list[Message], **kwargs) -> dict:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": self._get_request_payload(messages, **kwargs),
+        }
+
+    def _update_batch_job(self, job: BatchJob, batch: Any) -> BatchJob:
+        return dataclasses.replace(
+            job,
+            status=_BATCH_STATUSES[batch.status],
+            data={
+                "output_file_id": batch.output_file_id,
+                "error_file_id": batch.error_file_id,
+                "errors": batch.errors.model_dump() if batch.errors else None,
+            },
         )
 
-        if content := response.choices[0].message.content:
-            return content
+    async def _create_batch(self, file: IO[bytes]) -> BatchJob:
+        uploaded = await self.client.files.create(
+            file=("batch.jsonl", file),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        job = BatchJob(id=batch.id, provider=self.provider, model=self.model)
+
+        return self._update_batch_job(job, batch)
+
+    async def _retrieve_batch(self, job: BatchJob) -> BatchJob:
+        batch = await self.client.batches.retrieve(job.id)
+
+        return self._update_batch_job(job, batch)
+
+    async def _batch_results(self, job: BatchJob) -> AsyncIterator[BatchResult]:
+        # Failed requests are reported in a separate error file.
+        for file_id in (job.data["output_file_id"], job.data["error_file_id"]):
+            if file_id is None:
+                continue
 
-        return ""
+            async with self.client.files.with_streaming_response.content(file_id) as response:
+                async for line in response.iter_lines():
+                    if line:
+                        yield openai_result(json.loads(line))
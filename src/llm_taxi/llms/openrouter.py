@@ -1,6 +1,9 @@
+from typing import ClassVar
+
 from llm_taxi.clients.openrouter import OpenRouter as OpenRouterClient
 from llm_taxi.llms.openai import OpenAI
 
 
 class OpenRouter(OpenRouterClient, OpenAI):
-    pass
+    stream_usage: ClassVar[bool] = False
+    supports_batch: ClassVar[bool] = False
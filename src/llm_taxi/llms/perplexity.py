@@ -1,6 +1,9 @@
+from typing import ClassVar
+
 from llm_taxi.clients.perplexity import Perplexity as PerplexityClient
 from llm_taxi.llms.openai import OpenAI
 
 
 class Perplexity(PerplexityClient, OpenAI):
-    pass
+    stream_usage: ClassVar[bool] = False
+    supports_batch: ClassVar[bool] = False
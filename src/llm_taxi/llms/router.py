@@ -0,0 +1,242 @@
+import asyncio
+import random
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Sequence
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+from llm_taxi.conversation import Message
+from llm_taxi.llms.base import LLM
+from llm_taxi.retry import prime_stream
+from llm_taxi.usage import Response
+
+
+class RoutingPolicy(Enum):
+    Latency = "latency"
+    Weighted = "weighted"
+    LeastOutstanding = "least_outstanding"
+
+
+@dataclass
+class Backend:
+    """A model behind a `Router`, with its live statistics.
+
+    Attributes:
+        llm (LLM): The model serving requests.
+        weight (float): Relative share of traffic under `RoutingPolicy.Weighted`.
+        name (str | None): Label used in `Router.stats`. Defaults to the provider and model.
+    """
+
+    llm: LLM
+    weight: float = 1.0
+    name: str | None = None
+    latency: float | None = field(default=None, init=False)
+    error_rate: float = field(default=0.0, init=False)
+    outstanding: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        if self.name is None:
+            provider = getattr(self.llm, "provider", type(self.llm).__name__)
+            self.name = f"{provider}:{getattr(self.llm, 'model', '')}"
+
+
+class _TrackedStream:
+    """A backend's stream that counts as outstanding until it ends, is closed or is collected."""
+
+    def __init__(self, router: "Router", backend: Backend, stream: AsyncGenerator) -> None:
+        self._router = router
+        self._backend = backend
+        self._stream = stream
+        self._released = False
+
+    def _release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._backend.outstanding -= 1
+
+    def __aiter__(self) -> "_TrackedStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._released:
+            raise StopAsyncIteration
+
+        try:
+            return await anext(self._stream)
+        except StopAsyncIteration:
+            self._release()
+            raise
+        except Exception:
+            self._router._record(self._backend, None)
+            self._release()
+            raise
+
+    async def aclose(self) -> None:
+        # The forwarded stream closes the backend's provider stream in turn.
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+    def __del__(self) -> None:
+        self._release()
+
+
+class Router(LLM):
+    """Route requests across interchangeable models with failover.
+
+    Every request goes to the best backend according to `policy`; if it fails or
+    times out, the next best one is tried. Latency (time to response, or to first
+    chunk for streams) and error rate are tracked per backend as exponentially
+    weighted moving averages.
+
+    Args:
+        backends (Sequence[LLM | Backend]): The models to route between.
+        policy (RoutingPolicy, optional): How to rank backends. Defaults to `RoutingPolicy.Latency`.
+        alpha (float, optional): Smoothing factor of the moving averages. Defaults to 0.2.
+        timeout (float | None, optional): Per-backend timeout in seconds before failing over. Defaults to None.
+        max_attempts (int | None, optional): Maximum backends tried per request. Defaults to all of them.
+        error_penalty (float, optional): How strongly the error rate inflates a backend's latency score. Defaults to 10.0.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[LLM | Backend],
+        *,
+        policy: RoutingPolicy = RoutingPolicy.Latency,
+        alpha: float = 0.2,
+        timeout: float | None = None,
+        max_attempts: int | None = None,
+        error_penalty: float = 10.0,
+    ) -> None:
+        if not backends:
+            msg = "At least one backend is required"
+            raise ValueError(msg)
+
+        self._backends = [x if isinstance(x, Backend) else Backend(x) for x in backends]
+        self._policy = policy
+        self._alpha = alpha
+        self._timeout = timeout
+        self._max_attempts = max_attempts or len(self._backends)
+        self._error_penalty = error_penalty
+
+    @property
+    def backends(self) -> list[Backend]:
+        return self._backends
+
+    @property
+    def stats(self) -> dict[str, dict[str, float | int | None]]:
+        return {
+            str(x.name): {
+                "latency": x.latency,
+                "error_rate": x.error_rate,
+                "outstanding": x.outstanding,
+            }
+            for x in self._backends
+        }
+
+    def _score(self, backend: Backend) -> float:
+        if (latency := backend.latency) is None:
+            # Fresh backends score zero so that each one gets probed; backends
+            # that have only failed are assumed to be as fast as the average.
+            if not backend.error_rate:
+                return 0.0
+            latencies = [x.latency for x in self._backends if x.latency is not None]
+            latency = sum(latencies) / len(latencies) if latencies else 1.0
+
+        return latency * (1 + self._error_penalty * backend.error_rate)
+
+    def _rank(self) -> list[Backend]:
+        if self._policy == RoutingPolicy.LeastOutstanding:
+            ranked = sorted(self._backends, key=lambda x: (x.outstanding, self._score(x)))
+        elif self._policy == RoutingPolicy.Weighted:
+            # Weighted sampling without replacement: the first draw takes the
+            # traffic, the rest are the failover order.
+            candidates = list(self._backends)
+            ranked = []
+            while candidates:
+                weights = [max(x.weight * (1 - x.error_rate), 1e-6) for x in candidates]
+                choice = random.choices(range(len(candidates)), weights=weights)[0]
+                ranked.append(candidates.pop(choice))
+        else:
+            ranked = sorted(self._backends, key=self._score)
+
+        return ranked[: self._max_attempts]
+
+    def _record(self, backend: Backend, latency: float | None) -> None:
+        alpha = self._alpha
+        failed = latency is None
+        backend.error_rate = alpha * float(failed) + (1 - alpha) * backend.error_rate
+        if latency is not None:
+            backend.latency = (
+                latency
+                if backend.latency is None
+                else alpha * latency + (1 - alpha) * backend.latency
+            )
+
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
+        error: Exception | None = None
+        for backend in self._rank():
+            backend.outstanding += 1
+            start = time.monotonic()
+            try:
+                response = await asyncio.wait_for(
+                    backend.llm.detailed_response(messages, **kwargs),
+                    timeout=self._timeout,
+                )
+            except Exception as e:
+                self._record(backend, None)
+                error = e
+                continue
+            finally:
+                backend.outstanding -= 1
+
+            self._record(backend, time.monotonic() - start)
+
+            return response
+
+        assert error is not None
+        raise error
+
+    async def _streaming_response(
+        self,
+        messages: list[Message],
+        **kwargs,
+    ) -> AsyncIterator:
+        error: Exception | None = None
+        for backend in self._rank():
+            backend.outstanding += 1
+            start = time.monotonic()
+            response = None
+            try:
+                # Fail over only until the first chunk has arrived.
+                response = await asyncio.wait_for(
+                    self._first_chunk(backend, messages, **kwargs),
+                    timeout=self._timeout,
+                )
+            except Exception as e:
+                self._record(backend, None)
+                error = e
+                continue
+            finally:
+                # Also on cancellation: only a returned stream keeps the request counted.
+                if response is None:
+                    backend.outstanding -= 1
+
+            self._record(backend, time.monotonic() - start)
+
+            return _TrackedStream(self, backend, response)
+
+        assert error is not None
+        raise error
+
+    async def _first_chunk(
+        self,
+        backend: Backend,
+        messages: list[Message],
+        **kwargs,
+    ) -> AsyncGenerator:
+        stream = await backend.llm.detailed_streaming_response(messages, **kwargs)
+
+        return await prime_stream(stream.events())
@@ -0,0 +1,341 @@
+import asyncio
+import json
+from collections.abc import AsyncGenerator, AsyncIterable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from llm_taxi.usage import (
+    Finish,
+    Response,
+    StreamEvent,
+    TextDelta,
+    ToolCall,
+    ToolCallDelta,
+    Usage,
+)
+
+
+def _get_cached_tokens(usage: Any) -> int:
+    # DeepSeek reports cache hits in its own field; older SDKs keep
+    # `prompt_tokens_details` as a plain dict.
+    if hits := getattr(usage, "prompt_cache_hit_tokens", None):
+        return hits
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+
+    return getattr(details, "cached_tokens", None) or 0
+
+
+def _get_usage(chunk: Any) -> Usage | None:
+    # Groq reports streaming usage in its `x_groq` extension rather than `usage`.
+    usage = getattr(chunk, "usage", None) or getattr(
+        getattr(chunk, "x_groq", None), "usage", None
+    )
+    if usage is None:
+        return None
+
+    return Usage(
+        prompt_tokens=usage.prompt_tokens or 0,
+        completion_tokens=usage.completion_tokens or 0,
+        cached_tokens=_get_cached_tokens(usage),
+    )
+
+
+def _get_tool_call_deltas(tool_calls: list[Any]) -> list[ToolCallDelta]:
+    # Mistral sends whole calls without an index.
+    return [
+        ToolCallDelta(
+            index=i if (index := getattr(x, "index", None)) is None else index,
+            id=x.id,
+            name=x.function.name if x.function else None,
+            arguments=(x.function.arguments if x.function else None) or "",
+        )
+        for i, x in enumerate(tool_calls)
+    ]
+
+
+def chat_response(response: Any) -> Response:
+    """Convert an OpenAI-style chat completion into a `Response`."""
+    content = ""
+    finish_reason = None
+    tool_calls = []
+    if choices := response.choices:
+        if message := choices[0].message:
+            if message.content:
+                content = message.content
+                if isinstance(content, list):
+                    content = "".join(content)
+            tool_calls = [
+                ToolCall(id=x.id, name=x.function.name, arguments=x.function.arguments)
+                for x in getattr(message, "tool_calls", None) or ()
+            ]
+        if reason := choices[0].finish_reason:
+            finish_reason = str(getattr(reason, "value", reason))
+
+    return Response(
+        content=content,
+        usage=_get_usage(response),
+        finish_reason=finish_reason,
+        tool_calls=tool_calls,
+    )
+
+
+async def stream_events(response: Any) -> AsyncGenerator:
+    """Yield text chunks of an OpenAI-style stream, plus tool call deltas, `Finish` and `Usage`."""
+    async for chunk in response:
+        # The final chunk carries only usage (and no choices) when it is requested.
+        if choices := chunk.choices:
+            delta = choices[0].delta
+            if content := delta.content:
+                yield content
+            if tool_calls := getattr(delta, "tool_calls", None):
+                for x in _get_tool_call_deltas(tool_calls):
+                    yield x
+            if reason := choices[0].finish_reason:
+                yield Finish(str(getattr(reason, "value", reason)))
+
+        if (usage := _get_usage(chunk)) is not None:
+            yield usage
+
+
+def _usage_from_dict(usage: dict[str, Any]) -> Usage:
+    cached_tokens = usage.get("prompt_cache_hit_tokens") or (
+        usage.get("prompt_tokens_details") or {}
+    ).get("cached_tokens")
+
+    return Usage(
+        prompt_tokens=usage.get("prompt_tokens") or 0,
+        completion_tokens=usage.get("completion_tokens") or 0,
+        cached_tokens=cached_tokens or 0,
+    )
+
+
+def _get_data(line: bytes) -> bytes | None:
+    if not line.startswith(b"data:"):
+        return None
+
+    data = line[5:].strip()
+
+    return data if data and data != b"[DONE]" else None
+
+
+async def sse_data(chunks: AsyncIterable[bytes]) -> AsyncGenerator[bytes, None]:
+    """Yield the payloads of the `data:` lines of a server-sent event byte stream.
+
+    Comments, other fields and the terminating `[DONE]` are skipped. Each event is
+    expected to carry its payload on a single `data:` line, as OpenAI-compatible
+    APIs do.
+    """
+    # Text after the last newline; a bytearray so that long lines arriving in many
+    # small chunks are not copied over and over.
+    partial = bytearray()
+    async for chunk in chunks:
+        if (end := chunk.rfind(b"\n")) < 0:
+            partial += chunk
+            continue
+
+        lines = chunk[:end]
+        if partial:
+            partial += lines
+            lines = bytes(partial)
+            partial.clear()
+        partial += chunk[end + 1 :]
+
+        for line in lines.split(b"\n"):
+            if (data := _get_data(line)) is not None:
+                yield data
+
+    if (data := _get_data(bytes(partial))) is not None:
+        yield data
+
+
+async def raw_stream_events(chunks: AsyncIterable[bytes]) -> AsyncGenerator:
+    """Like `stream_events`, but parsing the raw SSE bytes of an OpenAI-style stream.
+
+    Payloads are decoded with `json.loads` and read as plain dicts, skipping the
+    validation and model construction the SDK does for every chunk.
+
+    Raises:
+        RuntimeError: If the provider reports an error in the stream.
+    """
+    loads = json.loads
+    async for data in sse_data(chunks):
+        chunk = loads(data)
+        if (error := chunk.get("error")) is not None:
+            message = error.get("message", error) if isinstance(error, dict) else error
+            msg = f"Error in stream: {message}"
+            raise RuntimeError(msg)
+
+        if choices := chunk.get("choices"):
+            choice = choices[0]
+            if delta := choice.get("delta"):
+                if content := delta.get("content"):
+                    yield content
+                for i, call in enumerate(delta.get("tool_calls") or ()):
+                    function = call.get("function") or {}
+                    yield ToolCallDelta(
+                        index=call.get("index", i),
+                        id=call.get("id"),
+                        name=function.get("name"),
+                        arguments=function.get("arguments") or "",
+                    )
+            if reason := choice.get("finish_reason"):
+                yield Finish(reason)
+
+        if usage := chunk.get("usage"):
+            yield _usage_from_dict(usage)
+
+
+@dataclass(frozen=True)
+class ChunkCoalescing:
+    """Merge small text chunks of a stream into fewer, larger ones.
+
+    Buffered text is released once it holds `min_chars` characters or its first
+    chunk is `max_delay` seconds old, whichever comes first, even if no further
+    chunk arrives in the meantime. With `max_delay=None`, no timer is involved.
+
+    Attributes:
+        min_chars (int): Release the buffer once it holds this many characters.
+        max_delay (float | None): Release the buffer once it is this old, in seconds.
+    """
+
+    min_chars: int = 64
+    max_delay: float | None = 0.05
+
+
+_END = object()
+_TIMEOUT = object()
+
+
+async def _read_ahead(events: AsyncIterable, queue: asyncio.Queue) -> None:
+    try:
+        async for event in events:
+            await queue.put(event)
+    except Exception as e:
+        # Stream events are never exceptions, so the error can travel as one.
+        await queue.put(e)
+    else:
+        await queue.put(_END)
+
+
+async def _with_timeouts(
+    events: AsyncIterable,
+    get_deadline: Callable[[], float | None],
+) -> AsyncGenerator:
+    """Yield the events of a stream, and `_TIMEOUT` when none arrives by `get_deadline()`.
+
+    The stream is read ahead into a small queue by a task, so only waits that
+    actually block pay for a timer; the deadline is in `loop.time()` and None
+    waits indefinitely.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+    reader = asyncio.create_task(_read_ahead(events, queue))
+    getter: asyncio.Future | None = None
+    try:
+        while True:
+            if getter is None:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    getter = asyncio.ensure_future(queue.get())
+
+            if getter is not None:
+                if (deadline := get_deadline()) is not None:
+                    done, _ = await asyncio.wait(
+                        (getter,),
+                        timeout=max(0.0, deadline - loop.time()),
+                    )
+                    if not done:
+                        yield _TIMEOUT
+                        continue
+                item = await getter
+                getter = None
+
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        tasks = [x for x in (reader, getter) if x is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def coalesce_chunks(events: AsyncIterable, coalescing: ChunkCoalescing) -> AsyncGenerator:
+    """Apply `coalescing` to the text chunks of an event stream.
+
+    Other events, such as `Usage` and `Finish`, release the buffer and pass through.
+    """
+    min_chars, max_delay = coalescing.min_chars, coalescing.max_delay
+    buffer: list[str] = []
+    size = 0
+    deadline = 0.0
+    timed = None
+    if max_delay is not None:
+        loop = asyncio.get_running_loop()
+        events = timed = _with_timeouts(events, lambda: deadline if buffer else None)
+
+    try:
+        async for event in events:
+            if event is _TIMEOUT:
+                yield "".join(buffer)
+                buffer, size = [], 0
+                continue
+
+            if not isinstance(event, str):
+                if buffer:
+                    yield "".join(buffer)
+                    buffer, size = [], 0
+                yield event
+                continue
+
+            if not buffer and max_delay is not None:
+                deadline = loop.time() + max_delay
+            buffer.append(event)
+            size += len(event)
+            if size >= min_chars:
+                yield "".join(buffer)
+                buffer, size = [], 0
+    finally:
+        # Stops the read-ahead task when the caller closes the stream early.
+        if timed is not None:
+            await timed.aclose()
+
+    if buffer:
+        yield "".join(buffer)
+
+
+async def typed_stream(events: AsyncIterable) -> AsyncGenerator[StreamEvent, None]:
+    async for event in events:
+        if isinstance(event, str):
+            yield TextDelta(event)
+        elif isinstance(event, Response):
+            # Wrappers such as `Router` end with their backend's `Response`.
+            if event.finish_reason is not None:
+                yield Finish(event.finish_reason)
+            if event.usage is not None:
+                yield event.usage
+        else:
+            yield event
+
+
+async def text_stream(events: AsyncIterable) -> AsyncGenerator[str, None]:
+    # `async for` does not close its iterator; streams that are not generators,
+    # such as a router's forwarded stream, would otherwise stay open.
+    try:
+        async for event in events:
+            if isinstance(event, str):
+                yield event
+    finally:
+        if (aclose := getattr(events, "aclose", None)) is not None:
+            await aclose()
+
+
+async def streaming_response(response: Any) -> AsyncGenerator:
+    async for chunk in text_stream(stream_events(response)):
+        yield chunk
@@ -1,14 +1,13 @@
 from collections.abc import AsyncGenerator
-from typing import cast
-
-from together.types import ChatCompletionResponse
 
 from llm_taxi.clients.together import Together as TogetherClient
 from llm_taxi.conversation import Message
-from llm_taxi.llms.openai import streaming_response
+from llm_taxi.llms.base import LLM
+from llm_taxi.llms.streaming import chat_response, stream_events
+from llm_taxi.usage import Response
 
 
-class Together(TogetherClient):
+class Together(TogetherClient, LLM):
     def _convert_messages(self, messages: list[Message]) -> list[dict]:
         return [
             {
@@ -18,28 +17,25 @@ class Together(TogetherClient):
             for message in messages
         ]
 
-    async def streaming_response(
+    async def _streaming_response(
         self,
         messages: list[Message],
         **kwargs,
     ) -> AsyncGenerator:
-        response = await self.client.chat.completions.create(
-            messages=self._convert_messages(messages),
+        response = await self._stream_request(
+            self.client.chat.completions.create,
+            messages=self._get_messages(messages),
             stream=True,
             **self._get_call_kwargs(**kwargs),
         )
 
-        return streaming_response(response)
+        return stream_events(response)
 
-    async def response(self, messages: list[Message], **kwargs) -> str:
-        response = await self.client.chat.completions.create(
-            messages=self._convert_messages(messages),
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
+        response = await self._request(
+            self.client.chat.completions.create,
+            messages=self._get_messages(messages),
             **self._get_call_kwargs(**kwargs),
         )
-        response = cast(ChatCompletionResponse, response)
-
-        if (choices := response.choices) and (data := choices[0]):
-            if (message := data.message) and (content := message.content):
-                return content
 
-        return ""
+        return chat_response(response)
@@ -0,0 +1,185 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+from llm_taxi.instrumentation import Histogram
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatchMetrics:
+    """Batch sizes and queue waits of micro-batched calls, as Prometheus histograms.
+
+    Share one instance between models to aggregate them; series are labelled by
+    provider and model.
+    """
+
+    def __init__(self) -> None:
+        self.batch_size = Histogram(
+            "llm_taxi_micro_batch_size",
+            "Number of calls merged into one upstream request.",
+            (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+        )
+        self.queue_wait = Histogram(
+            "llm_taxi_micro_batch_queue_wait_seconds",
+            "Time a call waited for its batch to be sent.",
+            (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+        )
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def record(self, size: int, waits: list[float], **labels: str) -> None:
+        self.batches += 1
+        self.items += size
+        self.batch_size.observe(size, **labels)
+        self.queue_wait.observe_many(waits, **labels)
+
+    def render(self) -> str:
+        return f"{self.batch_size.render()}\n{self.queue_wait.render()}\n"
+
+
+@dataclass
+class MicroBatchPolicy:
+    """When to send the calls collected by a `MicroBatcher`.
+
+    A batch is sent as soon as it holds `max_batch_size` calls, or `max_wait`
+    seconds after its first call arrived, whichever comes first.
+
+    Attributes:
+        max_batch_size (int): Maximum number of calls per batch.
+        max_wait (float): Maximum seconds a call waits for others to join its batch.
+            With 0, calls made in the same event loop iteration are batched.
+        metrics (MicroBatchMetrics): Where batch sizes and queue waits are recorded.
+    """
+
+    max_batch_size: int = 64
+    max_wait: float = 0.005
+    metrics: MicroBatchMetrics = field(default_factory=MicroBatchMetrics)
+
+    def __post_init__(self) -> None:
+        if self.max_batch_size < 1:
+            msg = "`max_batch_size` must be at least 1"
+            raise ValueError(msg)
+        if self.max_wait < 0:
+            msg = "`max_wait` must not be negative"
+            raise ValueError(msg)
+
+
+class _Queue(Generic[T, R]):
+    __slots__ = ("func", "items", "futures", "enqueued", "timer")
+
+    def __init__(self, func: Callable[[list[T]], Awaitable[list[R]]]) -> None:
+        self.func = func
+        self.items: list[T] = []
+        self.futures: list[asyncio.Future[R]] = []
+        self.enqueued: list[float] = []
+        self.timer: asyncio.Handle | None = None
+
+
+class MicroBatcher(Generic[T, R]):
+    """Merge concurrent single-item calls into batched calls.
+
+    Args:
+        policy (MicroBatchPolicy): When to send a batch.
+        **labels (str): Metric labels, such as provider and model.
+    """
+
+    def __init__(self, policy: MicroBatchPolicy, **labels: str) -> None:
+        self.policy = policy
+        self._labels = labels
+        self._queues: dict[str, _Queue[T, R]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(
+        self,
+        key: str,
+        item: T,
+        func: Callable[[list[T]], Awaitable[list[R]]],
+    ) -> R:
+        """Add `item` to the batch for `key` and wait for its result.
+
+        Args:
+            key (str): Only items with the same key are batched together.
+            item (T): The item to process.
+            func (Callable[[list[T]], Awaitable[list[R]]]): Processes a batch, returning
+                one result per item in order. The function of the first item of a
+                batch is used for the whole batch.
+
+        Returns:
+            R: The result for `item`.
+        """
+        loop = asyncio.get_running_loop()
+        if (queue := self._queues.get(key)) is None:
+            queue = self._queues[key] = _Queue(func)
+            if self.policy.max_wait > 0:
+                queue.timer = loop.call_later(self.policy.max_wait, self._flush, key)
+            else:
+                queue.timer = loop.call_soon(self._flush, key)
+
+        future: asyncio.Future[R] = loop.create_future()
+        queue.items.append(item)
+        queue.futures.append(future)
+        queue.enqueued.append(time.perf_counter())
+        if len(queue.items) >= self.policy.max_batch_size:
+            self._flush(key)
+
+        return await future
+
+    def _flush(self, key: str) -> None:
+        if (queue := self._queues.pop(key, None)) is None:
+            return
+        if queue.timer is not None:
+            queue.timer.cancel()
+
+        now = time.perf_counter()
+        # Callers cancelled while waiting are left out of the batch.
+        live = [i for i, x in enumerate(queue.futures) if not x.done()]
+        if not live:
+            return
+
+        self.policy.metrics.record(
+            len(live),
+            [now - queue.enqueued[i] for i in live],
+            **self._labels,
+        )
+        task = asyncio.create_task(
+            self._run(
+                queue.func,
+                [queue.items[i] for i in live],
+                [queue.futures[i] for i in live],
+            ),
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _run(
+        func: Callable[[list[T]], Awaitable[list[R]]],
+        items: list[T],
+        futures: list[asyncio.Future[R]],
+    ) -> None:
+        try:
+            results = await func(items)
+            if len(results) != len(items):
+                msg = f"Batch of {len(items)} items returned {len(results)} results"
+                raise ValueError(msg)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results, strict=True):
+            if not future.done():
+                future.set_result(result)
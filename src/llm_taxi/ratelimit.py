@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from llm_taxi.concurrency import LoopLocal
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Client-side request and token budgets for one API key.
+
+    Attributes:
+        requests_per_minute (int | None): Maximum requests per minute, or None for no limit.
+        tokens_per_minute (int | None): Maximum prompt plus completion tokens per minute, or None for no limit.
+    """
+
+    requests_per_minute: int | None = None
+    tokens_per_minute: int | None = None
+
+
+class TokenBucket:
+    """A continuously refilling token bucket.
+
+    The bucket may go into debt when a request turns out to use more tokens than
+    estimated; later requests then wait until the debt is paid back.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0) -> None:
+        self._capacity = capacity
+        self._rate = capacity / period
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    @property
+    def capacity(self) -> float:
+        return self._capacity
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._updated) * self._rate,
+        )
+        self._updated = now
+
+    async def take(self, amount: float) -> None:
+        # A single request larger than the bucket can never fit; let it through
+        # once the bucket is full rather than waiting forever.
+        amount = min(amount, self._capacity)
+        while (available := self.tokens) < amount:
+            await asyncio.sleep((amount - available) / self._rate)
+
+        self._tokens -= amount
+
+    def give(self, amount: float) -> None:
+        self._refill()
+        self._tokens = min(self._capacity, self._tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter.
+
+    Waiters are served in arrival order: acquisition is serialized through an
+    `asyncio.Lock`, which wakes waiters first-in first-out, so a large request is
+    not starved by a stream of small ones. Limiters are shared process-wide, so the
+    lock is kept per event loop while the budgets are shared by all of them.
+    """
+
+    def __init__(self, limit: RateLimit) -> None:
+        self._limit = limit
+        self._requests = (
+            TokenBucket(limit.requests_per_minute)
+            if limit.requests_per_minute
+            else None
+        )
+        self._tokens = (
+            TokenBucket(limit.tokens_per_minute) if limit.tokens_per_minute else None
+        )
+        self._lock = LoopLocal(asyncio.Lock)
+
+    @property
+    def limit(self) -> RateLimit:
+        return self._limit
+
+    async def acquire(self, tokens: int = 0) -> None:
+        async with self._lock.get():
+            if self._requests is not None:
+                await self._requests.take(1)
+            if self._tokens is not None and tokens:
+                await self._tokens.take(tokens)
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token budget once the real usage of a request is known."""
+        if self._tokens is not None:
+            self._tokens.give(estimated - actual)
+
+
+_rate_limiters: dict[tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(provider: str, api_key: str, limit: RateLimit) -> RateLimiter:
+    """Return the limiter shared by every client of `provider` using `api_key`.
+
+    The first limit registered for a key wins; pass a `RateLimiter` to the client
+    directly to use a different one.
+    """
+    key = (provider, hashlib.sha256(api_key.encode()).hexdigest())
+    if (limiter := _rate_limiters.get(key)) is None:
+        limiter = _rate_limiters[key] = RateLimiter(limit)
+
+    return limiter
+
+
+def _count_chars(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value)
+
+    if isinstance(value, Mapping):
+        return sum(_count_chars(x) for x in value.values())
+
+    if isinstance(value, list | tuple):
+        return sum(_count_chars(x) for x in value)
+
+    if hasattr(value, "model_dump"):
+        return _count_chars(value.model_dump())
+
+    return 0
+
+
+def estimate_tokens(*args, **kwargs) -> int:
+    """Roughly estimate the tokens a request consumes from its call arguments.
+
+    Counts about four characters per prompt token plus the requested completion
+    budget, which is how providers charge rate limits up front.
+    """
+    prompt_tokens = _count_chars(args) + _count_chars(kwargs)
+    completion_tokens = kwargs.get("max_tokens") or kwargs.get("max_output_tokens") or 0
+
+    return prompt_tokens // 4 + 1 + int(completion_tokens)
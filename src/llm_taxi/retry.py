@@ -0,0 +1,209 @@
+import asyncio
+import email.utils
+import random
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+
+# Transient network failures across the vendor SDKs, matched by class name so that
+# none of the SDKs has to be imported to classify an error.
+RETRYABLE_ERROR_NAMES = frozenset(
+    {
+        "APIConnectionError",
+        "APITimeoutError",
+        "ConnectError",
+        "ConnectTimeout",
+        "ReadError",
+        "ReadTimeout",
+        "RemoteProtocolError",
+        "MistralConnectionException",
+        "ServiceUnavailableError",
+        "Timeout",
+        "ServiceUnavailable",
+        "DeadlineExceeded",
+        "ResourceExhausted",
+        "InternalServerError",
+    },
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Attributes:
+        max_attempts (int): Maximum number of attempts, including the first one.
+        initial_delay (float): Base delay in seconds before the first retry.
+        max_delay (float): Upper bound of a single delay in seconds.
+        multiplier (float): Growth factor of the delay between attempts.
+        jitter (bool): Draw each delay uniformly from `[0, delay]` to spread out retries.
+        deadline (float | None): Total time budget in seconds across all attempts, or None for no budget.
+        retryable_status_codes (frozenset[int]): HTTP status codes that are worth retrying.
+    """
+
+    max_attempts: int = 3
+    initial_delay: float = 0.5
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: bool = True
+    deadline: float | None = 60.0
+    retryable_status_codes: frozenset[int] = RETRYABLE_STATUS_CODES
+
+    def get_delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.initial_delay * self.multiplier**attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+
+        return delay
+
+
+def get_status_code(error: BaseException) -> int | None:
+    for attr in ("status_code", "http_status", "code"):
+        if isinstance(value := getattr(error, attr, None), int):
+            return value
+
+    if (response := getattr(error, "response", None)) is not None:
+        if isinstance(value := getattr(response, "status_code", None), int):
+            return value
+
+    return None
+
+
+def _get_headers(error: BaseException) -> Mapping[str, str] | None:
+    if (response := getattr(error, "response", None)) is not None:
+        if (headers := getattr(response, "headers", None)) is not None:
+            return headers
+
+    if isinstance(headers := getattr(error, "headers", None), Mapping):
+        return headers
+
+    return None
+
+
+def get_retry_after(error: BaseException) -> float | None:
+    """Return the server-requested delay in seconds, if any."""
+    if (headers := _get_headers(error)) is None:
+        return None
+
+    try:
+        if (value := headers.get("retry-after-ms")) is not None:
+            return float(value) / 1000
+        if (value := headers.get("retry-after")) is None:
+            return None
+        return float(value)
+    except ValueError:
+        pass
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, date.timestamp() - time.time())
+
+
+def is_retryable(error: BaseException, policy: RetryPolicy) -> bool:
+    if isinstance(error, asyncio.TimeoutError | TimeoutError | ConnectionError):
+        return True
+
+    if (status_code := get_status_code(error)) is not None and status_code >= 100:
+        return status_code in policy.retryable_status_codes
+
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+async def call_with_retry(
+    func: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+) -> T:
+    """Call `func` until it succeeds, a fatal error occurs or the budget runs out.
+
+    Args:
+        func (Callable[[], Awaitable[T]]): A factory for the awaitable to retry.
+        policy (RetryPolicy): The retry policy.
+
+    Returns:
+        T: The result of the first successful attempt.
+
+    Raises:
+        TimeoutError: If the deadline expires during an attempt.
+        Exception: The last error if it is fatal or no attempts are left.
+    """
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        remaining = (
+            None if policy.deadline is None else policy.deadline - (time.monotonic() - start)
+        )
+        try:
+            if remaining is None:
+                return await func()
+            return await asyncio.wait_for(func(), timeout=max(remaining, 0))
+        except Exception as e:
+            attempt += 1
+            if attempt >= policy.max_attempts or not is_retryable(e, policy):
+                raise
+
+            delay = policy.get_delay(attempt - 1)
+            if (retry_after := get_retry_after(e)) is not None:
+                delay = max(delay, retry_after)
+
+            if policy.deadline is not None:
+                elapsed = time.monotonic() - start
+                if elapsed + delay >= policy.deadline:
+                    raise
+
+            await asyncio.sleep(delay)
+
+
+class _Primed:
+    """An async stream whose first item has been fetched already.
+
+    Closing it closes the underlying iterator, even before iteration has started,
+    which an async generator wrapping the iterator would not do.
+    """
+
+    def __init__(self, first: Any, iterator: Any) -> None:
+        self._first = first
+        self._iterator = iterator
+        self._started = False
+
+    def __aiter__(self) -> "_Primed":
+        return self
+
+    async def __anext__(self) -> Any:
+        if not self._started:
+            self._started = True
+            first, self._first = self._first, None
+            return first
+
+        return await anext(self._iterator)
+
+    async def aclose(self) -> None:
+        if (aclose := getattr(self._iterator, "aclose", None)) is not None:
+            await aclose()
+
+
+async def _empty():
+    return
+    yield
+
+
+async def prime_stream(stream: Any):
+    """Fetch the first item of an async stream and return an equivalent stream.
+
+    Used inside a retried call so that failures before anything has been yielded
+    to the caller are retried like any other request.
+    """
+    iterator = aiter(stream)
+    try:
+        first = await anext(iterator)
+    except StopAsyncIteration:
+        return _empty()
+
+    return _Primed(first, iterator)
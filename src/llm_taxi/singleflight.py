@@ -0,0 +1,204 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[T]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class _Broadcast:
+    """One upstream stream replayed to any number of subscribers."""
+
+    def __init__(self, open_stream: Callable[[], Awaitable[AsyncIterator]]) -> None:
+        self.chunks: list[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.opened: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._run(open_stream))
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _run(self, open_stream: Callable[[], Awaitable[AsyncIterator]]) -> None:
+        # Errors are handed to the subscribers rather than raised from the task.
+        try:
+            stream = await open_stream()
+        except asyncio.CancelledError:
+            self.done = True
+            self.opened.cancel()
+            raise
+        except Exception as e:
+            self.done = True
+            self.opened.set_exception(e)
+            return
+
+        self.opened.set_result(None)
+        try:
+            async for chunk in stream:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+            if (aclose := getattr(stream, "aclose", None)) is not None:
+                with contextlib.suppress(Exception):
+                    await aclose()
+
+    async def subscribe(self) -> AsyncGenerator:
+        index = 0
+        while True:
+            if index < len(self.chunks):
+                index += 1
+                yield self.chunks[index - 1]
+                continue
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class _Subscription:
+    """A subscriber's view of a `_Broadcast`.
+
+    The subscriber leaves the broadcast once its view ends, fails, is closed or is
+    garbage collected, so one that is never iterated does not keep it open.
+    """
+
+    __slots__ = ("_chunks", "_leave")
+
+    def __init__(self, chunks: AsyncGenerator, leave: Callable[[], None]) -> None:
+        self._chunks = chunks
+        self._leave: Callable[[], None] | None = leave
+
+    def _release(self) -> None:
+        if (leave := self._leave) is not None:
+            self._leave = None
+            leave()
+
+    def __aiter__(self) -> "_Subscription":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await anext(self._chunks)
+        except BaseException:
+            self._release()
+            raise
+
+    async def aclose(self) -> None:
+        self._release()
+        await self._chunks.aclose()
+
+    def __del__(self) -> None:
+        # Cancelling the upstream task fails once its event loop is closed.
+        with contextlib.suppress(RuntimeError):
+            self._release()
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers making the same request.
+
+    Results are shared only while the call is in flight; later calls start afresh.
+    When every caller waiting for a call has been cancelled (or, for streams, has
+    closed its stream), the upstream call is cancelled too.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call] = {}
+        self._streams: dict[str, _Broadcast] = {}
+        self.coalesced = 0
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[T]],
+        copy: Callable[[T], T] | None = None,
+    ) -> T:
+        """Await `func()`, or the identical call already in flight for `key`.
+
+        Args:
+            key (str): Identifies the request.
+            func (Callable[[], Awaitable[T]]): Makes the call.
+            copy (Callable[[T], T] | None, optional): Copies the result for callers that
+                joined an existing call, for mutable results. Defaults to None.
+
+        Returns:
+            T: The result of the call.
+        """
+        if (call := self._calls.get(key)) is None:
+            leader = True
+            call = self._calls[key] = _Call(asyncio.create_task(func()))
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+        else:
+            leader = False
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+                self._forget(self._calls, key, call)
+
+        return result if leader or copy is None else copy(result)
+
+    async def stream(
+        self,
+        key: str,
+        open_stream: Callable[[], Awaitable[AsyncIterator]],
+    ) -> AsyncIterator:
+        """Subscribe to the upstream stream for `key`, opening it if none is in flight.
+
+        Subscribers joining late first receive the chunks already produced.
+
+        Args:
+            key (str): Identifies the request.
+            open_stream (Callable[[], Awaitable[AsyncIterator]]): Opens the upstream stream.
+
+        Returns:
+            AsyncIterator: This subscriber's view of the stream, which holds the
+                upstream stream open until it ends or is closed.
+        """
+        if (broadcast := self._streams.get(key)) is None or broadcast.done:
+            broadcast = self._streams[key] = _Broadcast(open_stream)
+            broadcast.task.add_done_callback(
+                lambda _: self._forget(self._streams, key, broadcast),
+            )
+        else:
+            self.coalesced += 1
+
+        def leave() -> None:
+            broadcast.subscribers -= 1
+            if not broadcast.subscribers and not broadcast.done:
+                broadcast.task.cancel()
+                self._forget(self._streams, key, broadcast)
+
+        broadcast.subscribers += 1
+        try:
+            await asyncio.shield(broadcast.opened)
+        except BaseException:
+            leave()
+            raise
+
+        return _Subscription(broadcast.subscribe(), leave)
+
+    @staticmethod
+    def _forget(calls: dict[str, Any], key: str, call: Any) -> None:
+        if calls.get(key) is call:
+            del calls[key]
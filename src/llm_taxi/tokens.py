@@ -0,0 +1,304 @@
+import abc
+import functools
+import re
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from enum import Enum
+
+from llm_taxi.conversation import Message, Role
+
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+class Tokenizer(abc.ABC):
+    """Count the tokens of texts and messages for one model.
+
+    Attributes:
+        name (str): Identifies the tokenizer in the per-message count cache.
+        message_overhead (int): Tokens added per message for role and separators.
+        request_overhead (int): Tokens added once per request, e.g. to prime the reply.
+    """
+
+    name: str
+    message_overhead: int = 4
+    request_overhead: int = 3
+
+    @abc.abstractmethod
+    def count(self, text: str) -> int:
+        raise NotImplementedError
+
+    def count_message(self, message: Message) -> int:
+        # Counts are kept on the message itself, so a growing history only
+        # tokenizes the new turns.
+        counts = message._token_counts
+        if counts is not None and (tokens := counts.get(self.name)) is not None:
+            return tokens
+
+        tokens = self.count(message.content) + self.message_overhead
+        if counts is None:
+            counts = {}
+            # Messages are frozen; the cache is the only field filled in later.
+            object.__setattr__(message, "_token_counts", counts)
+        counts[self.name] = tokens
+
+        return tokens
+
+    def count_messages(self, messages: Sequence[Message]) -> int:
+        return sum(map(self.count_message, messages)) + self.request_overhead
+
+
+class HeuristicTokenizer(Tokenizer):
+    """Estimate tokens from character counts.
+
+    Args:
+        chars_per_token (float, optional): Average characters per token of alphabetic text. Defaults to 4.0.
+        tokens_per_cjk_char (float, optional): Tokens per Chinese, Japanese or Korean character. Defaults to 1.0.
+    """
+
+    def __init__(
+        self,
+        chars_per_token: float = 4.0,
+        tokens_per_cjk_char: float = 1.0,
+    ) -> None:
+        self.chars_per_token = chars_per_token
+        self.tokens_per_cjk_char = tokens_per_cjk_char
+        self.name = f"heuristic:{chars_per_token}:{tokens_per_cjk_char}"
+
+    def count(self, text: str) -> int:
+        cjk = len(_CJK.findall(text)) if not text.isascii() else 0
+        tokens = (len(text) - cjk) / self.chars_per_token + cjk * self.tokens_per_cjk_char
+
+        return int(tokens) + 1
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact token counts for OpenAI models, computed offline with `tiktoken`."""
+
+    def __init__(self, model: str) -> None:
+        try:
+            import tiktoken
+        except ImportError as e:
+            msg = "tiktoken is required for exact token counts: `pip install llm-taxi[tokenizers]`"
+            raise ImportError(msg) from e
+
+        try:
+            self._encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self._encoding = tiktoken.get_encoding("cl100k_base")
+        self.name = f"tiktoken:{self._encoding.name}"
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+# Average characters per token of English text, measured against each
+# provider's own token counts.
+CHARS_PER_TOKEN: dict[str, float] = {
+    "openai": 4.0,
+    "anthropic": 3.5,
+    "google": 4.0,
+    "mistral": 3.5,
+    "groq": 3.8,
+    "together": 3.8,
+    "deepseek": 3.5,
+    "dashscope": 3.5,
+    "bigmodel": 3.5,
+}
+
+CONTEXT_WINDOWS: dict[str, dict[str, int]] = {
+    "openai": {
+        "gpt-4o": 128_000,
+        "gpt-4-turbo": 128_000,
+        "gpt-4-1106": 128_000,
+        "gpt-4-0125": 128_000,
+        "gpt-4-32k": 32_768,
+        "gpt-4": 8_192,
+        "gpt-3.5-turbo": 16_385,
+    },
+    "anthropic": {
+        "claude-3": 200_000,
+        "claude-2.1": 200_000,
+        "claude-2": 100_000,
+    },
+    "google": {
+        "gemini-1.5-pro": 2_097_152,
+        "gemini-1.5-flash": 1_048_576,
+        "gemini-1.0-pro": 30_720,
+        "gemini-pro": 30_720,
+    },
+    "mistral": {
+        "mistral-large": 32_000,
+        "mistral-medium": 32_000,
+        "mistral-small": 32_000,
+        "open-mistral-7b": 32_000,
+        "open-mixtral-8x7b": 32_000,
+        "open-mixtral-8x22b": 64_000,
+    },
+    "deepseek": {
+        "deepseek-chat": 32_768,
+        "deepseek-coder": 32_768,
+    },
+    "groq": {
+        "llama3-8b-8192": 8_192,
+        "llama3-70b-8192": 8_192,
+        "mixtral-8x7b-32768": 32_768,
+        "gemma-7b-it": 8_192,
+    },
+}
+
+_TOKENIZERS: dict[tuple[str, str], Callable[[str], Tokenizer]] = {}
+
+
+def _match(table: dict[str, int], model: str) -> int | None:
+    if (value := table.get(model)) is not None:
+        return value
+
+    prefixes = [x for x in table if model.startswith(x)]
+
+    return table[max(prefixes, key=len)] if prefixes else None
+
+
+def register_tokenizer(
+    provider: str,
+    model: str,
+    factory: Callable[[str], Tokenizer],
+) -> None:
+    """Use `factory(model)` to count tokens of `model` (or models starting with it)."""
+    _TOKENIZERS[provider, model] = factory
+    get_tokenizer.cache_clear()
+
+
+@functools.cache
+def get_tokenizer(provider: str, model: str) -> Tokenizer:
+    """Return the most accurate tokenizer available offline for a model."""
+    factories = [
+        (name, factory)
+        for (p, name), factory in _TOKENIZERS.items()
+        if p == provider and model.startswith(name)
+    ]
+    if factories:
+        _, factory = max(factories, key=lambda x: len(x[0]))
+        return factory(model)
+
+    if provider == "openai":
+        try:
+            return TiktokenTokenizer(model)
+        except ImportError:
+            pass
+
+    return HeuristicTokenizer(CHARS_PER_TOKEN.get(provider, 4.0))
+
+
+def get_context_window(provider: str, model: str) -> int | None:
+    return _match(CONTEXT_WINDOWS.get(provider, {}), model)
+
+
+class ContextWindowExceededError(ValueError):
+    def __init__(self, tokens: int, limit: int) -> None:
+        super().__init__(f"Conversation needs about {tokens} tokens but only {limit} fit")
+        self.tokens = tokens
+        self.limit = limit
+
+
+class Overflow(Enum):
+    Reject = "reject"
+    Truncate = "truncate"
+    Summarize = "summarize"
+
+
+@dataclass
+class ContextPolicy:
+    """What to do with conversations that do not fit the model's context window.
+
+    Attributes:
+        overflow (Overflow): Raise `ContextWindowExceededError`, drop the oldest turns,
+            or replace them with a summary from `summarizer`.
+        context_window (int | None): Overrides the known context window of the model.
+        reserve_tokens (int | None): Tokens kept free for the reply. Defaults to the
+            request's `max_tokens`, or the provider's default completion budget.
+        summarizer (Callable | None): Turns the dropped messages into a summary,
+            required for `Overflow.Summarize`.
+    """
+
+    overflow: Overflow = Overflow.Reject
+    context_window: int | None = None
+    reserve_tokens: int | None = None
+    summarizer: Callable[[list[Message]], Awaitable[str]] | None = None
+
+    def __post_init__(self) -> None:
+        if self.overflow == Overflow.Summarize and self.summarizer is None:
+            msg = "`Overflow.Summarize` requires a `summarizer`"
+            raise ValueError(msg)
+
+
+def _turns(messages: list[Message], start: int) -> list[list[int]]:
+    # Turns open with the role that follows the kept prefix, so dropping whole
+    # turns leaves the remaining roles alternating as before.
+    turns: list[list[int]] = []
+    first_role = None
+    for i in range(start, len(messages)):
+        if (role := messages[i].role) == Role.System:
+            continue
+        if first_role is None:
+            first_role = role
+        if role == first_role or not turns:
+            turns.append([])
+        turns[-1].append(i)
+
+    return turns
+
+
+async def fit_messages(
+    messages: list[Message],
+    tokenizer: Tokenizer,
+    limit: int,
+    policy: ContextPolicy,
+) -> list[Message]:
+    """Make `messages` fit in `limit` tokens according to `policy`.
+
+    System messages, the last message and the prefix up to the last message marked
+    for caching are always kept, so that provider prompt caches keep matching; other
+    messages are dropped a whole turn at a time, oldest first. A summary goes into
+    the first user message kept after the dropped turns.
+
+    Raises:
+        ContextWindowExceededError: If the messages do not fit and cannot be shortened.
+    """
+    if (tokens := tokenizer.count_messages(messages)) <= limit:
+        return messages
+    if policy.overflow == Overflow.Reject:
+        raise ContextWindowExceededError(tokens, limit)
+
+    *history, last = messages
+    pinned = max((i for i, x in enumerate(history) if x.cache), default=-1)
+    dropped: list[int] = []
+    for turn in _turns(history, pinned + 1):
+        if tokens <= limit:
+            break
+        dropped += turn
+        tokens -= sum(tokenizer.count_message(history[i]) for i in turn)
+
+    kept = set(range(len(history))).difference(dropped)
+    fitted = [*(x for i, x in enumerate(history) if i in kept), last]
+    if dropped and policy.overflow == Overflow.Summarize:
+        summary = await policy.summarizer([history[i] for i in dropped])
+        summary = f"Summary of the earlier conversation:\n{summary}"
+        # Everything before the first dropped message was kept. The summary is
+        # user content rather than a system message, which some providers would
+        # take for (or merge into) the system prompt.
+        index = dropped[0]
+        user = next((i for i in range(index, len(fitted)) if fitted[i].role == Role.User), None)
+        if user is None:
+            fitted.insert(index, Message(role=Role.User, content=summary))
+        else:
+            message = fitted[user]
+            fitted[user] = Message(
+                role=Role.User,
+                content=f"{summary}\n\n{message.content}",
+                cache=message.cache,
+            )
+
+    if (tokens := tokenizer.count_messages(fitted)) > limit:
+        raise ContextWindowExceededError(tokens, limit)
+
+    return fitted
@@ -0,0 +1,418 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Usage:
+    """Token counts of a request.
+
+    Attributes:
+        prompt_tokens (int): All prompt tokens, including those read from or written to the prompt cache.
+        completion_tokens (int): Generated tokens.
+        cached_tokens (int): Prompt tokens served from the provider's prompt cache.
+        cache_write_tokens (int): Prompt tokens written to the provider's prompt cache.
+    """
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def __add__(self, other: "Usage") -> "Usage":
+        return Usage(
+            prompt_tokens=self.prompt_tokens + other.prompt_tokens,
+            completion_tokens=self.completion_tokens + other.completion_tokens,
+            cached_tokens=self.cached_tokens + other.cached_tokens,
+            cache_write_tokens=self.cache_write_tokens + other.cache_write_tokens,
+        )
+
+
+@dataclass(frozen=True)
+class Finish:
+    """Why generation stopped, as reported by the provider (e.g. "stop", "length")."""
+
+    reason: str | None
+
+
+@dataclass(frozen=True)
+class TextDelta:
+    """A chunk of generated text."""
+
+    text: str
+
+
+@dataclass(frozen=True)
+class ToolCallDelta:
+    """A fragment of a tool call being streamed.
+
+    The first fragment of a call carries its `id` (if the provider assigns one) and
+    `name`; the `arguments` of all fragments with the same `index` concatenate to
+    the JSON arguments of the call.
+
+    Attributes:
+        index (int): Identifies the call within the response.
+        id (str | None): The provider's ID of the call.
+        name (str | None): The name of the called tool.
+        arguments (str): The next piece of the JSON arguments.
+    """
+
+    index: int
+    id: str | None = None
+    name: str | None = None
+    arguments: str = ""
+
+
+@dataclass
+class ToolCall:
+    """A tool call requested by the model.
+
+    Attributes:
+        id (str | None): The provider's ID of the call, to be referenced in the tool result.
+        name (str): The name of the called tool.
+        arguments (str): The arguments as a JSON document.
+    """
+
+    id: str | None
+    name: str
+    arguments: str
+
+    def parse_arguments(self) -> Any:
+        return json.loads(self.arguments) if self.arguments else {}
+
+
+# What `LLM.streaming_events` yields.
+StreamEvent = TextDelta | ToolCallDelta | Finish | Usage
+
+
+@dataclass
+class Response:
+    """A completion together with its metadata.
+
+    Attributes:
+        content (str): The generated text.
+        usage (Usage | None): Token usage, if reported by the provider.
+        finish_reason (str | None): Why generation stopped, if reported by the provider.
+        provider (str | None): The provider that served the request.
+        model (str | None): The requested model.
+        latency (float | None): Seconds from sending the request to the end of the response.
+        cost (float | None): Cost in USD according to the price table, if the model is priced.
+        cached (bool): Whether the response was served from the response cache.
+        tool_calls (list[ToolCall]): Tool calls requested by the model.
+    """
+
+    content: str
+    usage: Usage | None = None
+    finish_reason: str | None = None
+    provider: str | None = None
+    model: str | None = None
+    latency: float | None = None
+    cost: float | None = None
+    cached: bool = False
+    tool_calls: list[ToolCall] = field(default_factory=list)
+
+
+class StreamingResponse:
+    """A stream of text chunks that assembles a `Response` as it is consumed.
+
+    Iterate over it like the stream returned by `LLM.streaming_response`, or over
+    `typed_events()` to also receive tool calls, the finish reason and usage as they
+    arrive. Once it is exhausted, `response` holds the full content along with tool
+    calls, usage, finish reason, latency and cost.
+    """
+
+    def __init__(
+        self,
+        events: AsyncIterator,
+        *,
+        provider: str | None = None,
+        model: str | None = None,
+        start: float | None = None,
+        cached: bool = False,
+    ) -> None:
+        self._events = events
+        self._provider = provider
+        self._model = model
+        self._start = time.perf_counter() if start is None else start
+        self._cached = cached
+        self._chunks: list[str] = []
+        self._usage: Usage | None = None
+        self._finish_reason: str | None = None
+        self._tool_calls: dict[int, list] = {}
+        self._response: Response | None = None
+
+    @property
+    def response(self) -> Response:
+        if self._response is None:
+            msg = "The response is only available once the stream has been consumed"
+            raise RuntimeError(msg)
+
+        return self._response
+
+    def __aiter__(self) -> "StreamingResponse":
+        return self
+
+    async def __anext__(self) -> str:
+        while True:
+            event = await self._next()
+            if isinstance(event, str):
+                return event
+
+    async def _next(self) -> str | ToolCallDelta | Finish | Usage:
+        """Return the next text chunk or event, recording it for the `Response`."""
+        while True:
+            try:
+                event = await anext(self._events)
+            except StopAsyncIteration:
+                self._finish()
+                raise
+
+            if isinstance(event, str):
+                self._chunks.append(event)
+                return event
+            if isinstance(event, ToolCallDelta):
+                self._add_tool_call_delta(event)
+                return event
+            if isinstance(event, Usage):
+                self._usage = event
+                return event
+            if isinstance(event, Finish):
+                self._finish_reason = event.reason
+                return event
+            if isinstance(event, Response):
+                # Wrappers such as `Router` forward the response of the backend they
+                # used; its tool calls were forwarded as deltas already.
+                self._provider = event.provider
+                self._model = event.model
+                self._usage = event.usage
+                self._finish_reason = event.finish_reason
+
+    async def typed_events(self) -> AsyncIterator[StreamEvent]:
+        """Yield text deltas, tool call deltas, the finish reason and usage as they arrive."""
+        while True:
+            try:
+                event = await self._next()
+            except StopAsyncIteration:
+                return
+
+            yield TextDelta(event) if isinstance(event, str) else event
+
+    async def events(self) -> AsyncIterator:
+        """Yield the text chunks and tool call deltas followed by the assembled `Response`.
+
+        Used by wrappers such as `Router` to forward a backend's stream with its usage.
+        Closing the generator closes this stream too.
+        """
+        try:
+            while True:
+                try:
+                    event = await self._next()
+                except StopAsyncIteration:
+                    break
+
+                if isinstance(event, str | ToolCallDelta):
+                    yield event
+
+            yield self.response
+        finally:
+            await self.aclose()
+
+    def _add_tool_call_delta(self, delta: ToolCallDelta) -> None:
+        if (call := self._tool_calls.get(delta.index)) is None:
+            call = self._tool_calls[delta.index] = [delta.id, delta.name, []]
+        else:
+            call[0] = call[0] or delta.id
+            call[1] = call[1] or delta.name
+        if delta.arguments:
+            call[2].append(delta.arguments)
+
+    async def aclose(self) -> None:
+        if (aclose := getattr(self._events, "aclose", None)) is not None:
+            await aclose()
+
+    def _finish(self) -> None:
+        if self._response is not None:
+            return
+
+        self._response = Response(
+            content="".join(self._chunks),
+            usage=self._usage,
+            finish_reason=self._finish_reason,
+            provider=self._provider,
+            model=self._model,
+            latency=time.perf_counter() - self._start,
+            cost=get_cost(self._provider, self._model, self._usage),
+            cached=self._cached,
+            tool_calls=[
+                ToolCall(id=id_, name=name or "", arguments="".join(arguments))
+                for _, (id_, name, arguments) in sorted(self._tool_calls.items())
+            ],
+        )
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """USD per million prompt and completion tokens.
+
+    Prompt tokens read from or written to the prompt cache are charged at `prompt`
+    unless `cached_prompt` or `cache_write` are given.
+    """
+
+    prompt: float
+    completion: float
+    cached_prompt: float | None = None
+    cache_write: float | None = None
+
+    def get_cost(self, usage: Usage) -> float:
+        cached_prompt = self.prompt if self.cached_prompt is None else self.cached_prompt
+        cache_write = self.prompt if self.cache_write is None else self.cache_write
+        uncached = usage.prompt_tokens - usage.cached_tokens - usage.cache_write_tokens
+
+        return (
+            uncached * self.prompt
+            + usage.cached_tokens * cached_prompt
+            + usage.cache_write_tokens * cache_write
+            + usage.completion_tokens * self.completion
+        ) / 1_000_000
+
+
+# Published list prices; model names match by longest prefix so that dated
+# snapshots (e.g. "gpt-4o-2024-05-13") inherit the price of their family.
+PRICES: dict[str, dict[str, ModelPrice]] = {
+    "openai": {
+        "gpt-4o": ModelPrice(5.0, 15.0, cached_prompt=2.5),
+        "gpt-4o-mini": ModelPrice(0.15, 0.6, cached_prompt=0.075),
+        "gpt-4-turbo": ModelPrice(10.0, 30.0),
+        "gpt-4": ModelPrice(30.0, 60.0),
+        "gpt-3.5-turbo": ModelPrice(0.5, 1.5),
+    },
+    "anthropic": {
+        "claude-3-opus": ModelPrice(15.0, 75.0, cached_prompt=1.5, cache_write=18.75),
+        "claude-3-sonnet": ModelPrice(3.0, 15.0),
+        "claude-3-5-sonnet": ModelPrice(3.0, 15.0, cached_prompt=0.3, cache_write=3.75),
+        "claude-3-haiku": ModelPrice(0.25, 1.25, cached_prompt=0.03, cache_write=0.3),
+    },
+    "google": {
+        "gemini-1.5-pro": ModelPrice(3.5, 10.5),
+        "gemini-1.5-flash": ModelPrice(0.35, 1.05),
+        "gemini-1.0-pro": ModelPrice(0.5, 1.5),
+        "gemini-pro": ModelPrice(0.5, 1.5),
+    },
+    "mistral": {
+        "mistral-large": ModelPrice(4.0, 12.0),
+        "mistral-medium": ModelPrice(2.7, 8.1),
+        "mistral-small": ModelPrice(1.0, 3.0),
+        "open-mistral-7b": ModelPrice(0.25, 0.25),
+        "open-mixtral-8x7b": ModelPrice(0.7, 0.7),
+        "open-mixtral-8x22b": ModelPrice(2.0, 6.0),
+    },
+    "deepseek": {
+        "deepseek-chat": ModelPrice(0.14, 0.28, cached_prompt=0.014),
+        "deepseek-coder": ModelPrice(0.14, 0.28, cached_prompt=0.014),
+    },
+    "groq": {
+        "llama3-8b-8192": ModelPrice(0.05, 0.08),
+        "llama3-70b-8192": ModelPrice(0.59, 0.79),
+        "mixtral-8x7b-32768": ModelPrice(0.24, 0.24),
+        "gemma-7b-it": ModelPrice(0.07, 0.07),
+    },
+}
+
+
+def set_price(provider: str, model: str, price: ModelPrice) -> None:
+    PRICES.setdefault(provider, {})[model] = price
+
+
+def get_price(provider: str | None, model: str | None) -> ModelPrice | None:
+    if provider is None or model is None:
+        return None
+
+    prices = PRICES.get(provider, {})
+    if (price := prices.get(model)) is not None:
+        return price
+
+    prefixes = [x for x in prices if model.startswith(x)]
+
+    return prices[max(prefixes, key=len)] if prefixes else None
+
+
+def get_cost(provider: str | None, model: str | None, usage: Usage | None) -> float | None:
+    if usage is None or (price := get_price(provider, model)) is None:
+        return None
+
+    return price.get_cost(usage)
+
+
+@dataclass
+class UsageTotals:
+    requests: int = 0
+    usage: Usage = field(default_factory=Usage)
+    cost: float = 0.0
+
+
+class UsageAggregator:
+    """Roll up token usage and cost per model, per API key and per tenant."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_model: defaultdict[str, UsageTotals] = defaultdict(UsageTotals)
+        self._by_key: defaultdict[str, UsageTotals] = defaultdict(UsageTotals)
+        self._by_tenant: defaultdict[str, UsageTotals] = defaultdict(UsageTotals)
+
+    def record(
+        self,
+        response: Response,
+        *,
+        key: str | None = None,
+        tenant: str | None = None,
+    ) -> None:
+        """Add a response to the totals.
+
+        Args:
+            response (Response): The response to account for.
+            key (str | None, optional): An identifier of the API key used, e.g. its name. Defaults to None.
+            tenant (str | None, optional): The tenant the request was made for. Defaults to None.
+        """
+        if response.cached:
+            return
+
+        groups = [(self._by_model, f"{response.provider}:{response.model}")]
+        if key is not None:
+            groups.append((self._by_key, key))
+        if tenant is not None:
+            groups.append((self._by_tenant, tenant))
+
+        with self._lock:
+            for totals, name in groups:
+                item = totals[name]
+                item.requests += 1
+                if response.usage is not None:
+                    item.usage += response.usage
+                if response.cost is not None:
+                    item.cost += response.cost
+
+    def by_model(self) -> dict[str, UsageTotals]:
+        with self._lock:
+            return dict(self._by_model)
+
+    def by_key(self) -> dict[str, UsageTotals]:
+        with self._lock:
+            return dict(self._by_key)
+
+    def by_tenant(self) -> dict[str, UsageTotals]:
+        with self._lock:
+            return dict(self._by_tenant)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_model.clear()
+            self._by_key.clear()
+            self._by_tenant.clear()
@@ -0,0 +1,13 @@
+import pytest
+from fake_server import FakeServer, Profile
+
+from llm_taxi.clients.transport import aclose_transports
+
+
+@pytest.fixture
+async def server():
+    """A fake provider server on a free local port; adjust `server.profile` as needed."""
+    async with FakeServer(Profile(completion_tokens=8, seed=0)) as server:
+        yield server
+
+    await aclose_transports()
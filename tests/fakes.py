@@ -0,0 +1,124 @@
+import asyncio
+from collections.abc import AsyncGenerator, Sequence
+from typing import ClassVar
+
+from llm_taxi.cache import EmbeddingCache, ResponseCache
+from llm_taxi.conversation import Message
+from llm_taxi.embeddings.base import Embedding
+from llm_taxi.llms.base import LLM
+from llm_taxi.microbatch import MicroBatcher, MicroBatchPolicy
+from llm_taxi.singleflight import SingleFlight
+from llm_taxi.tokens import ContextPolicy
+from llm_taxi.usage import Finish, Response, Usage
+
+
+class EchoLLM(LLM):
+    """Replies with the content of the last message, streamed one character at a time.
+
+    Args:
+        delay (float, optional): Seconds each upstream call takes before replying. Defaults to 0.0.
+        fail (Callable | None, optional): Raises for messages that should fail. Defaults to None.
+    """
+
+    provider: ClassVar[str] = "echo"
+    model: ClassVar[str] = "echo-1"
+
+    def __init__(
+        self,
+        *,
+        delay: float = 0.0,
+        fail=None,
+        response_cache: ResponseCache | None = None,
+        coalesce: bool = False,
+        context_policy: ContextPolicy | None = None,
+    ) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.closed = 0
+        self.requests: list[list[Message]] = []
+        self._response_cache = response_cache
+        self._single_flight = SingleFlight() if coalesce else None
+        self._context_policy = context_policy
+
+    def _convert_messages(self, messages: list[Message]) -> list[dict]:
+        return [{"role": x.role.value, "content": x.content} for x in messages]
+
+    async def _call(self, messages: list[Message]) -> str:
+        self.calls += 1
+        self.requests.append(messages)
+        await asyncio.sleep(self.delay)
+        if self.fail is not None:
+            self.fail(messages)
+
+        return messages[-1].content
+
+    async def _response(self, messages: list[Message], **kwargs) -> Response:
+        content = await self._call(messages)
+
+        return Response(
+            content=content,
+            usage=Usage(prompt_tokens=len(messages), completion_tokens=len(content)),
+            finish_reason="stop",
+        )
+
+    async def _streaming_response(
+        self,
+        messages: list[Message],
+        **kwargs,
+    ) -> AsyncGenerator:
+        content = await self._call(messages)
+
+        async def stream() -> AsyncGenerator:
+            try:
+                for char in content:
+                    await asyncio.sleep(0)
+                    yield char
+                yield Finish("stop")
+                yield Usage(prompt_tokens=len(messages), completion_tokens=len(content))
+            finally:
+                self.closed += 1
+
+        return stream()
+
+
+class FakeEmbedding(Embedding):
+    """Embeds a text as `[len(text), sum of its code points]`, counting upstream batches."""
+
+    provider: ClassVar[str] = "fake"
+    model: ClassVar[str] = "fake-embedding"
+
+    def __init__(
+        self,
+        *,
+        max_batch_size: int | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        micro_batch: MicroBatchPolicy | None = None,
+    ) -> None:
+        self.max_batch_size = max_batch_size
+        self.batches: list[list[str]] = []
+        self._embedding_cache = embedding_cache
+        self._micro_batcher = (
+            MicroBatcher(micro_batch, provider=self.provider, model=self.model)
+            if micro_batch is not None
+            else None
+        )
+
+    @staticmethod
+    def vector(text: str) -> list[float]:
+        return [float(len(text)), float(sum(map(ord, text)))]
+
+    async def _embed_text(self, text: str, **kwargs) -> list[float]:
+        self.batches.append([text])
+
+        return self.vector(text)
+
+    async def _embed_texts(self, texts: Sequence[str], **kwargs) -> list[list[float]]:
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+
+        return [self.vector(x) for x in texts]
+
+
+def user(content: str) -> Message:
+    return Message.validate(role="user", content=content)
@@ -0,0 +1,75 @@
+import pytest
+from fake_server import WORDS
+
+import llm_taxi.llms.anthropic
+from llm_taxi.batches import BatchRequestError, BatchStatus, BatchStore
+from llm_taxi.conversation import Message, Role
+from llm_taxi.factory import MODEL_CLASSES, Provider
+from llm_taxi.usage import Response
+
+CONVERSATIONS = 20
+MAX_TOKENS = 5
+
+# The Anthropic SDK appends its own API prefix to the base URL.
+BASE_PATHS = {
+    Provider.OpenAI: "/v1",
+    Provider.Anthropic: "",
+}
+
+
+def _llm(provider: Provider, url: str):
+    return MODEL_CLASSES[provider](
+        model="fake-model",
+        api_key="fake-key",
+        base_url=url + BASE_PATHS[provider],
+        max_retries=0,
+    )
+
+
+def _conversations():
+    return (
+        [Message(role=Role.User, content=f"Question number {i}")] for i in range(CONVERSATIONS)
+    )
+
+
+@pytest.fixture(autouse=True)
+def _small_upload_chunks(monkeypatch):
+    # Splits the Anthropic upload mid-line, to cover the chunk boundaries.
+    monkeypatch.setattr(llm_taxi.llms.anthropic, "_UPLOAD_CHUNK_SIZE", 7)
+
+
+@pytest.mark.parametrize("error_rate", [0.0, 0.3])
+@pytest.mark.parametrize("provider", list(BASE_PATHS))
+async def test_every_conversation_comes_back_once(server, tmp_path, provider, error_rate):
+    server.profile.error_rate = error_rate
+    store = BatchStore(tmp_path)
+    llm = _llm(provider, server.url)
+    expected = "".join(WORDS[i % len(WORDS)] for i in range(MAX_TOKENS))
+
+    job = await llm.submit_batch(_conversations(), store=store, max_tokens=MAX_TOKENS)
+    results = [x async for x in llm.collect(job, interval=0, store=store)]
+
+    assert job.requests == CONVERSATIONS
+    assert sorted(index for index, _ in results) == list(range(CONVERSATIONS))
+    errors = [x for _, x in results if isinstance(x, BatchRequestError)]
+    assert bool(errors) == bool(error_rate)
+    for _, result in results:
+        if not isinstance(result, BatchRequestError):
+            assert isinstance(result, Response)
+            assert result.content == expected
+
+
+@pytest.mark.parametrize("provider", list(BASE_PATHS))
+async def test_stored_jobs_are_collected_by_another_instance(server, tmp_path, provider):
+    store = BatchStore(tmp_path)
+    job = await _llm(provider, server.url).submit_batch(_conversations(), store=store)
+    await _llm(provider, server.url).poll(job, store=store)
+
+    # As after a restart: only the stored job is left.
+    (stored,) = BatchStore(tmp_path)
+    llm = _llm(provider, server.url)
+    results = [x async for x in llm.collect(stored, interval=0, store=store)]
+
+    assert (stored.id, stored.requests) == (job.id, CONVERSATIONS)
+    assert sorted(index for index, _ in results) == list(range(CONVERSATIONS))
+    assert store.load(job.id).status == BatchStatus.Completed
@@ -0,0 +1,138 @@
+import json
+
+import pytest
+
+from llm_taxi.bulk import run_jsonl
+from tests.fakes import EchoLLM
+
+
+def _write_input(path, contents: list[str]) -> None:
+    with path.open("w") as f:
+        for i, content in enumerate(contents):
+            record = {"id": f"r{i}", "messages": [{"role": "user", "content": content}]}
+            f.write(json.dumps(record) + "\n")
+
+
+def _read_output(path) -> list[dict]:
+    with path.open() as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "input.jsonl", tmp_path / "output.jsonl"
+
+
+async def test_answers_every_record_in_input_order(paths):
+    input_path, output_path = paths
+    _write_input(input_path, [f"question {i}" for i in range(5)])
+    llm = EchoLLM()
+
+    stats = await run_jsonl(llm, input_path, output_path, max_concurrency=3)
+
+    assert (stats.skipped, stats.succeeded, stats.failed) == (0, 5, 0)
+    output = _read_output(output_path)
+    assert [x["id"] for x in output] == [f"r{i}" for i in range(5)]
+    assert [x["response"] for x in output] == [f"question {i}" for i in range(5)]
+    assert output[0]["finish_reason"] == "stop"
+
+
+async def test_resumes_after_the_last_complete_record(paths):
+    input_path, output_path = paths
+    _write_input(input_path, [f"question {i}" for i in range(5)])
+    await run_jsonl(EchoLLM(), input_path, output_path)
+
+    # Simulate a crash while the fourth record was being written.
+    lines = output_path.read_text().splitlines(keepends=True)
+    output_path.write_text("".join(lines[:3]) + lines[3][:10])
+    llm = EchoLLM()
+
+    stats = await run_jsonl(llm, input_path, output_path)
+
+    assert (stats.skipped, stats.succeeded, stats.failed) == (3, 2, 0)
+    assert llm.calls == 2
+    assert [x["id"] for x in _read_output(output_path)] == [f"r{i}" for i in range(5)]
+
+
+async def test_completed_runs_are_not_repeated(paths):
+    input_path, output_path = paths
+    _write_input(input_path, ["a", "b"])
+    await run_jsonl(EchoLLM(), input_path, output_path)
+    llm = EchoLLM()
+
+    stats = await run_jsonl(llm, input_path, output_path)
+
+    assert (stats.skipped, stats.succeeded) == (2, 0)
+    assert llm.calls == 0
+
+
+async def test_failed_records_are_retried_on_resume(paths):
+    input_path, output_path = paths
+    _write_input(input_path, ["a", "fail", "c"])
+
+    def fail(messages):
+        if messages[-1].content == "fail":
+            raise RuntimeError("flaky")
+
+    stats = await run_jsonl(EchoLLM(fail=fail), input_path, output_path)
+    assert (stats.succeeded, stats.failed) == (2, 1)
+    assert "RuntimeError: flaky" in _read_output(output_path)[1]["error"]
+
+    llm = EchoLLM()
+    stats = await run_jsonl(llm, input_path, output_path)
+
+    assert (stats.skipped, stats.succeeded, stats.failed) == (2, 1, 0)
+    assert llm.calls == 1
+    assert [x.get("response") for x in _read_output(output_path)] == ["a", "fail", "c"]
+
+
+async def test_invalid_json_lines_become_error_records(paths):
+    input_path, output_path = paths
+    _write_input(input_path, ["a"])
+    with input_path.open("a") as f:
+        f.write("{not json\n")
+
+    stats = await run_jsonl(EchoLLM(), input_path, output_path)
+
+    assert (stats.succeeded, stats.failed) == (1, 1)
+    assert "JSONDecodeError" in _read_output(output_path)[1]["error"]
+
+
+async def test_non_object_lines_become_error_records(paths):
+    input_path, output_path = paths
+    _write_input(input_path, ["a"])
+    with input_path.open("a") as f:
+        f.write('[1, 2]\n42\n"text"\n')
+
+    stats = await run_jsonl(EchoLLM(), input_path, output_path)
+
+    assert (stats.succeeded, stats.failed) == (1, 3)
+    output = _read_output(output_path)
+    assert [x["id"] for x in output] == ["r0", 1, 2, 3]
+    assert all("Expected a JSON object" in x["error"] for x in output[1:])
+
+
+async def test_blank_lines_are_skipped(paths):
+    input_path, output_path = paths
+    _write_input(input_path, ["a", "b"])
+    input_path.write_text(input_path.read_text().replace("\n", "\n\n", 1) + "\n")
+
+    stats = await run_jsonl(EchoLLM(), input_path, output_path)
+    assert (stats.succeeded, stats.failed) == (2, 0)
+
+    stats = await run_jsonl(EchoLLM(), input_path, output_path)
+
+    assert (stats.skipped, stats.succeeded) == (2, 0)
+    assert [x["response"] for x in _read_output(output_path)] == ["a", "b"]
+
+
+async def test_output_of_another_input_is_rejected(paths):
+    input_path, output_path = paths
+    _write_input(input_path, ["a", "b"])
+    await run_jsonl(EchoLLM(), input_path, output_path)
+    with input_path.open("w") as f:
+        for record_id in ("r0", "other"):
+            f.write(json.dumps({"id": record_id, "messages": []}) + "\n")
+
+    with pytest.raises(ValueError, match="ends with record"):
+        await run_jsonl(EchoLLM(), input_path, output_path)
@@ -0,0 +1,118 @@
+import threading
+
+from llm_taxi.cache import DiskEmbeddingCache, MemoryCache, SQLiteCache, make_cache_key
+from tests.fakes import EchoLLM, FakeEmbedding, user
+
+
+async def test_detailed_response_reports_cache_hits():
+    llm = EchoLLM(response_cache=MemoryCache())
+
+    first = await llm.detailed_response([user("hi")])
+    second = await llm.detailed_response([user("hi")])
+
+    assert (first.content, first.cached) == ("hi", False)
+    assert (second.content, second.cached) == ("hi", True)
+    assert second.usage is None
+    assert llm.calls == 1
+
+
+async def test_streaming_response_reports_cache_hits():
+    llm = EchoLLM(response_cache=MemoryCache())
+
+    results = []
+    for _ in range(2):
+        stream = await llm.detailed_streaming_response([user("hello")])
+        assert "".join([x async for x in stream]) == "hello"
+        results.append(stream.response)
+
+    assert [x.cached for x in results] == [False, True]
+    assert llm.calls == 1
+
+
+async def test_streams_and_responses_share_cache_entries():
+    llm = EchoLLM(response_cache=MemoryCache())
+
+    await llm.response([user("hello")])
+    stream = await llm.detailed_streaming_response([user("hello")])
+
+    assert "".join([x async for x in stream]) == "hello"
+    assert stream.response.cached
+    assert llm.calls == 1
+
+
+async def test_interrupted_streams_are_not_cached():
+    llm = EchoLLM(response_cache=MemoryCache())
+
+    stream = await llm.streaming_response([user("hello")])
+    assert await anext(stream) == "h"
+    await stream.aclose()
+
+    response = await llm.detailed_response([user("hello")])
+
+    assert not response.cached
+    assert llm.calls == 2
+
+
+async def test_call_arguments_are_part_of_the_key():
+    llm = EchoLLM(response_cache=MemoryCache())
+
+    await llm.response([user("hi")], temperature=0)
+    response = await llm.detailed_response([user("hi")], temperature=1)
+
+    assert not response.cached
+    assert llm.calls == 2
+
+
+def test_cache_keys_do_not_depend_on_dict_order():
+    assert make_cache_key({"a": 1, "b": 2}) == make_cache_key({"b": 2, "a": 1})
+    assert make_cache_key({"a": 1}) != make_cache_key({"a": 2})
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+
+
+async def test_sqlite_cache_persists_across_instances(tmp_path):
+    path = tmp_path / "responses.db"
+    cache = SQLiteCache(path)
+    await cache.aset("key", "value")
+    cache.close()
+
+    cache = SQLiteCache(path)
+    try:
+        assert await cache.aget("key") == "value"
+        assert await cache.aget("missing") is None
+    finally:
+        cache.close()
+
+
+async def test_disk_embedding_cache_is_used_off_the_event_loop(tmp_path, monkeypatch):
+    cache = DiskEmbeddingCache(tmp_path)
+    threads = set()
+    for name in ["get_many", "set_many"]:
+        method = getattr(cache, name)
+
+        def record(*args, method=method):
+            threads.add(threading.get_ident())
+            return method(*args)
+
+        monkeypatch.setattr(cache, name, record)
+
+    try:
+        first = FakeEmbedding(embedding_cache=cache)
+        second = FakeEmbedding(embedding_cache=cache)
+
+        vectors = await first.embed_texts(["a", "bb"])
+        assert await second.embed_texts(["bb", "a"]) == vectors[::-1]
+        assert await second.embed_text("a") == vectors[0]
+    finally:
+        cache.close()
+
+    assert second.batches == []
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+
+from llm_taxi.embeddings.mistral import MistralEmbedding
+
+
+async def test_mistral_embeddings_pass_call_arguments_on():
+    llm = MistralEmbedding(model="mistral-embed", api_key="fake-key")
+    calls = []
+
+    async def embeddings(**kwargs):
+        calls.append(kwargs)
+        texts = [kwargs["input"]] if isinstance(kwargs["input"], str) else kwargs["input"]
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(x))]) for x in texts])
+
+    llm.client.embeddings = embeddings
+
+    assert await llm.embed_texts(["a", "bb"], encoding_format="float") == [[1.0], [2.0]]
+    assert await llm.embed_text("ccc", encoding_format="float") == [3.0]
+    assert [x["encoding_format"] for x in calls] == ["float", "float"]
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from llm_taxi.factory import cached_llm, instance_cache
+
+VENDOR_MODULES = ["openai", "anthropic", "groq", "mistralai", "together", "google.generativeai"]
+
+
+@pytest.fixture(autouse=True)
+def _clear_instance_cache():
+    instance_cache.cache_clear()
+    yield
+    instance_cache.cache_clear()
+
+
+def test_importing_the_package_skips_vendor_sdks():
+    code = (
+        "import json, sys\n"
+        "import llm_taxi, llm_taxi.llms, llm_taxi.embeddings, llm_taxi.factory\n"
+        f"print(json.dumps([x for x in {VENDOR_MODULES!r} if x in sys.modules]))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    ).stdout
+
+    assert json.loads(output) == []
+
+
+def test_cached_llm_reuses_instances_for_identical_arguments():
+    first = cached_llm("openai:gpt-4o", api_key="key", call_kwargs={"temperature": 0})
+    second = cached_llm("openai:gpt-4o", api_key="key", call_kwargs={"temperature": 0})
+
+    assert first is second
+    assert instance_cache.cache_info().hits == 1
+
+
+def test_cached_llm_keys_on_credentials_and_arguments():
+    first = cached_llm("openai:gpt-4o", api_key="key")
+
+    assert cached_llm("openai:gpt-4o", api_key="other") is not first
+    assert cached_llm("openai:gpt-4o", api_key="key", call_kwargs={"seed": 1}) is not first
+    assert cached_llm("openai:gpt-4o-mini", api_key="key") is not first
+
+
+def test_cached_llm_reads_credentials_from_the_environment(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "first")
+    first = cached_llm("openai:gpt-4o")
+    monkeypatch.setenv("OPENAI_API_KEY", "second")
+
+    assert cached_llm("openai:gpt-4o") is not first
+
+
+def test_unhashable_arguments_are_keyed_by_identity():
+    class Options:
+        __hash__ = None
+
+        def __repr__(self) -> str:
+            return "Options()"
+
+    options = Options()
+    first = cached_llm("openai:gpt-4o", api_key="key", call_kwargs={"extra_body": options})
+
+    assert cached_llm("openai:gpt-4o", api_key="key", call_kwargs={"extra_body": options}) is first
+    other = cached_llm("openai:gpt-4o", api_key="key", call_kwargs={"extra_body": Options()})
+    assert other is not first
+
+
+def test_instance_cache_is_bounded():
+    instance_cache.maxsize = 2
+    try:
+        for i in range(3):
+            cached_llm("openai:gpt-4o", api_key=f"key {i}")
+
+        assert instance_cache.cache_info().currsize == 2
+    finally:
+        instance_cache.maxsize = 128
@@ -0,0 +1,39 @@
+import asyncio
+
+from llm_taxi.llms.hedging import Hedged, _discard
+from llm_taxi.retry import prime_stream
+from tests.fakes import EchoLLM, user
+
+
+async def test_slow_requests_are_hedged():
+    primary = EchoLLM(delay=1.0)
+    hedge = EchoLLM()
+    llm = Hedged(primary, hedge, initial_delay=0.01, max_extra_load=1.0)
+
+    assert await llm.response([user("hi")]) == "hi"
+    assert (llm.hedges, llm.hedge_wins) == (1, 1)
+
+
+async def test_slow_streams_are_hedged():
+    primary = EchoLLM(delay=1.0)
+    hedge = EchoLLM()
+    llm = Hedged(primary, hedge, initial_delay=0.01, max_extra_load=1.0)
+
+    stream = await llm.streaming_response([user("hello")])
+
+    assert "".join([x async for x in stream]) == "hello"
+    assert (llm.hedges, llm.hedge_wins) == (1, 1)
+
+
+async def test_discarding_an_opened_stream_closes_the_provider_stream():
+    llm = EchoLLM()
+
+    async def open_stream():
+        stream = await llm.detailed_streaming_response([user("hello")])
+        return await prime_stream(stream.events())
+
+    task = asyncio.create_task(open_stream())
+    await asyncio.wait([task])
+    await _discard(task)
+
+    assert llm.closed == 1
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from llm_taxi.microbatch import MicroBatcher, MicroBatchPolicy
+from tests.fakes import FakeEmbedding
+
+
+def _recorder():
+    batches: list[list[int]] = []
+
+    async def func(items: list[int]) -> list[int]:
+        batches.append(items)
+        await asyncio.sleep(0)
+        return [x * 10 for x in items]
+
+    return func, batches
+
+
+async def test_concurrent_calls_are_merged_into_one_batch():
+    batcher = MicroBatcher(MicroBatchPolicy(max_wait=0.01))
+    func, batches = _recorder()
+
+    results = await asyncio.gather(*(batcher.submit("k", i, func) for i in range(5)))
+
+    assert results == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1, 2, 3, 4]]
+
+
+async def test_full_batches_are_sent_without_waiting():
+    policy = MicroBatchPolicy(max_batch_size=4, max_wait=10)
+    batcher = MicroBatcher(policy)
+    func, batches = _recorder()
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit("k", i, func) for i in range(8))),
+        timeout=1,
+    )
+
+    assert results == [i * 10 for i in range(8)]
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert policy.metrics.mean_batch_size == 4
+
+
+async def test_calls_with_different_keys_are_not_merged():
+    batcher = MicroBatcher(MicroBatchPolicy(max_wait=0))
+    func, batches = _recorder()
+
+    await asyncio.gather(batcher.submit("a", 1, func), batcher.submit("b", 2, func))
+
+    assert sorted(batches) == [[1], [2]]
+
+
+async def test_batch_errors_reach_every_caller():
+    batcher = MicroBatcher(MicroBatchPolicy(max_wait=0))
+
+    async def func(items: list[int]) -> list[int]:
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(batcher.submit("k", i, func) for i in range(3)),
+        return_exceptions=True,
+    )
+
+    assert [type(x) for x in results] == [ValueError] * 3
+
+
+async def test_cancelled_callers_are_left_out_of_the_batch():
+    batcher = MicroBatcher(MicroBatchPolicy(max_wait=0.01))
+    func, batches = _recorder()
+
+    cancelled = asyncio.create_task(batcher.submit("k", 1, func))
+    kept = asyncio.create_task(batcher.submit("k", 2, func))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await kept == 20
+    assert batches == [[2]]
+
+
+def test_policy_is_validated():
+    with pytest.raises(ValueError):
+        MicroBatchPolicy(max_batch_size=0)
+    with pytest.raises(ValueError):
+        MicroBatchPolicy(max_wait=-1)
+
+
+async def test_embed_text_calls_are_micro_batched():
+    embedding = FakeEmbedding(micro_batch=MicroBatchPolicy(max_wait=0.01))
+    texts = ["a", "bb", "a", "ccc"]
+
+    vectors = await asyncio.gather(*(embedding.embed_text(x) for x in texts))
+
+    assert vectors == [FakeEmbedding.vector(x) for x in texts]
+    # Duplicates within a batch are embedded once.
+    assert embedding.batches == [["a", "bb", "ccc"]]
+
+
+async def test_embed_texts_is_split_into_provider_sized_batches():
+    embedding = FakeEmbedding(max_batch_size=3)
+    texts = [f"text {i}" for i in range(7)] + ["text 0"]
+
+    vectors = await embedding.embed_texts(texts)
+
+    assert vectors == [FakeEmbedding.vector(x) for x in texts]
+    assert sorted(map(len, embedding.batches)) == [1, 3, 3]
+    assert sorted(sum(embedding.batches, [])) == sorted(set(texts))
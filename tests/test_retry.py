@@ -0,0 +1,186 @@
+import email.utils
+import time
+
+import pytest
+
+from llm_taxi.clients.base import Client
+from llm_taxi.conversation import Message, Role
+from llm_taxi.factory import MODEL_CLASSES, Provider
+from llm_taxi.retry import (
+    RetryPolicy,
+    call_with_retry,
+    get_retry_after,
+    is_retryable,
+    prime_stream,
+)
+
+POLICY = RetryPolicy(max_attempts=3, initial_delay=0, jitter=False)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeClient(Client[None]):
+    provider = "fake"
+
+    def _init_client(self, **kwargs) -> None:
+        return None
+
+
+def _failing(errors: list[Exception], result: str = "ok"):
+    attempts = []
+
+    async def func() -> str:
+        attempts.append(time.monotonic())
+        if len(attempts) <= len(errors):
+            raise errors[len(attempts) - 1]
+        return result
+
+    return func, attempts
+
+
+async def test_transient_errors_are_retried_until_success():
+    func, attempts = _failing([StatusError(503), StatusError(429)])
+
+    assert await call_with_retry(func, POLICY) == "ok"
+    assert len(attempts) == 3
+
+
+async def test_gives_up_after_max_attempts():
+    func, attempts = _failing([StatusError(500)] * 5)
+
+    with pytest.raises(StatusError):
+        await call_with_retry(func, POLICY)
+    assert len(attempts) == POLICY.max_attempts
+
+
+async def test_fatal_errors_are_not_retried():
+    func, attempts = _failing([StatusError(400)])
+
+    with pytest.raises(StatusError):
+        await call_with_retry(func, POLICY)
+    assert len(attempts) == 1
+
+
+async def test_connection_errors_are_retried():
+    func, attempts = _failing([ConnectionResetError()])
+
+    assert await call_with_retry(func, POLICY) == "ok"
+    assert len(attempts) == 2
+
+
+async def test_retry_after_is_honoured():
+    func, attempts = _failing([StatusError(429, {"retry-after-ms": "50"})])
+
+    await call_with_retry(func, POLICY)
+
+    assert attempts[1] - attempts[0] >= 0.045
+
+
+async def test_no_retry_is_started_past_the_deadline():
+    policy = RetryPolicy(max_attempts=10, initial_delay=0, deadline=1.0)
+    func, attempts = _failing([StatusError(429, {"retry-after": "5"})] * 2)
+
+    with pytest.raises(StatusError):
+        await call_with_retry(func, policy)
+    assert len(attempts) == 1
+
+
+def test_retry_after_formats():
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+
+    assert get_retry_after(StatusError(429, {"retry-after": "2"})) == 2.0
+    assert get_retry_after(StatusError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert 25 < get_retry_after(StatusError(429, {"retry-after": date})) <= 30
+    assert get_retry_after(StatusError(429)) is None
+
+
+def test_errors_are_classified_by_status_and_name():
+    class APIConnectionError(Exception):
+        pass
+
+    assert is_retryable(StatusError(529), POLICY)
+    assert not is_retryable(StatusError(401), POLICY)
+    assert is_retryable(APIConnectionError(), POLICY)
+    assert not is_retryable(ValueError(), POLICY)
+
+
+async def test_client_requests_are_retried():
+    client = FakeClient(model="m", api_key="k", retry_policy=POLICY)
+    func, attempts = _failing([StatusError(502)])
+
+    assert await client._request(func) == "ok"
+    assert len(attempts) == 2
+
+
+async def test_streams_are_retried_only_before_their_first_chunk():
+    client = FakeClient(model="m", api_key="k", retry_policy=POLICY)
+    opened = 0
+
+    async def open_stream():
+        nonlocal opened
+        opened += 1
+
+        async def stream():
+            if opened == 1:
+                raise StatusError(503)
+            yield "a"
+            raise StatusError(503)
+
+        return stream()
+
+    stream = await client._stream_request(open_stream)
+
+    assert await anext(stream) == "a"
+    with pytest.raises(StatusError):
+        await anext(stream)
+    assert opened == 2
+
+
+async def test_closing_a_primed_stream_closes_its_source():
+    closed = False
+
+    async def source():
+        nonlocal closed
+        try:
+            yield "a"
+            yield "b"
+        finally:
+            closed = True
+
+    stream = await prime_stream(source())
+    await stream.aclose()
+
+    assert closed
+
+
+@pytest.mark.parametrize(
+    ("provider", "kwargs"),
+    [
+        ("openai", {"base_url": "{url}/v1"}),
+        ("anthropic", {"base_url": "{url}"}),
+        ("groq", {"base_url": "{url}"}),
+        ("mistral", {"endpoint": "{url}"}),
+    ],
+)
+async def test_sdk_retries_do_not_multiply_policy_attempts(server, provider, kwargs):
+    server.profile.error_rate = 1.0
+    llm = MODEL_CLASSES[Provider(provider)](
+        model="fake-model",
+        api_key="fake-key",
+        retry_policy=RetryPolicy(max_attempts=2, initial_delay=0),
+        **{k: v.format(url=server.url) for k, v in kwargs.items()},
+    )
+
+    try:
+        with pytest.raises(Exception):
+            await llm.response([Message(role=Role.User, content="hi")])
+    finally:
+        # Mistral's client keeps its own connections outside the shared pool.
+        await llm.client.close()
+
+    assert server.statuses[500] == 2
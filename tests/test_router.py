@@ -0,0 +1,27 @@
+from llm_taxi.llms.router import Router
+from tests.fakes import EchoLLM, user
+
+
+async def test_requests_fail_over_to_the_next_backend():
+    def fail(messages):
+        raise RuntimeError("down")
+
+    failing = EchoLLM(fail=fail)
+    router = Router([failing, EchoLLM()])
+
+    assert await router.response([user("hi")]) == "hi"
+    assert failing.calls == 1
+    assert router.backends[0].error_rate > 0
+
+
+async def test_closing_a_routed_stream_closes_the_backend_stream():
+    backend = EchoLLM()
+    router = Router([backend])
+
+    stream = await router.streaming_response([user("hello")])
+    assert await anext(stream) == "h"
+    assert router.backends[0].outstanding == 1
+    await stream.aclose()
+
+    assert backend.closed == 1
+    assert router.backends[0].outstanding == 0
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from llm_taxi.singleflight import SingleFlight
+from tests.fakes import EchoLLM, user
+
+
+async def test_concurrent_identical_requests_share_one_call():
+    llm = EchoLLM(delay=0.01, coalesce=True)
+
+    responses = await asyncio.gather(*(llm.response([user("hi")]) for _ in range(5)))
+
+    assert responses == ["hi"] * 5
+    assert llm.calls == 1
+    assert llm._single_flight.coalesced == 4
+
+
+async def test_different_requests_are_not_coalesced():
+    llm = EchoLLM(delay=0.01, coalesce=True)
+
+    responses = await asyncio.gather(llm.response([user("a")]), llm.response([user("b")]))
+
+    assert responses == ["a", "b"]
+    assert llm.calls == 2
+
+
+async def test_results_are_only_shared_while_in_flight():
+    llm = EchoLLM(coalesce=True)
+
+    await llm.response([user("hi")])
+    await llm.response([user("hi")])
+
+    assert llm.calls == 2
+
+
+async def test_joined_callers_get_copies():
+    flight = SingleFlight()
+
+    async def call() -> list[int]:
+        await asyncio.sleep(0.01)
+        return [1, 2]
+
+    first, second = await asyncio.gather(
+        flight.do("key", call, copy=list),
+        flight.do("key", call, copy=list),
+    )
+
+    assert first == second
+    assert first is not second
+
+
+async def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def call() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("key", call),
+        flight.do("key", call),
+        return_exceptions=True,
+    )
+
+    assert [type(x) for x in results] == [ValueError, ValueError]
+
+
+async def test_upstream_call_is_cancelled_with_its_last_caller():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def call() -> None:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    callers = [asyncio.create_task(flight.do("key", call)) for _ in range(2)]
+    await started.wait()
+
+    callers[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    callers[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    with pytest.raises(asyncio.CancelledError):
+        await callers[1]
+
+
+async def test_concurrent_identical_streams_share_one_call():
+    llm = EchoLLM(delay=0.01, coalesce=True)
+
+    async def consume() -> str:
+        return "".join([x async for x in await llm.streaming_response([user("hello")])])
+
+    assert await asyncio.gather(*(consume() for _ in range(3))) == ["hello"] * 3
+    assert llm.calls == 1
+
+
+async def test_late_stream_subscribers_replay_earlier_chunks():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def open_stream():
+        async def stream():
+            yield "a"
+            await release.wait()
+            yield "b"
+
+        return stream()
+
+    first = await flight.stream("key", open_stream)
+    assert await anext(first) == "a"
+
+    second = await flight.stream("key", open_stream)
+    release.set()
+
+    assert [x async for x in first] == ["b"]
+    assert [x async for x in second] == ["a", "b"]
+    assert flight.coalesced == 1
+
+
+async def test_closing_every_subscriber_cancels_the_upstream_stream():
+    flight = SingleFlight()
+    closed = asyncio.Event()
+
+    async def open_stream():
+        async def stream():
+            try:
+                yield "a"
+                await asyncio.sleep(10)
+            finally:
+                closed.set()
+
+        return stream()
+
+    first = await flight.stream("key", open_stream)
+    second = await flight.stream("key", open_stream)
+    assert await anext(first) == "a"
+
+    await first.aclose()
+    await asyncio.sleep(0)
+    assert not closed.is_set()
+
+    await second.aclose()
+    await asyncio.wait_for(closed.wait(), timeout=1)
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import pytest
+
+from llm_taxi.llms.streaming import (
+    ChunkCoalescing,
+    coalesce_chunks,
+    raw_stream_events,
+    sse_data,
+)
+from llm_taxi.usage import Finish, ToolCallDelta, Usage
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(stream) -> list:
+    return [x async for x in stream]
+
+
+def _sse(*payloads: dict) -> bytes:
+    lines = [f"data: {json.dumps(x)}\n\n" for x in payloads]
+
+    return "".join(lines).encode() + b"data: [DONE]\n\n"
+
+
+async def test_sse_data_reassembles_lines_split_across_chunks():
+    chunks = [b'data: {"a"', b": 1}\n\nda", b'ta: {"b": 2}\n', b"\ndata: [DONE]\n\n"]
+
+    assert await _collect(sse_data(_aiter(chunks))) == [b'{"a": 1}', b'{"b": 2}']
+
+
+async def test_sse_data_skips_comments_and_other_fields():
+    chunks = [b": keep-alive\r\nevent: message\r\ndata: 1\r\n\r\nid: 7\ndata:2\n\n"]
+
+    assert await _collect(sse_data(_aiter(chunks))) == [b"1", b"2"]
+
+
+async def test_sse_data_yields_an_unterminated_last_line():
+    assert await _collect(sse_data(_aiter([b"data: 1\n", b"data: 2"]))) == [b"1", b"2"]
+
+
+async def test_raw_stream_events_parses_text_tool_calls_finish_and_usage():
+    body = _sse(
+        {"choices": [{"delta": {"content": "Hel"}}]},
+        {"choices": [{"delta": {"content": "lo"}}]},
+        {
+            "choices": [
+                {
+                    "delta": {
+                        "tool_calls": [
+                            {"index": 0, "id": "call_1", "function": {"name": "f", "arguments": "{}"}},
+                        ],
+                    },
+                },
+            ],
+        },
+        {"choices": [{"delta": {}, "finish_reason": "tool_calls"}]},
+        {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2}},
+    )
+    # Split the body at arbitrary points, as the network does.
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    assert await _collect(raw_stream_events(_aiter(chunks))) == [
+        "Hel",
+        "lo",
+        ToolCallDelta(index=0, id="call_1", name="f", arguments="{}"),
+        Finish("tool_calls"),
+        Usage(prompt_tokens=3, completion_tokens=2),
+    ]
+
+
+async def test_raw_stream_events_raises_errors_reported_in_the_stream():
+    body = _sse({"error": {"message": "overloaded"}})
+
+    with pytest.raises(RuntimeError, match="overloaded"):
+        await _collect(raw_stream_events(_aiter([body])))
+
+
+async def test_coalescing_merges_small_chunks():
+    events = ["a", "b", "c", "d", "e"]
+    coalescing = ChunkCoalescing(min_chars=2, max_delay=None)
+
+    assert await _collect(coalesce_chunks(_aiter(events), coalescing)) == ["ab", "cd", "e"]
+
+
+async def test_coalescing_releases_the_buffer_before_other_events():
+    events = ["a", "b", Finish("stop"), Usage(completion_tokens=2)]
+    coalescing = ChunkCoalescing(min_chars=100, max_delay=None)
+
+    assert await _collect(coalesce_chunks(_aiter(events), coalescing)) == [
+        "ab",
+        Finish("stop"),
+        Usage(completion_tokens=2),
+    ]
+
+
+async def test_coalescing_releases_the_buffer_on_its_deadline():
+    async def events():
+        yield "a"
+        await asyncio.sleep(0.5)
+        yield "b"
+
+    loop = asyncio.get_running_loop()
+    stream = coalesce_chunks(events(), ChunkCoalescing(min_chars=100, max_delay=0.02))
+    start = loop.time()
+
+    assert await anext(stream) == "a"
+    assert loop.time() - start < 0.4
+    assert await _collect(stream) == ["b"]
+
+
+async def test_closing_a_coalesced_stream_closes_its_source():
+    closed = asyncio.Event()
+
+    async def events():
+        try:
+            while True:
+                yield "a"
+                await asyncio.sleep(0)
+        finally:
+            closed.set()
+
+    stream = coalesce_chunks(events(), ChunkCoalescing(min_chars=1, max_delay=0.02))
+    assert await anext(stream) == "a"
+    await stream.aclose()
+
+    assert closed.is_set()
@@ -0,0 +1,156 @@
+import pytest
+
+from llm_taxi.conversation import Message, Role
+from llm_taxi.tokens import (
+    ContextPolicy,
+    ContextWindowExceededError,
+    Overflow,
+    Tokenizer,
+    fit_messages,
+)
+from tests.fakes import EchoLLM
+
+
+class WordTokenizer(Tokenizer):
+    name = "words"
+    message_overhead = 0
+    request_overhead = 0
+
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+
+TOKENIZER = WordTokenizer()
+
+
+def _message(role: Role, words: int, cache: bool = False) -> Message:
+    return Message(role=role, content=" ".join(["word"] * words), cache=cache)
+
+
+def _conversation(turns: int) -> list[Message]:
+    messages = [_message(Role.System, 10)]
+    for _ in range(turns):
+        messages += [_message(Role.User, 10), _message(Role.Assistant, 10)]
+
+    return [*messages, _message(Role.User, 10)]
+
+
+async def test_fitting_conversations_are_unchanged():
+    messages = _conversation(2)
+
+    fitted = await fit_messages(messages, TOKENIZER, 60, ContextPolicy())
+
+    assert fitted is messages
+
+
+async def test_reject_raises():
+    with pytest.raises(ContextWindowExceededError) as info:
+        await fit_messages(_conversation(2), TOKENIZER, 59, ContextPolicy())
+
+    assert (info.value.tokens, info.value.limit) == (60, 59)
+
+
+async def test_truncate_drops_the_oldest_turns():
+    messages = _conversation(3)
+    policy = ContextPolicy(overflow=Overflow.Truncate)
+
+    fitted = await fit_messages(messages, TOKENIZER, 60, policy)
+
+    assert fitted == [messages[0], *messages[3:]]
+
+
+async def test_truncate_drops_whole_turns():
+    messages = _conversation(3)
+    policy = ContextPolicy(overflow=Overflow.Truncate)
+
+    fitted = await fit_messages(messages, TOKENIZER, 75, policy)
+
+    assert fitted == [messages[0], *messages[3:]]
+
+
+async def test_truncate_keeps_roles_alternating_after_a_cached_user_prefix():
+    messages = _conversation(3)
+    messages[1] = _message(Role.User, 10, cache=True)
+    policy = ContextPolicy(overflow=Overflow.Truncate)
+
+    fitted = await fit_messages(messages, TOKENIZER, 60, policy)
+
+    assert fitted == [*messages[:2], *messages[4:]]
+    assert [x.role for x in fitted[1:]] == [Role.User, Role.Assistant, Role.User, Role.Assistant, Role.User]
+
+
+async def test_truncate_drops_repeated_messages_by_position():
+    message = _message(Role.User, 10)
+    reply = _message(Role.Assistant, 10)
+    messages = [_message(Role.System, 10), message, reply, message, reply, message]
+    policy = ContextPolicy(overflow=Overflow.Truncate)
+
+    fitted = await fit_messages(messages, TOKENIZER, 40, policy)
+
+    assert fitted == [messages[0], message, reply, message]
+
+
+async def test_truncate_keeps_the_system_prompt_and_the_last_message():
+    messages = _conversation(3)
+    policy = ContextPolicy(overflow=Overflow.Truncate)
+
+    fitted = await fit_messages(messages, TOKENIZER, 20, policy)
+
+    assert fitted == [messages[0], messages[-1]]
+
+
+async def test_truncate_keeps_the_prefix_marked_for_caching():
+    messages = _conversation(3)
+    messages[2] = _message(Role.Assistant, 10, cache=True)
+    policy = ContextPolicy(overflow=Overflow.Truncate)
+
+    fitted = await fit_messages(messages, TOKENIZER, 60, policy)
+
+    assert fitted == [*messages[:3], *messages[5:]]
+
+
+async def test_truncate_raises_when_the_kept_messages_do_not_fit():
+    policy = ContextPolicy(overflow=Overflow.Truncate)
+
+    with pytest.raises(ContextWindowExceededError):
+        await fit_messages(_conversation(1), TOKENIZER, 19, policy)
+
+
+async def test_summarize_replaces_the_dropped_turns():
+    messages = _conversation(3)
+    summarized: list[list[Message]] = []
+
+    async def summarize(dropped: list[Message]) -> str:
+        summarized.append(dropped)
+        return "earlier"
+
+    policy = ContextPolicy(overflow=Overflow.Summarize, summarizer=summarize)
+
+    fitted = await fit_messages(messages, TOKENIZER, 66, policy)
+
+    assert summarized == [messages[1:3]]
+    assert fitted[0] is messages[0]
+    assert fitted[1].role == Role.User
+    assert fitted[1].content.startswith("Summary of the earlier conversation:\nearlier\n\n")
+    assert fitted[1].content.endswith(messages[3].content)
+    assert fitted[2:] == messages[4:]
+
+
+async def test_models_fit_messages_before_sending():
+    policy = ContextPolicy(overflow=Overflow.Truncate, context_window=40, reserve_tokens=0)
+    llm = EchoLLM(context_policy=policy)
+    messages = _conversation(3)
+
+    await llm.response(messages)
+
+    assert llm.requests == [[messages[0], messages[-1]]]
+
+
+async def test_the_completion_budget_is_reserved():
+    policy = ContextPolicy(overflow=Overflow.Reject, context_window=40)
+    llm = EchoLLM(context_policy=policy)
+    messages = _conversation(0)
+
+    await llm.response(messages, max_tokens=3)
+    with pytest.raises(ContextWindowExceededError):
+        await llm.response(messages, max_tokens=10)
@@ -0,0 +1,34 @@
+from llm_taxi.clients.transport import get_transport_pool
+from llm_taxi.conversation import Message, Role
+from llm_taxi.llms.openai import OpenAI
+
+MESSAGES = [Message(role=Role.User, content="hi")]
+
+
+def _openai(base_url: str) -> OpenAI:
+    return OpenAI(model="fake-model", api_key="fake-key", base_url=base_url, max_retries=0)
+
+
+async def test_closing_one_sdk_client_keeps_the_pool_open(server):
+    first = _openai(f"{server.url}/v1")
+    second = _openai(f"{server.url}/v1")
+
+    await first.response(MESSAGES)
+    await first.client.close()
+    async with first.client:
+        pass
+
+    assert await second.response(MESSAGES)
+    assert not get_transport_pool().get("openai", f"{server.url}/v1").is_closed
+
+
+async def test_environment_proxies_apply_per_loop(server, monkeypatch):
+    # The fake server answers absolute-form requests, so it can act as the proxy.
+    for name in ["HTTP_PROXY", "http_proxy"]:
+        monkeypatch.setenv(name, server.url)
+    for name in ["NO_PROXY", "no_proxy", "ALL_PROXY", "all_proxy"]:
+        monkeypatch.delenv(name, raising=False)
+    llm = _openai("http://upstream.invalid/v1")
+
+    assert await llm.response(MESSAGES)
+    assert not get_transport_pool().get("openai", "http://upstream.invalid/v1").trust_env